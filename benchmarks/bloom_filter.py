@@ -0,0 +1,115 @@
+"""False positive rate, memory and latency of the game id Bloom filter.
+
+Fills Bloom filters sized for several error rates with random game ids, and
+reports their memory footprint next to a set of the same game ids, their
+expected and measured false positive rates, and the time per lookup. Then
+floods GET /game/<game_id>/score with unknown game ids through the test
+client against an in-memory test database of registered games, with the
+filter disabled and enabled, and reports the latency percentiles.
+
+Usage:
+    python benchmarks/bloom_filter.py --games 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bowling_game.settings')
+
+import django  # NOQA: E402
+
+django.setup()
+
+from django.db import connection  # NOQA: E402
+from django.test import Client  # NOQA: E402
+from django.test import override_settings  # NOQA: E402
+from django.test.utils import setup_test_environment  # NOQA: E402
+
+from game import bloom  # NOQA: E402
+from game import models as game_models  # NOQA: E402
+
+ERROR_RATES = (0.1, 0.01, 0.001)
+
+
+def _game_ids(count):
+    return [game_models.random_string(16) for _ in range(count)]
+
+
+def _set_bytes(game_ids):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    game_id_set = set(game_ids)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del game_id_set
+    return after - before
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def _flood(client, requests):
+    latencies = []
+    for game_id in _game_ids(requests):
+        start = time.perf_counter()
+        response = client.get('/game/{}/score'.format(game_id))
+        latencies.append(time.perf_counter() - start)
+        assert response.json()['errors'][0]['error_code'] == 404
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=1000000)
+    parser.add_argument('--probes', type=int, default=100000)
+    parser.add_argument('--registered', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    game_ids = _game_ids(args.games)
+    probes = [game_id[:15] for game_id in _game_ids(args.probes)]
+    print('{} game ids in a set: {:.1f} MiB'.format(
+        args.games, _set_bytes(game_ids) / 2.0 ** 20))
+    print('{:>10}{:>12}{:>10}{:>8}{:>12}{:>12}{:>12}'.format(
+        'error rate', 'MiB', 'bits/id', 'hashes', 'expected', 'measured',
+        'lookup us'))
+    for error_rate in ERROR_RATES:
+        bloom_filter = bloom.BloomFilter(args.games, error_rate)
+        for game_id in game_ids:
+            bloom_filter.add(game_id)
+        start = time.perf_counter()
+        false_positives = sum(probe in bloom_filter for probe in probes)
+        elapsed = time.perf_counter() - start
+        print('{:>10}{:>12.2f}{:>10.1f}{:>8}{:>12.4f}{:>12.4f}{:>12.2f}'.format(
+            error_rate, bloom_filter.nbytes / 2.0 ** 20,
+            bloom_filter.size / float(args.games), bloom_filter.hash_count,
+            bloom_filter.false_positive_rate(),
+            false_positives / float(args.probes),
+            elapsed / args.probes * 1e6))
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    game_models.GameRegistration.objects.bulk_create(
+        [game_models.GameRegistration() for _ in range(args.registered)],
+        batch_size=500)
+    client = Client()
+    print('{:<16}{:>10}{:>10}{:>10}'.format(
+        'unknown ids', 'p50 us', 'p95 us', 'p99 us'))
+    for name, enabled in (('without filter', False), ('with filter', True)):
+        with override_settings(GAME_BLOOM_FILTER={'ENABLED': enabled}):
+            bloom.game_ids.clear()
+            _flood(client, 100)
+            latencies = _flood(client, args.requests)
+        print('{:<16}{:>10.0f}{:>10.0f}{:>10.0f}'.format(
+            name, _percentile(latencies, 50) * 1e6,
+            _percentile(latencies, 95) * 1e6,
+            _percentile(latencies, 99) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
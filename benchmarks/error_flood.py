@@ -0,0 +1,139 @@
+"""Memory and latency of the error results under a flood of 404 errors.
+
+Compares the error carriers constructed for every failed request, i.e. an
+empty ScorePerFrame or Game with an error added versus an ErrorResult, by
+the memory retained per carrier and the time to construct and serialize it.
+Then floods the score endpoints with unknown game ids through the test
+client against an in-memory test database, and reports the latency
+percentiles and the peak of the memory traced during the flood.
+
+Usage:
+    python benchmarks/error_flood.py --requests 5000
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bowling_game.settings')
+
+import django  # NOQA: E402
+
+django.setup()
+
+from django.db import connection  # NOQA: E402
+from django.test import Client  # NOQA: E402
+from django.test.utils import setup_test_environment  # NOQA: E402
+
+from game import models as game_models  # NOQA: E402
+from game import serializers  # NOQA: E402
+
+
+def _error():
+    return game_models.Error(
+        error_code=404,
+        error_message='No game was found for the game id: abcde12345.')
+
+
+def _model_carrier(clazz):
+    def carrier():
+        carrier_object = clazz()
+        carrier_object.add_error(_error())
+        return carrier_object
+    return carrier
+
+
+def _game_carrier():
+    game_object = game_models.Game('abcde12345')
+    game_object.add_error(_error())
+    return game_object
+
+
+def _error_result():
+    return game_models.ErrorResult([_error()])
+
+
+CARRIERS = (
+    ('ScorePerFrame', _model_carrier(game_models.ScorePerFrame),
+     serializers.ScorePerFrameSerializer),
+    ('Game', _game_carrier, serializers.ScoreSerializer),
+    ('ErrorResult', _error_result, serializers.ScoreSerializer),
+)
+
+
+def _retained_bytes(factory, count):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    carriers = [factory() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del carriers
+    return (after - before) / count
+
+
+def _time_per_call(function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def _flood(client, method, path, requests):
+    latencies = []
+    tracemalloc.start()
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = method(path)
+        latencies.append(time.perf_counter() - start)
+        assert response.json()['errors'][0]['error_code'] == 404
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Latencies with tracemalloc off, since it slows allocations down.
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        method(path)
+        latencies.append(time.perf_counter() - start)
+    return latencies, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--carriers', type=int, default=100000)
+    parser.add_argument('--iterations', type=int, default=100000)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    print('{:<16}{:>14}{:>16}{:>20}'.format(
+        'carrier', 'bytes', 'construct us', 'construct+serialize'))
+    for name, factory, serializer in CARRIERS:
+        print('{:<16}{:>14.0f}{:>16.2f}{:>17.2f} us'.format(
+            name, _retained_bytes(factory, args.carriers),
+            _time_per_call(factory, args.iterations) * 1e6,
+            _time_per_call(lambda: serializer(factory()).data,
+                           args.iterations // 10) * 1e6))
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    client = Client()
+    print('{:<16}{:>10}{:>10}{:>10}{:>14}'.format(
+        'endpoint', 'p50 us', 'p95 us', 'p99 us', 'peak KiB'))
+    for name, method, path in (
+            ('get_score', client.get, '/game/abcde12345/score'),
+            ('set_score', client.post, '/game/abcde12345/score/X')):
+        latencies, peak = _flood(client, method, path, args.requests)
+        print('{:<16}{:>10.0f}{:>10.0f}{:>10.0f}{:>14.1f}'.format(
+            name, _percentile(latencies, 50) * 1e6,
+            _percentile(latencies, 95) * 1e6,
+            _percentile(latencies, 99) * 1e6, peak / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""Load test simulating bowling lanes playing against a running server.
+
+Every lane registers a game, plays its ten frames at --fps frames per second
+with random valid scores, and polls GET /game/<game_id>/score --polls times
+between two frames, like a lane display would. The lanes then start another
+game until --games games have been played in total.
+
+Only the standard library is used, so that the load test can run from any
+machine with Python 3. Latency percentiles, throughput and errors are
+reported per endpoint; errors include the error codes returned in the
+response bodies with a 200 status.
+
+Usage:
+    python manage.py runserver --noreload &
+    python benchmarks/loadtest.py --url http://127.0.0.1:8000 --lanes 40 \\
+        --games 200 --fps 0.5 --polls 2
+"""
+import argparse
+import asyncio
+import collections
+import json
+import random
+import re
+import time
+from urllib import parse
+
+# Same grammar as game.services.is_valid_score.
+SCORE_PATTERN = re.compile(
+    '^(X-X-X|X-X-[0-9]|X-[0-9]/|X-[0-9]-[0-9]|X{1}|[0-9]/X|[0-9]/[0-9]|'
+    '[0-9]/|[0-9]-[0-9])$')
+
+
+def _open_frame():
+    first = random.randint(0, 9)
+    return '{}-{}'.format(first, random.randint(0, 9 - first))
+
+
+def random_frame(frame):
+    """Returns a random valid score string for the frame."""
+    kind = random.random()
+    if frame < 10:
+        if kind < 0.3:
+            score = 'X'
+        elif kind < 0.6:
+            score = '{}/'.format(random.randint(0, 9))
+        else:
+            score = _open_frame()
+    elif kind < 0.1:
+        score = 'X-X-X'
+    elif kind < 0.2:
+        score = 'X-X-{}'.format(random.randint(0, 9))
+    elif kind < 0.3:
+        score = 'X-{}/'.format(random.randint(0, 9))
+    elif kind < 0.4:
+        score = 'X-' + _open_frame()
+    elif kind < 0.5:
+        score = '{}/X'.format(random.randint(0, 9))
+    elif kind < 0.6:
+        score = '{}/{}'.format(random.randint(0, 9), random.randint(0, 9))
+    else:
+        score = _open_frame()
+    assert SCORE_PATTERN.match(score), score
+    return score
+
+
+class Connection(object):
+    """HTTP/1.1 connection, reopened whenever the server closes it."""
+
+    def __init__(self, host, port, timeout):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path):
+        """Returns the status code and the body of the response."""
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port)
+            try:
+                return await asyncio.wait_for(
+                    self._request(method, path), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server closed a kept alive connection; retry once.
+                self.close()
+                if attempt:
+                    raise
+            except BaseException:
+                self.close()
+                raise
+
+    async def _request(self, method, path):
+        self.writer.write((
+            '{} {} HTTP/1.1\r\nHost: {}\r\nContent-Length: 0\r\n'
+            'Accept: application/json\r\n\r\n').format(
+                method, path, self.host).encode())
+        await self.writer.drain()
+        status_line = await self.reader.readuntil(b'\r\n')
+        status_code = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'content-length' in headers:
+            body = await self.reader.readexactly(
+                int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status_code, body
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class Results(object):
+    """Latencies and errors per endpoint."""
+
+    def __init__(self):
+        self.latencies = collections.defaultdict(list)
+        self.errors = collections.defaultdict(collections.Counter)
+
+    async def call(self, connection, endpoint, method, path):
+        """Sends the request and returns the decoded body, or None on errors.
+        """
+        start = time.perf_counter()
+        try:
+            status_code, body = await connection.request(method, path)
+        except Exception as e:
+            self.latencies[endpoint].append(time.perf_counter() - start)
+            self.errors[endpoint][type(e).__name__] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        try:
+            data = json.loads(body.decode())
+        except ValueError:
+            data = None
+        if status_code >= 400:
+            self.errors[endpoint]['HTTP {}'.format(status_code)] += 1
+            return None
+        if isinstance(data, dict) and data.get('errors'):
+            for error in data['errors']:
+                self.errors[endpoint]['error_code {}'.format(
+                    error.get('error_code'))] += 1
+            return None
+        return data
+
+
+async def play_lane(url, games, args, results):
+    connection = Connection(url.hostname, url.port or 80, args.timeout)
+    interval = 1.0 / args.fps
+    # Lanes start at random offsets instead of all at once.
+    await asyncio.sleep(random.random() * interval)
+    try:
+        while games:
+            games.pop()
+            game = await results.call(
+                connection, 'register', 'POST', '/game/register')
+            if game is None:
+                continue
+            game_id = game['game_id']
+            for frame in range(1, 11):
+                frame_start = time.perf_counter()
+                await results.call(
+                    connection, 'set_score', 'POST',
+                    '/game/{}/score/{}'.format(game_id, random_frame(frame)))
+                for poll in range(args.polls):
+                    await asyncio.sleep(max(
+                        0, frame_start + interval * (poll + 1) /
+                        (args.polls + 1) - time.perf_counter()))
+                    await results.call(
+                        connection, 'get_score', 'GET',
+                        '/game/{}/score'.format(game_id))
+                await asyncio.sleep(max(
+                    0, frame_start + interval - time.perf_counter()))
+    finally:
+        connection.close()
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def report(results, elapsed):
+    print('{:<12}{:>10}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'endpoint', 'requests', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms',
+        'errors'))
+    total = 0
+    for endpoint in ('register', 'set_score', 'get_score'):
+        latencies = results.latencies[endpoint]
+        if not latencies:
+            continue
+        total += len(latencies)
+        print('{:<12}{:>10}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}{:>10}'.format(
+            endpoint, len(latencies), len(latencies) / elapsed,
+            _percentile(latencies, 50) * 1e3,
+            _percentile(latencies, 95) * 1e3,
+            _percentile(latencies, 99) * 1e3,
+            sum(results.errors[endpoint].values())))
+    print('total: {} requests in {:.1f} s, {:.1f} req/s'.format(
+        total, elapsed, total / elapsed))
+    for endpoint, errors in sorted(results.errors.items()):
+        for error, count in errors.most_common():
+            print('error: {} {}: {}'.format(endpoint, error, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--lanes', type=int, default=40)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--fps', type=float, default=0.5,
+                        help='frames played per second on every lane')
+    parser.add_argument('--polls', type=int, default=2,
+                        help='score polls between two frames')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    url = parse.urlsplit(args.url)
+    games = list(range(args.games))
+    results = Results()
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    start = time.perf_counter()
+    try:
+        loop.run_until_complete(asyncio.gather(*[
+            play_lane(url, games, args, results)
+            for _ in range(args.lanes)]))
+    finally:
+        loop.close()
+    report(results, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Contention benchmark of the write locks of the games.
+
+Lane controllers retrying frames race to score the same game: every game is
+played by several writer threads at once, each scoring frames until the game
+is over. Without the locks, the writers of a game score the same frame
+concurrently and all but one are rejected by the unique constraint, after
+all their scoring queries; with the locks, they queue in the process.
+
+Runs against a temporary SQLite database with the production PRAGMAs, and
+reports the frames saved per second, the rejected writes, and the latency
+percentiles of set_frame_score, with the locks disabled and enabled. The
+writes of different games can still be rejected with 'database is locked',
+when SQLite can not upgrade a read transaction to a write one; run a single
+game to isolate the contention on the same game.
+
+Usage:
+    python benchmarks/lock_contention.py --games 8 --writers-per-game 4
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bowling_game.settings')
+
+import django  # NOQA: E402
+
+django.setup()
+
+from django import db  # NOQA: E402
+from django.test import override_settings  # NOQA: E402
+from django.test.utils import setup_test_environment  # NOQA: E402
+
+from bowling_game import settings_production  # NOQA: E402
+from game import models as game_models  # NOQA: E402
+from game import services  # NOQA: E402
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.rejected = 0
+
+    def add(self, latency, rejected):
+        with self.lock:
+            self.latencies.append(latency)
+            self.rejected += rejected
+
+
+def _writer(game_id, stats):
+    queryset = game_models.ScorePerFrame.objects.select_related('game')
+    try:
+        while True:
+            start = time.perf_counter()
+            result = services.set_frame_score(queryset, game_id, '3-4')
+            latency = time.perf_counter() - start
+            error_codes = [error.error_code for error in result.errors]
+            if 400 in error_codes:
+                # The game is over.
+                return
+            stats.add(latency, bool(error_codes))
+    finally:
+        db.connection.close()
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def run(games, writers_per_game):
+    game_ids = [services.register_game().game_id for _ in range(games)]
+    stats = Stats()
+    threads = [threading.Thread(target=_writer, args=(game_id, stats))
+               for game_id in game_ids for _ in range(writers_per_game)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    saved = game_models.ScorePerFrame.objects.filter(
+        game__in=game_ids).count()
+    return saved / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=8)
+    parser.add_argument('--writers-per-game', type=int, default=4)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    connection = db.connections['default']
+    connection.settings_dict['TEST']['NAME'] = os.path.join(
+        directory, 'bench.sqlite3')
+    connection.settings_dict['OPTIONS'] = {'timeout': 30}
+    setup_test_environment()
+    try:
+        with override_settings(
+                GAME_SQLITE_PRAGMAS=settings_production.GAME_SQLITE_PRAGMAS):
+            connection.creation.create_test_db(verbosity=0)
+            print('{:<10}{:>12}{:>12}{:>10}{:>10}'.format(
+                'locks', 'frames/s', 'rejected', 'p50 ms', 'p99 ms'))
+            for enabled in (False, True):
+                with override_settings(GAME_WRITE_LOCKS={'ENABLED': enabled}):
+                    frames_per_second, stats = run(
+                        args.games, args.writers_per_game)
+                print('{:<10}{:>12.1f}{:>12}{:>10.1f}{:>10.1f}'.format(
+                    'enabled' if enabled else 'disabled', frames_per_second,
+                    stats.rejected, _percentile(stats.latencies, 50) * 1e3,
+                    _percentile(stats.latencies, 99) * 1e3))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
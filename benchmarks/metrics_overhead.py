@@ -0,0 +1,88 @@
+"""Overhead of the metrics instrumentation relative to the request time.
+
+Plays full games through the test client against an in-memory test database,
+counts the metric updates made per request, and multiplies them by the cost
+of a single update measured in a tight loop; the cost of a timed call is the
+difference between a timed and a bare call of a no-op function.
+
+Usage:
+    python benchmarks/metrics_overhead.py --games 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bowling_game.settings')
+
+import django  # NOQA: E402
+
+django.setup()
+
+from django.db import connection  # NOQA: E402
+from django.test import Client  # NOQA: E402
+from django.test.utils import setup_test_environment  # NOQA: E402
+
+from game import metrics  # NOQA: E402
+
+GAME = ('X', '7/', '7-2', 'X', 'X', '9/', '0-0', '8/', 'X', 'X-X-X')
+
+
+def _observations():
+    # Every state holds the bucket counts followed by the sum.
+    return (sum(sum(state[:-1])
+                for _, state in metrics.FUNCTION_DURATION._merged_shards()) +
+            sum(value for _, value in metrics.ERRORS._merged_shards()))
+
+
+def _update_cost(iterations):
+    histogram = metrics.Histogram('benchmark_seconds', 'Benchmark.', 'label',
+                                  registry=None)
+
+    def noop():
+        pass
+
+    timed = metrics.timed(histogram, 'noop')(noop)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        noop()
+    bare = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(iterations):
+        timed()
+    return (time.perf_counter() - start - bare) / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=1000000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    client = Client()
+    observations_before = _observations()
+    requests = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        game_id = client.post('/game/register').json()['game_id']
+        for score in GAME:
+            client.post('/game/{}/score/{}'.format(game_id, score))
+            client.get('/game/{}/score'.format(game_id))
+        requests += 1 + 2 * len(GAME)
+    per_request = (time.perf_counter() - start) / requests
+    updates_per_request = (_observations() - observations_before) / requests
+    update_cost = _update_cost(args.iterations)
+    overhead = updates_per_request * update_cost
+    print('requests: {}'.format(requests))
+    print('mean request time: {:.1f} us'.format(per_request * 1e6))
+    print('metric updates per request: {:.2f}'.format(updates_per_request))
+    print('cost per timed call: {:.2f} us'.format(update_cost * 1e6))
+    print('overhead: {:.2f} us per request, {:.2f}% of request time'.format(
+        overhead * 1e6, overhead / per_request * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Startup time and per-request overhead of the settings profiles.
+
+Every measurement runs in a fresh interpreter so that the import cost of one
+profile does not leak into the other:
+
+* startup: time to import the WSGI application of the profile.
+* per request: mean latency of GET /game/<id>/score through the full WSGI
+  handler (middleware included) against an in-memory test database.
+
+Medians over --runs interpreters are reported.
+
+Usage:
+    python benchmarks/settings_overhead.py --runs 5 --requests 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = (
+    ('full', 'bowling_game.settings', 'bowling_game.wsgi'),
+    ('api', 'bowling_game.settings_api', 'bowling_game.wsgi_api'),
+)
+
+STARTUP = """
+import importlib, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ['DJANGO_SETTINGS_MODULE'] = {settings!r}
+start = time.perf_counter()
+importlib.import_module({wsgi!r})
+print(time.perf_counter() - start)
+"""
+
+REQUESTS = """
+import json, os, sys, time
+sys.path.insert(0, {root!r})
+os.environ['DJANGO_SETTINGS_MODULE'] = {settings!r}
+import django
+django.setup()
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+setup_test_environment()
+connection.creation.create_test_db(verbosity=0)
+client = Client()
+game_id = client.post('/game/register').json()['game_id']
+for score in ('X', '7/', '7-2'):
+    client.post('/game/{{}}/score/{{}}'.format(game_id, score))
+url = '/game/{{}}/score'.format(game_id)
+for _ in range(100):
+    client.get(url)
+start = time.perf_counter()
+for _ in range({requests}):
+    client.get(url)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'per_request': elapsed / {requests}}}))
+"""
+
+
+def _run(script):
+    output = subprocess.check_output([sys.executable, '-c', script], cwd=ROOT)
+    return output.decode().strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    startup = {name: [] for name, _, _ in PROFILES}
+    per_request = {name: [] for name, _, _ in PROFILES}
+    # Profiles are interleaved so that drift on the machine affects both.
+    for _ in range(args.runs):
+        for name, settings, wsgi in PROFILES:
+            startup[name].append(float(_run(STARTUP.format(
+                root=ROOT, settings=settings, wsgi=wsgi))))
+            per_request[name].append(json.loads(_run(REQUESTS.format(
+                root=ROOT, settings=settings,
+                requests=args.requests)))['per_request'])
+    print('{:<8}{:>16}{:>20}'.format('profile', 'startup (ms)',
+                                     'per request (us)'))
+    for name, _, _ in PROFILES:
+        print('{:<8}{:>16.1f}{:>20.1f}'.format(
+            name, statistics.median(startup[name]) * 1e3,
+            statistics.median(per_request[name]) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
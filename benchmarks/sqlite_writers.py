@@ -0,0 +1,171 @@
+"""Concurrent writer benchmark for the SQLite database profiles.
+
+Simulates lane controllers scoring frames while scoreboards poll totals. Every
+writer inserts a frame and updates the previous frame (the retroactive strike
+and spare bookkeeping) in one transaction; readers fetch the latest total.
+
+Two profiles are compared:
+
+* default: rollback journal, driver default timeout, a fresh connection per
+  request (no CONN_MAX_AGE), i.e. bowling_game.settings.
+* production: the PRAGMAs and persistent connections of
+  bowling_game.settings_production.
+
+Usage:
+    python benchmarks/sqlite_writers.py --writers 8 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCHEMA = """
+CREATE TABLE frame (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    game_id VARCHAR(16) NOT NULL,
+    frame INTEGER NOT NULL,
+    frame_score INTEGER NULL,
+    total_score_for_frame INTEGER NULL
+);
+CREATE INDEX frame_game_idx ON frame (game_id, frame);
+"""
+
+
+def _production_pragmas():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE',
+                          'bowling_game.settings_production')
+    from bowling_game import settings_production
+    return settings_production.GAME_SQLITE_PRAGMAS
+
+
+PROFILES = {
+    'default': {'timeout': 5.0, 'pragmas': (), 'persistent': False},
+    'production': {'timeout': 30.0, 'pragmas': None, 'persistent': True},
+}
+
+
+def _connect(path, profile):
+    connection = sqlite3.connect(
+        path, timeout=profile['timeout'], isolation_level=None,
+        check_same_thread=False)
+    for name, value in profile['pragmas']:
+        connection.execute('PRAGMA {}={}'.format(name, value))
+    return connection
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.writes = 0
+        self.reads = 0
+        self.lock_errors = 0
+
+    def add(self, writes=0, reads=0, lock_errors=0):
+        with self.lock:
+            self.writes += writes
+            self.reads += reads
+            self.lock_errors += lock_errors
+
+
+def _write(connection, game_id, frame):
+    connection.execute('BEGIN IMMEDIATE')
+    try:
+        connection.execute(
+            'INSERT INTO frame (game_id, frame, frame_score, '
+            'total_score_for_frame) VALUES (?, ?, ?, ?)',
+            (game_id, frame, 9, None))
+        connection.execute(
+            'UPDATE frame SET total_score_for_frame = ? '
+            'WHERE game_id = ? AND frame = ?', (frame * 9, game_id, frame - 1))
+        connection.execute('COMMIT')
+    except sqlite3.Error:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def _read(connection, game_id):
+    connection.execute(
+        'SELECT total_score_for_frame FROM frame WHERE game_id = ? '
+        'AND total_score_for_frame IS NOT NULL ORDER BY frame DESC LIMIT 1',
+        (game_id,)).fetchone()
+
+
+def _worker(path, profile, deadline, stats, index, is_writer):
+    game_id = 'lane{:012d}'.format(index)
+    connection = _connect(path, profile) if profile['persistent'] else None
+    frame = 0
+    while time.time() < deadline:
+        conn = connection or _connect(path, profile)
+        try:
+            if is_writer:
+                frame += 1
+                _write(conn, game_id, frame)
+                stats.add(writes=1)
+            else:
+                _read(conn, 'lane{:012d}'.format(random.randint(0, index)))
+                stats.add(reads=1)
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            stats.add(lock_errors=1)
+        finally:
+            if connection is None:
+                conn.close()
+    if connection is not None:
+        connection.close()
+
+
+def run(profile_name, writers, readers, seconds):
+    profile = dict(PROFILES[profile_name])
+    if profile['pragmas'] is None:
+        profile['pragmas'] = _production_pragmas()
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'bench.sqlite3')
+    setup = sqlite3.connect(path)
+    setup.executescript(SCHEMA)
+    setup.close()
+
+    stats = Stats()
+    deadline = time.time() + seconds
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(path, profile, deadline, stats, i, i < writers))
+        for i in range(writers + readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    attempts = stats.writes + stats.lock_errors
+    return {
+        'profile': profile_name,
+        'writes_per_second': stats.writes / seconds,
+        'reads_per_second': stats.reads / seconds,
+        'lock_error_rate': (stats.lock_errors / attempts) if attempts else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    print('{:<12}{:>14}{:>14}{:>18}'.format(
+        'profile', 'writes/s', 'reads/s', 'lock error rate'))
+    for name in ('default', 'production'):
+        result = run(name, args.writers, args.readers, args.seconds)
+        print('{profile:<12}{writes_per_second:>14.1f}'
+              '{reads_per_second:>14.1f}{lock_error_rate:>18.2%}'.format(
+                  **result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Load test of the live score events with many subscribers on one server.
+
+Every subscriber opens GET /game/<game_id>/events on a threaded WSGI server
+running in the process, the one of runserver, which serves every request on
+its own thread. A full game is then played on every lane through
+POST /game/<game_id>/score/<score>, and the time from the request scoring a
+frame until every subscriber of the lane has received it is reported.
+
+Every open stream holds a server thread until it ends. The database
+connection its request opened to read the frames saved so far is closed
+before the stream waits, even with CONN_MAX_AGE=600 as in the production
+settings. The peak of the threads, and the database connections opened and
+still open once every subscriber is waiting, are reported.
+
+Runs against a temporary SQLite database with the production PRAGMAs and
+CONN_MAX_AGE, and the default rate limits.
+
+Usage:
+    python benchmarks/sse_subscribers.py --subscribers 1000 --lanes 40
+"""
+import argparse
+import collections
+import http.client
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bowling_game.settings')
+
+import django  # NOQA: E402
+
+django.setup()
+
+from django import db  # NOQA: E402
+from django.core.servers import basehttp  # NOQA: E402
+from django.db.backends import signals as db_signals  # NOQA: E402
+from django.test import override_settings  # NOQA: E402
+from django.test.utils import setup_test_environment  # NOQA: E402
+
+from bowling_game import settings_production  # NOQA: E402
+from game import events  # NOQA: E402
+from game import services  # NOQA: E402
+
+SCORES = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/3']
+
+
+class Server(basehttp.ThreadedWSGIServer):
+    # Room for every subscriber connecting at once.
+    request_queue_size = 1024
+
+
+class QuietHandler(basehttp.WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server():
+    server = Server(('127.0.0.1', 0), QuietHandler)
+    server.set_app(basehttp.get_internal_wsgi_application())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _subscriber(port, game_id, received):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('GET', '/game/{}/events'.format(game_id),
+                           headers={'Accept': 'text/event-stream'})
+        response = connection.getresponse()
+        for line in response:
+            if line.startswith(b'id: '):
+                frame = int(line[4:])
+                received[(game_id, frame)].append(time.perf_counter())
+    finally:
+        connection.close()
+
+
+def _post(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        connection.request('POST', path)
+        connection.getresponse().read()
+    finally:
+        connection.close()
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def _wait_until(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise RuntimeError('Timed out.')
+        time.sleep(0.01)
+
+
+def run(subscribers, lanes, frame_interval, connections_opened):
+    server = _start_server()
+    port = server.server_address[1]
+    game_ids = [services.register_game().game_id for _ in range(lanes)]
+    received = collections.defaultdict(list)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    threads = []
+    for index in range(subscribers):
+        thread = threading.Thread(
+            target=_subscriber,
+            args=(port, game_ids[index % lanes], received), daemon=True)
+        thread.start()
+        threads.append(thread)
+    _wait_until(lambda: events.hub.subscriber_count() == subscribers)
+    # The subscribers, their server threads and the server itself.
+    peak_threads = threading.active_count()
+    connections_open = sum(wrapper.connection is not None
+                           for wrapper in connections_opened)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    published = {}
+    for score_index, score in enumerate(SCORES):
+        for game_id in game_ids:
+            published[(game_id, score_index + 1)] = time.perf_counter()
+            _post(port, '/game/{}/score/{}'.format(game_id, score))
+        time.sleep(frame_interval)
+    for thread in threads:
+        thread.join(timeout=10)
+    server.shutdown()
+    server.server_close()
+
+    fan_out = [max(times) - published[key]
+               for key, times in received.items() if times]
+    deliveries = sum(len(times) for times in received.values())
+    return {
+        'deliveries': deliveries,
+        'streams_open': sum(thread.is_alive() for thread in threads),
+        'fan_out': fan_out,
+        'peak_threads': peak_threads,
+        'connections_open': connections_open,
+        'rss_growth': rss_after - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=1000)
+    parser.add_argument('--lanes', type=int, default=40)
+    parser.add_argument('--frame-interval', type=float, default=0.05)
+    parser.add_argument('--heartbeat', type=float, default=1.0)
+    args = parser.parse_args()
+
+    threading.stack_size(256 * 1024)
+    directory = tempfile.mkdtemp()
+    connection = db.connections['default']
+    connection.settings_dict['TEST']['NAME'] = os.path.join(
+        directory, 'bench.sqlite3')
+    connection.settings_dict.update(
+        {key: settings_production.DATABASES['default'][key]
+         for key in ('CONN_MAX_AGE', 'OPTIONS')})
+    connections_opened = []
+    db_signals.connection_created.connect(
+        lambda sender, connection, **kwargs: connections_opened.append(
+            connection),
+        weak=False)
+    setup_test_environment()
+    try:
+        with override_settings(
+                ALLOWED_HOSTS=['127.0.0.1'],
+                GAME_SQLITE_PRAGMAS=settings_production.GAME_SQLITE_PRAGMAS,
+                GAME_EVENTS={'HEARTBEAT_SECONDS': args.heartbeat}):
+            connection.creation.create_test_db(verbosity=0)
+            del connections_opened[:]
+            result = run(args.subscribers, args.lanes, args.frame_interval,
+                         connections_opened)
+    finally:
+        shutil.rmtree(directory)
+
+    print('subscribers: {}'.format(args.subscribers))
+    print('events delivered: {} of {}'.format(
+        result['deliveries'], args.subscribers * 10))
+    print('subscribers dropped: {}'.format(events.hub.dropped_count))
+    print('streams still open: {}'.format(result['streams_open']))
+    print('fan-out latency per frame: p50 {:.2f} ms, p99 {:.2f} ms'.format(
+        _percentile(result['fan_out'], 50) * 1e3,
+        _percentile(result['fan_out'], 99) * 1e3))
+    print('peak threads, clients included: {}'.format(
+        result['peak_threads']))
+    print('database connections opened: {}'.format(len(connections_opened)))
+    print('database connections open while the streams wait: {}'.format(
+        result['connections_open']))
+    print('max RSS growth for subscribers: {:.1f} MiB'.format(
+        result['rss_growth'] / 1024.0))
+
+
+if __name__ == '__main__':
+    main()
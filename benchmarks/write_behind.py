@@ -0,0 +1,140 @@
+"""Throughput benchmark of the write-behind path of the frames.
+
+Lane controllers play complete games at once, each in its own thread, and
+every frame is saved by set_frame_score. Compares the default path, one
+transaction per frame, with the write-behind path, where the frames are
+acknowledged once journaled and committed in batches by a single writer.
+
+Runs against a temporary SQLite database with the production PRAGMAs, and
+reports the frames acknowledged per second, the latency percentiles of
+set_frame_score, and the average number of frames per committed batch.
+
+Usage:
+    python benchmarks/write_behind.py --lanes 16 --games 5
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bowling_game.settings')
+
+import django  # NOQA: E402
+
+django.setup()
+
+from django import db  # NOQA: E402
+from django.test import override_settings  # NOQA: E402
+from django.test.utils import setup_test_environment  # NOQA: E402
+
+from bowling_game import settings_production  # NOQA: E402
+from game import models as game_models  # NOQA: E402
+from game import services  # NOQA: E402
+from game import writebehind  # NOQA: E402
+
+SCORES = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/3']
+
+
+class Stats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.errors = 0
+
+    def add(self, latencies, errors):
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.errors += errors
+
+
+def _lane(game_ids, stats):
+    queryset = game_models.ScorePerFrame.objects.select_related('game')
+    latencies = []
+    errors = 0
+    try:
+        for game_id in game_ids:
+            for score in SCORES:
+                start = time.perf_counter()
+                result = services.set_frame_score(queryset, game_id, score)
+                latencies.append(time.perf_counter() - start)
+                errors += bool(result.errors)
+    finally:
+        db.connection.close()
+    stats.add(latencies, errors)
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100.0))]
+
+
+def _batch_size_sum_and_count():
+    values = {}
+    for sample in writebehind.BATCH_SIZES.samples():
+        name, value = sample.rsplit(' ', 1)
+        if name.endswith(('_sum', '_count')):
+            values[name.rsplit('_', 1)[1]] = float(value)
+    return values.get('sum', 0.0), values.get('count', 0.0)
+
+
+def run(lanes, games):
+    stats = Stats()
+    threads = [threading.Thread(target=_lane, args=(
+        [services.register_game().game_id for _ in range(games)], stats))
+        for _ in range(lanes)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(stats.latencies) / elapsed, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lanes', type=int, default=16)
+    parser.add_argument('--games', type=int, default=5)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    connection = db.connections['default']
+    connection.settings_dict['TEST']['NAME'] = os.path.join(
+        directory, 'bench.sqlite3')
+    connection.settings_dict['OPTIONS'] = {'timeout': 30}
+    setup_test_environment()
+    try:
+        with override_settings(
+                GAME_SQLITE_PRAGMAS=settings_production.GAME_SQLITE_PRAGMAS):
+            connection.creation.create_test_db(verbosity=0)
+            print('{:<14}{:>12}{:>10}{:>10}{:>10}{:>12}'.format(
+                'path', 'frames/s', 'errors', 'p50 ms', 'p99 ms',
+                'batch size'))
+            for enabled in (False, True):
+                with override_settings(GAME_WRITE_BEHIND={
+                        'ENABLED': enabled,
+                        'JOURNAL_PATH': os.path.join(
+                            directory, 'frames.journal')}):
+                    before = _batch_size_sum_and_count()
+                    frames_per_second, stats = run(args.lanes, args.games)
+                    writebehind.shutdown()
+                    after = _batch_size_sum_and_count()
+                batches = after[1] - before[1]
+                print('{:<14}{:>12.1f}{:>10}{:>10.1f}{:>10.1f}{:>12}'.format(
+                    'write-behind' if enabled else 'transactions',
+                    frames_per_second, stats.errors,
+                    _percentile(stats.latencies, 50) * 1e3,
+                    _percentile(stats.latencies, 99) * 1e3,
+                    '{:.1f}'.format((after[0] - before[0]) / batches)
+                    if batches else '-'))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
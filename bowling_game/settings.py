@@ -11,10 +11,16 @@ https://docs.djangoproject.com/en/2.0/ref/settings/
 """
 
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Directory of the files written at runtime, outside of the source tree,
+# which may be read-only when deployed. The temporary directory may be
+# cleared on reboot: point GAME_DATA_DIR to a persistent one in production.
+DATA_DIR = os.environ.get('GAME_DATA_DIR', tempfile.gettempdir())
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.0/howto/deployment/checklist/
@@ -42,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'game.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'game.throttling.WriteConcurrencyMiddleware',
 ]
 
 ROOT_URLCONF = 'bowling_game.urls'
@@ -79,12 +87,120 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    },
-    'OPTIONS': {
-        'timeout': 300,
+        'OPTIONS': {
+            'timeout': 300,
+        },
     }
 }
 
+# PRAGMA statements executed on every new SQLite connection. See
+# game.signals.configure_sqlite_connection and bowling_game.settings_production.
+GAME_SQLITE_PRAGMAS = ()
+
+
+REST_FRAMEWORK = {
+    'EXCEPTION_HANDLER': 'game.viewset.exception_handler',
+}
+
+# Token bucket rate limits of set_score per client and per game, and the
+# maximum number of writes in progress before shedding load. See
+# game.throttling; both are disabled unless configured.
+GAME_RATE_LIMITS = {}
+
+GAME_MAX_PENDING_WRITES = None
+
+# Requests carrying this token in the X-Profile header, or in the profile query
+# parameter, are profiled. See game.profiling; disabled without a token.
+GAME_PROFILING = {
+    'TOKEN': os.environ.get('GAME_PROFILING_TOKEN'),
+    'TOP_N': 30,
+    'BUFFER_SIZE': 20,
+}
+
+# Sampled traces of the scoring requests are handed to the exporter. See
+# game.tracing; disabled without an exporter.
+GAME_TRACING = {
+    'EXPORTER': None,
+    'SAMPLE_RATE': 0.01,
+    'PATH': os.path.join(DATA_DIR, 'bowling_game-traces.jsonl'),
+}
+
+# 'eager' scores every frame when it is written; 'lazy' only appends it, and
+# scores the frames of the game on its next read, or when the
+# materialize_scores command sweeps the dirty games. See
+# game.services.materialize_scores.
+GAME_SCORING_MODE = 'eager'
+
+# Responses of the scoring requests carrying an Idempotency-Key header are
+# replayed to the retries. See game.idempotency.
+GAME_IDEMPOTENCY = {
+    'TTL_SECONDS': 86400,
+    'LEASE_SECONDS': 30,
+    'MAX_RECORDS': 100000,
+    'CACHE_SIZE': 10000,
+    'PRUNE_INTERVAL': 100,
+}
+
+
+# Lookups of the games by game id are cached in the CACHE, and unknown game
+# ids are cached for a few seconds. See game.existence; disabled unless enabled.
+GAME_EXISTENCE_CACHE = {
+    'ENABLED': False,
+    'CACHE': 'default',
+    'TTL_SECONDS': 300,
+    'NEGATIVE_TTL_SECONDS': 5,
+}
+
+# Unknown game ids are answered with a 404 by an in-process Bloom filter of the
+# registered game ids, before any cache or database access. See game.bloom;
+# disabled unless enabled, since it only sees the games registered by its own
+# process between rebuilds.
+GAME_BLOOM_FILTER = {
+    'ENABLED': False,
+    'CAPACITY': 1000000,
+    'ERROR_RATE': 0.01,
+    'REBUILD_SECONDS': 3600,
+}
+
+# Concurrent reads of the score of a game share a single computation. See
+# game.singleflight; disabled unless enabled.
+GAME_SINGLE_FLIGHT = {
+    'ENABLED': False,
+}
+
+# The writes of a game are serialized by a fixed array of in-process locks
+# indexed by a hash of the game id. See game.locks; disabled unless enabled.
+GAME_WRITE_LOCKS = {
+    'ENABLED': False,
+    'STRIPES': 1024,
+    'TIMEOUT_SECONDS': 5,
+}
+
+# Frames are scored in memory, journaled and acknowledged, and committed in
+# batches by a single writer thread. See game.writebehind; a single process
+# must save the frames of a game.
+GAME_WRITE_BEHIND = {
+    'ENABLED': False,
+    'JOURNAL_PATH': os.path.join(DATA_DIR, 'bowling_game-frames.journal'),
+    'BATCH_SIZE': 100,
+    'LINGER_SECONDS': 0.002,
+    'READ_TIMEOUT_SECONDS': 5,
+    'MAX_ATTEMPTS': 10,
+    'DEAD_LETTER_PATH': os.path.join(
+        DATA_DIR, 'bowling_game-frames.dead_letters'),
+}
+
+# The statistics and score events of a frame are run by a pool of worker
+# threads once it is committed. See game.tasks.
+GAME_TASKS = {
+    'ENABLED': False,
+    'WORKERS': 4,
+    'MAX_QUEUE_SIZE': 1000,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_SECONDS': 0.5,
+    'DRAIN_SECONDS': 10,
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.0/ref/settings/#auth-password-validators
@@ -0,0 +1,42 @@
+"""
+API-only settings for bowling_game project.
+
+The game API is a JSON web service: it does not use the admin, sessions,
+messages, authentication, CSRF protection or templates. This profile drops
+them from INSTALLED_APPS and MIDDLEWARE so that they are neither imported at
+startup nor executed on every request.
+
+Use it through bowling_game.wsgi_api, or by exporting
+DJANGO_SETTINGS_MODULE=bowling_game.settings_api.
+"""
+
+from bowling_game.settings import *  # NOQA: F401,F403
+
+INSTALLED_APPS = [
+    'rest_framework',
+    'game.apps.GameConfig',
+]
+
+MIDDLEWARE = [
+    'game.profiling.ProfilingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'game.throttling.WriteConcurrencyMiddleware',
+]
+
+TEMPLATES = []
+
+AUTH_PASSWORD_VALIDATORS = []
+
+USE_I18N = False
+
+# Without django.contrib.auth there is no user model; requests are anonymous
+# and only JSON is rendered (the browsable API needs templates and sessions).
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
+    'UNAUTHENTICATED_USER': None,
+    'EXCEPTION_HANDLER': 'game.viewset.exception_handler',
+}
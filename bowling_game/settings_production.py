@@ -0,0 +1,67 @@
+"""
+Production settings for bowling_game project.
+
+Extends the default settings with a tuned SQLite profile:
+
+1. WAL journaling so that readers no longer block the single writer.
+2. synchronous=NORMAL, which is durable in WAL mode except on power loss.
+3. a busy timeout so that writers wait for the lock instead of failing.
+4. memory mapped I/O and a larger page cache.
+5. persistent connections so that the PRAGMAs are paid once per connection
+   instead of once per request.
+
+It also enables the rate limits and the load shedding of game.throttling,
+samples 1% of the scoring requests into traces (game.tracing), coalesces
+the concurrent reads of a score (game.singleflight), serializes the writes of
+a game in the process (game.locks), and moves the statistics and score events
+of a frame off the request (game.tasks).
+
+The cache of the game lookups (game.existence) is left disabled: it needs a
+cache shared by every process in CACHES, which this profile does not
+configure.
+
+Use it by exporting DJANGO_SETTINGS_MODULE=bowling_game.settings_production.
+"""
+import copy
+
+from bowling_game.settings import *  # NOQA: F401,F403
+from bowling_game.settings import DATABASES
+from bowling_game.settings import GAME_TASKS
+from bowling_game.settings import GAME_TRACING
+from bowling_game.settings import GAME_WRITE_LOCKS
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+# A copy, so that importing this module leaves the default settings intact.
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES['default']['CONN_MAX_AGE'] = 600
+DATABASES['default']['OPTIONS'] = {
+    # Seconds the sqlite3 driver waits for a lock before raising.
+    'timeout': 30,
+}
+
+GAME_SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 30000),
+    ('mmap_size', 268435456),
+    # Negative values are in KiB, i.e. 64 MiB of page cache.
+    ('cache_size', -65536),
+)
+
+GAME_RATE_LIMITS = {
+    'client': {'RATE': 20, 'BURST': 40, 'MAX_KEYS': 10000},
+    'game': {'RATE': 2, 'BURST': 12, 'MAX_KEYS': 10000},
+}
+
+GAME_MAX_PENDING_WRITES = 32
+
+GAME_TRACING = dict(GAME_TRACING, EXPORTER='game.tracing.JsonFileExporter')
+
+GAME_SINGLE_FLIGHT = {'ENABLED': True}
+
+GAME_WRITE_LOCKS = dict(GAME_WRITE_LOCKS, ENABLED=True)
+
+GAME_TASKS = dict(GAME_TASKS, ENABLED=True)
@@ -0,0 +1,14 @@
+"""
+WSGI config for the API-only profile of bowling_game project.
+
+It exposes the WSGI callable as a module-level variable named ``application``
+configured with bowling_game.settings_api.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bowling_game.settings_api")
+
+application = get_wsgi_application()
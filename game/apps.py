@@ -1,5 +1,19 @@
 from django.apps import AppConfig
+from django.core import checks
+from django.db.backends import signals as db_signals
 
 
 class GameConfig(AppConfig):
     name = 'game'
+
+    def ready(self):
+        from game import bloom
+        from game import existence
+        from game import queued_frames
+        from game import signals
+        db_signals.connection_created.connect(
+            signals.configure_sqlite_connection,
+            dispatch_uid='game.configure_sqlite_connection')
+        checks.register(existence.check_shared_cache)
+        bloom.build_on_startup()
+        queued_frames.start_on_startup()
@@ -0,0 +1,239 @@
+"""Encapsulates the archive of the completed games for cold analytics.
+
+The archive is a binary file of fixed-size records, one per game, after a
+header. A record is 48 bytes, in little endian:
+
+    offset  size  field
+         0    16  game_id, ASCII
+        16     8  created timestamp, microseconds since the epoch (UTC)
+        24    21  pins of the 21 possible rolls, NO_ROLL if not rolled
+        45     2  final score
+        47     1  padding
+
+so that the record of index i starts at HEADER.size + i * RECORD.size, and
+is read in constant time through mmap. A sidecar file '<path>.idx' holds
+the (game_id, record index) pairs sorted by game_id, and is searched by
+bisection.
+
+The records can be iterated without copying as a memoryview, or as a NumPy
+structured array if NumPy is installed.
+"""
+import bisect
+import collections
+import datetime
+import mmap
+import os
+import struct
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+MAGIC = b'BWLARCH1'
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<16sq21sHx')
+INDEX_ENTRY = struct.Struct('<16sI')
+
+MAX_ROLLS = 21
+NO_ROLL = 0xff
+
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype({
+        'names': ['game_id', 'created', 'rolls', 'final_score'],
+        'formats': ['S16', '<i8', ('u1', (MAX_ROLLS,)), '<u2'],
+        'offsets': [0, 16, 24, 45],
+        'itemsize': RECORD.size})
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+ArchivedGame = collections.namedtuple(
+    'ArchivedGame', ['game_id', 'created_timestamp', 'rolls', 'final_score'])
+
+
+class ArchiveError(Exception):
+    """Raised when a file is not a valid archive."""
+
+
+def index_path(path):
+    """Returns the path of the sorted game id index of the archive."""
+    return path + '.idx'
+
+
+def _timestamp_to_micros(timestamp):
+    delta = timestamp - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _micros_to_timestamp(micros):
+    return _EPOCH + datetime.timedelta(microseconds=micros)
+
+
+def encode(game):
+    """Encodes the archived game as a record."""
+    if len(game.rolls) > MAX_ROLLS:
+        raise ValueError('A game has at most {} rolls.'.format(MAX_ROLLS))
+    rolls = bytes(game.rolls).ljust(MAX_ROLLS, bytes([NO_ROLL]))
+    return RECORD.pack(game.game_id.encode('ascii'),
+                       _timestamp_to_micros(game.created_timestamp), rolls,
+                       game.final_score)
+
+
+def decode(buffer, offset=0):
+    """Decodes the record at the offset of the buffer."""
+    game_id, micros, rolls, final_score = RECORD.unpack_from(buffer, offset)
+    return ArchivedGame(
+        game_id.rstrip(b'\0').decode('ascii'), _micros_to_timestamp(micros),
+        tuple(roll for roll in rolls if roll != NO_ROLL), final_score)
+
+
+class ArchiveWriter(object):
+    """Writes the games to a new archive, and its index once closed.
+
+    The archive is written to a temporary file that replaces the path on
+    close, so that readers never see a partial archive.
+
+    Usage:
+        with ArchiveWriter(path) as writer:
+            writer.append(game)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._temporary_path = path + '.tmp'
+        self._file = open(self._temporary_path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, 1, RECORD.size))
+        self._game_ids = []
+
+    def append(self, game):
+        """Appends the archived game, and returns the index of its record."""
+        self._file.write(encode(game))
+        self._game_ids.append(game.game_id.encode('ascii').ljust(16, b'\0'))
+        return len(self._game_ids) - 1
+
+    def __len__(self):
+        return len(self._game_ids)
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        with open(self._temporary_path + '.idx', 'wb') as index_file:
+            for record_index in sorted(range(len(self._game_ids)),
+                                       key=self._game_ids.__getitem__):
+                index_file.write(INDEX_ENTRY.pack(
+                    self._game_ids[record_index], record_index))
+        os.replace(self._temporary_path + '.idx', index_path(self.path))
+        os.replace(self._temporary_path, self.path)
+
+    def abort(self):
+        """Discards the archive being written."""
+        self._file.close()
+        os.remove(self._temporary_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class _IndexKeys(object):
+    """Sequence of the game ids of the index, for bisect."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+
+    def __len__(self):
+        return len(self._buffer) // INDEX_ENTRY.size
+
+    def __getitem__(self, position):
+        offset = position * INDEX_ENTRY.size
+        return self._buffer[offset:offset + 16]
+
+
+def _map(path):
+    with open(path, 'rb') as archive_file:
+        if not os.fstat(archive_file.fileno()).st_size:
+            return b''
+        return mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ArchiveReader(object):
+    """Reads the records of an archive mapped in memory.
+
+    Usage:
+        with ArchiveReader(path) as reader:
+            game = reader.find(game_id)
+    """
+
+    def __init__(self, path):
+        self._map = _map(path)
+        if len(self._map) < HEADER.size:
+            raise ArchiveError('{} is not an archive.'.format(path))
+        magic, _, record_size = HEADER.unpack_from(self._map)
+        if magic != MAGIC or record_size != RECORD.size:
+            raise ArchiveError('{} is not an archive.'.format(path))
+        self._count = (len(self._map) - HEADER.size) // RECORD.size
+        self._index = _map(index_path(path))
+        self._keys = _IndexKeys(self._index)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        """Returns the game of the record index, in constant time."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('Record index out of range.')
+        return decode(self._map, HEADER.size + index * RECORD.size)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def find(self, game_id):
+        """Returns the game by game id, or None if it was not archived."""
+        key = game_id.encode('ascii').ljust(16, b'\0')
+        position = bisect.bisect_left(self._keys, key)
+        if position == len(self._keys) or self._keys[position] != key:
+            return None
+        _, record_index = INDEX_ENTRY.unpack_from(
+            self._index, position * INDEX_ENTRY.size)
+        return self[record_index]
+
+    def records(self):
+        """Returns a memoryview of the records, without copying them.
+
+        The record of index i starts at i * RECORD.size in the view, and can
+        be decoded by decode(view, i * RECORD.size). The views must be
+        released before the reader is closed.
+        """
+        return memoryview(self._map)[
+            HEADER.size:HEADER.size + self._count * RECORD.size]
+
+    def as_array(self):
+        """Returns the records as a read-only NumPy structured array.
+
+        The array shares the memory of the mapped file; its dtype is
+        RECORD_DTYPE.
+        """
+        if numpy is None:
+            raise RuntimeError('NumPy is required for as_array().')
+        return numpy.frombuffer(self._map, dtype=RECORD_DTYPE,
+                                count=self._count, offset=HEADER.size)
+
+    def close(self):
+        for mapped in (self._map, self._index):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,260 @@
+"""Encapsulates the in-process Bloom filter of the registered game ids.
+
+A game id that is not in the filter was never registered, so that the
+request can be answered with a 404 before any cache or database access. A
+game id in the filter is looked up as usual: it may be a false positive, at
+the ERROR_RATE the filter was sized for.
+
+The filter is built by streaming the game ids of the table in the background
+when the process starts, and the lookups meanwhile wait for it; if that
+build fails, e.g. before the migrations are applied, the first lookup builds
+it. The games registered by the current process are added to it.
+Games purged since are only dropped by a rebuild, which runs in the
+background every REBUILD_SECONDS. Like the live events hub, the filter does
+not see the games registered by other processes until it is rebuilt; enable
+it only if a single process registers the games:
+
+    GAME_BLOOM_FILTER = {
+        'ENABLED': True,
+        'CAPACITY': 1000000,
+        'ERROR_RATE': 0.01,
+        'REBUILD_SECONDS': 3600,
+    }
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django import db
+from django.conf import settings
+
+from game import metrics
+from game import models as game_models
+
+DEFAULTS = {
+    'ENABLED': False,
+    'CAPACITY': 1000000,
+    'ERROR_RATE': 0.01,
+    'REBUILD_SECONDS': 3600,
+}
+
+# Number of game ids fetched per round trip while building the filter.
+CHUNK_SIZE = 10000
+
+LOOKUPS = metrics.Counter(
+    'game_bloom_filter_lookups_total',
+    'Number of game lookups by the Bloom filter, by result.', 'result')
+
+
+def _setting(name):
+    return getattr(settings, 'GAME_BLOOM_FILTER', {}).get(
+        name, DEFAULTS[name])
+
+
+def is_enabled():
+    return _setting('ENABLED')
+
+
+class BloomFilter(object):
+    """Bit array answering whether a key might have been added.
+
+    The bit array and the number of hash functions are sized for the
+    capacity and error rate. The positions of a key are derived from one
+    BLAKE2b digest by double hashing.
+
+    Attributes:
+        size: number of bits
+        hash_count: number of bits set per key
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, capacity)
+        self.size = max(8, int(math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(
+            self.size / capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self._count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        # Odd, so that the positions do not repeat if the size is even.
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size
+                for index in range(self.hash_count)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+    def __len__(self):
+        """Returns the number of keys added."""
+        return self._count
+
+    @property
+    def nbytes(self):
+        """Returns the memory footprint of the bit array, in bytes."""
+        return len(self._bits)
+
+    def false_positive_rate(self):
+        """Returns the expected false positive rate for the keys added."""
+        return (1 - math.exp(
+            -self.hash_count * self._count / self.size)) ** self.hash_count
+
+
+class GameIdFilter(object):
+    """Bloom filter of the registered game ids, rebuilt periodically.
+
+    The lookups do not take any lock. A rebuild streams the table into a new
+    filter, which replaces the current one once the game ids registered
+    meanwhile are added to it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._filter = None
+        self._built_at = None
+        self._pending = None
+        self._rebuilding = False
+
+    def might_exist(self, game_id):
+        """Returns False if the game id was definitely never registered."""
+        bloom_filter = self._current()
+        if game_id in bloom_filter:
+            LOOKUPS.inc('passed')
+            return True
+        LOOKUPS.inc('rejected')
+        return False
+
+    def add(self, *game_ids):
+        """Adds the game ids being registered."""
+        with self._lock:
+            if self._filter is not None:
+                for game_id in game_ids:
+                    self._filter.add(game_id)
+            if self._pending is not None:
+                self._pending.extend(game_ids)
+
+    def _current(self):
+        bloom_filter = self._filter
+        if bloom_filter is None:
+            with self._build_lock:
+                if self._filter is None:
+                    self._rebuild()
+            return self._filter
+        rebuild_seconds = _setting('REBUILD_SECONDS')
+        if (rebuild_seconds is not None and
+                time.monotonic() - self._built_at > rebuild_seconds):
+            self._start_rebuild()
+        return bloom_filter
+
+    def build_in_background(self):
+        """Starts building the filter; the lookups meanwhile wait for it."""
+        self._start_rebuild()
+
+    def _start_rebuild(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._rebuild_in_background,
+                         name='game-bloom-filter', daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            with self._build_lock:
+                self._rebuild()
+        except Exception:
+            logging.exception('Unable to rebuild the game id Bloom filter')
+        finally:
+            with self._lock:
+                self._rebuilding = False
+            db.connection.close()
+
+    def rebuild(self):
+        """Rebuilds the filter from the table, e.g. after purging games."""
+        with self._build_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            # Games registered from now on might not be streamed.
+            self._pending = []
+        try:
+            games_qs = game_models.GameRegistration.objects.values_list(
+                'game_id', flat=True)
+            # Twice the number of games, so that the error rate holds
+            # until the next rebuild as the games are registered.
+            bloom_filter = BloomFilter(
+                max(_setting('CAPACITY'), 2 * games_qs.count()),
+                _setting('ERROR_RATE'))
+            for game_id in games_qs.iterator(chunk_size=CHUNK_SIZE):
+                bloom_filter.add(game_id)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for game_id in self._pending:
+                bloom_filter.add(game_id)
+            self._pending = None
+            self._filter = bloom_filter
+            self._built_at = time.monotonic()
+
+    def clear(self):
+        """Drops the filter, which is built again on the next lookup."""
+        with self._build_lock, self._lock:
+            self._filter = None
+
+    def stats(self):
+        """Returns the games, bytes and expected false positive rate."""
+        bloom_filter = self._filter
+        if bloom_filter is None:
+            return {'games': 0, 'bytes': 0, 'false_positive_rate': 0.0}
+        return {'games': len(bloom_filter), 'bytes': bloom_filter.nbytes,
+                'false_positive_rate': bloom_filter.false_positive_rate()}
+
+
+game_ids = GameIdFilter()
+
+
+def build_on_startup():
+    """Starts building the filter in the background, if enabled."""
+    if is_enabled():
+        game_ids.build_in_background()
+
+
+def might_exist(game_id):
+    """Returns False if the game id was definitely never registered.
+
+    Every game id might exist while the filter is disabled.
+    """
+    return not is_enabled() or game_ids.might_exist(game_id)
+
+
+def add(*game_ids_registered):
+    """Adds the game ids being registered to the filter, if enabled."""
+    if is_enabled():
+        game_ids.add(*game_ids_registered)
+
+
+metrics.CallbackMetric(
+    'game_bloom_filter_games', 'Number of game ids in the Bloom filter.',
+    'gauge', None, lambda: game_ids.stats()['games'])
+metrics.CallbackMetric(
+    'game_bloom_filter_bytes', 'Memory footprint of the Bloom filter.',
+    'gauge', None, lambda: game_ids.stats()['bytes'])
+metrics.CallbackMetric(
+    'game_bloom_filter_false_positive_rate',
+    'Expected false positive rate of the Bloom filter.',
+    'gauge', None, lambda: game_ids.stats()['false_positive_rate'])
@@ -0,0 +1,202 @@
+"""Encapsulates the in-process publish/subscribe hub for live score events.
+
+Every frame saved for a game is published as an event whose id is the frame
+number, so that a client resuming with ``Last-Event-ID: <frame>`` only needs
+the frames that are new, or that may have changed, since that frame.
+
+The hub only sees frames scored by the current process; a subscriber always
+starts from the state in the database, and then receives live updates.
+"""
+import collections
+import json
+import queue
+import threading
+
+from django.conf import settings
+from rest_framework import renderers
+
+from game import metrics
+from game import serializers
+
+
+DEFAULT_HEARTBEAT_SECONDS = 15
+DEFAULT_QUEUE_SIZE = 64
+
+
+def _setting(name, default):
+    return getattr(settings, 'GAME_EVENTS', {}).get(name, default)
+
+
+Event = collections.namedtuple('Event', ['event_id', 'data'])
+
+
+class Subscription(object):
+    """A bounded queue of events for a single subscriber of a game.
+
+    Attributes:
+        game_id: unique game id
+        dropped: True if the subscriber was too slow to keep up, and has been
+            removed from the hub
+    """
+
+    def __init__(self, game_id, max_queue_size):
+        self.game_id = game_id
+        self.dropped = False
+        self._queue = queue.Queue(max_queue_size)
+
+    def put(self, event):
+        """Queues the event; returns False if the queue is full."""
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout):
+        """Returns the next event, or None if the subscription was closed.
+
+        Raises:
+            queue.Empty: if no event was published within the timeout
+        """
+        return self._queue.get(timeout=timeout)
+
+    def close(self):
+        """Discards the pending events, and wakes up the consumer."""
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            # A concurrent publisher refilled the queue; the consumer checks
+            # the dropped flag after every event instead.
+            pass
+
+
+class ScoreEventHub(object):
+    """Fans out the events of a game to all of its subscribers."""
+
+    def __init__(self, max_queue_size=None):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscriptions = collections.defaultdict(set)
+        self.dropped_count = 0
+
+    def subscribe(self, game_id):
+        """Registers a new subscription for the game."""
+        subscription = Subscription(
+            game_id, self.max_queue_size or _setting(
+                'QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+        with self._lock:
+            self._subscriptions[game_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Removes the subscription from the hub."""
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.game_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.game_id]
+
+    def has_subscribers(self, game_id):
+        return bool(self._subscriptions.get(game_id))
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, game_id, event):
+        """Publishes the event to every subscriber of the game.
+
+        A subscriber whose queue is full is dropped rather than allowed to
+        hold back the publisher or grow without bound.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(game_id, ()))
+        for subscription in subscriptions:
+            if not subscription.put(event):
+                subscription.dropped = True
+                self.unsubscribe(subscription)
+                subscription.close()
+                with self._lock:
+                    self.dropped_count += 1
+
+
+hub = ScoreEventHub()
+
+metrics.CallbackMetric(
+    'game_event_subscribers', 'Number of open live score event streams.',
+    'gauge', None, hub.subscriber_count)
+metrics.CallbackMetric(
+    'game_event_subscribers_dropped_total',
+    'Number of live score event streams dropped for falling behind.',
+    'counter', None, lambda: hub.dropped_count)
+
+
+def scorecard_event(frame, scorecard):
+    """Returns the event of a frame carrying the frames of the scorecard."""
+    return Event(frame, serializers.ScorecardSerializer(scorecard).data)
+
+
+def publish_scorecard(frame, scorecard):
+    """Publishes the frames of the scorecard as the event of the frame."""
+    hub.publish(scorecard.game_id, scorecard_event(frame, scorecard))
+
+
+def format_event(event):
+    """Returns the Server-Sent Events wire format of the event."""
+    return 'id: {}\nevent: frame\ndata: {}\n\n'.format(
+        event.event_id, json.dumps(event.data, separators=(',', ':')))
+
+
+def event_stream(subscription, initial_events=(), heartbeat=None,
+                 last_event_id=10):
+    """Yields the events of a subscription in the Server-Sent Events format.
+
+    A comment line is sent as a heartbeat whenever no event was published
+    within the heartbeat interval. The stream ends once the event of the last
+    frame was sent, or when the subscriber was dropped for being too slow.
+
+    Args:
+        subscription: subscription instance returned by the hub
+        initial_events: events sent before the live ones
+        heartbeat: seconds between two heartbeats
+        last_event_id: id of the event after which the stream ends
+    """
+    if heartbeat is None:
+        heartbeat = _setting('HEARTBEAT_SECONDS', DEFAULT_HEARTBEAT_SECONDS)
+    try:
+        sent_event_id = 0
+        for event in initial_events:
+            sent_event_id = event.event_id
+            yield format_event(event)
+        while sent_event_id < last_event_id:
+            try:
+                event = subscription.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            if event is None or subscription.dropped:
+                yield 'event: dropped\ndata: {}\n\n'
+                return
+            if event.event_id <= sent_event_id:
+                # Already part of the initial events.
+                continue
+            sent_event_id = event.event_id
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """Allows clients to negotiate the text/event-stream media type."""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
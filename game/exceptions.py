@@ -24,3 +24,16 @@ class InvalidScoreLengthForFrame(ScoringException):
             ('{type} {score} has incorrect number of tries for '
              'frame: {frame}.'.format(type=score_type, score=score,
                                       frame=frame)))
+
+
+class InvalidGameException(ScoringException):
+    """Raised when the score string of a complete game is invalid."""
+
+
+class InvalidScoreException(ScoringException):
+    """Raised when a score is invalid for its frame, e.g. knocks down more
+    pins than are standing.
+    """
+    def __init__(self, score, frame):
+        super(InvalidScoreException, self).__init__(
+            'Score format: {} is invalid for frame: {}.'.format(score, frame))
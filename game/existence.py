@@ -0,0 +1,137 @@
+"""Encapsulates the cache of the game lookups by game id.
+
+Every read and write of a game looks the game up by its id first. The
+lookups are cached through Django's cache framework, so that a shared
+backend (e.g. Redis) serves every process:
+
+1. a game that exists is cached for TTL_SECONDS, with the fields the
+   services read: its id, created timestamp and center.
+2. an unknown game id is cached as missing for NEGATIVE_TTL_SECONDS, so that
+   clients probing random ids do not reach the database.
+3. the entry of a game is deleted when it is registered, when frames are
+   appended to it in the lazy scoring mode, and when it is purged.
+
+In the lazy scoring mode, only the unknown game ids are cached, since the
+scores_dirty flag of a game changes with every write. The cache is
+configured by the ``GAME_EXISTENCE_CACHE`` setting and disabled unless
+enabled; the system checks fail if it is enabled on a cache local to the
+process, whose entries the other processes could not delete:
+
+    GAME_EXISTENCE_CACHE = {
+        'ENABLED': True,
+        'CACHE': 'default',
+        'TTL_SECONDS': 300,
+        'NEGATIVE_TTL_SECONDS': 5,
+    }
+"""
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+
+from game import metrics
+from game import models as game_models
+
+DEFAULTS = {
+    'ENABLED': False,
+    'CACHE': 'default',
+    'TTL_SECONDS': 300,
+    'NEGATIVE_TTL_SECONDS': 5,
+}
+
+# Cached value of an unknown game id.
+MISSING = 'missing'
+
+# Backends whose entries are only seen by the process that wrote them.
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+LOOKUPS = metrics.Counter(
+    'game_existence_cache_lookups_total',
+    'Number of game lookups, by result of the cache.', 'result')
+
+
+def _setting(name):
+    return getattr(settings, 'GAME_EXISTENCE_CACHE', {}).get(
+        name, DEFAULTS[name])
+
+
+def is_enabled():
+    return _setting('ENABLED')
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Fails the system checks if the cache is enabled on a backend local
+    to the process.
+    """
+    if not is_enabled():
+        return []
+    cache_name = _setting('CACHE')
+    backend = settings.CACHES.get(cache_name, {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_BACKENDS:
+        return []
+    return [checks.Error(
+        'GAME_EXISTENCE_CACHE is enabled on the cache {!r}, local to the '
+        'process.'.format(cache_name),
+        hint=('Configure a shared backend, e.g. Redis or Memcached, in '
+              'CACHES[{!r}], or disable GAME_EXISTENCE_CACHE.'.format(
+                  cache_name)),
+        id='game.E001')]
+
+
+def _caches_games():
+    return is_enabled() and getattr(
+        settings, 'GAME_SCORING_MODE', 'eager') != 'lazy'
+
+
+def _cache():
+    return caches[_setting('CACHE')]
+
+
+def _key(game_id):
+    return 'game:existence:{}'.format(game_id)
+
+
+def get(game_id):
+    """Returns the cached lookup of the game id.
+
+    Returns:
+        the game registration, MISSING if the game id is known not to exist,
+        or None if the lookup is not cached
+    """
+    if not is_enabled():
+        return None
+    value = _cache().get(_key(game_id))
+    if value is None or (value != MISSING and not _caches_games()):
+        LOOKUPS.inc('miss')
+        return None
+    if value == MISSING:
+        LOOKUPS.inc('negative_hit')
+        return MISSING
+    LOOKUPS.inc('hit')
+    created_timestamp, center = value
+    game_object = game_models.GameRegistration(
+        game_id=game_id, created_timestamp=created_timestamp, center=center)
+    game_object._state.adding = False
+    return game_object
+
+
+def set_found(game_object):
+    """Caches the game, unless its frames are waiting to be scored."""
+    if _caches_games() and not game_object.scores_dirty:
+        _cache().set(_key(game_object.game_id),
+                     (game_object.created_timestamp, game_object.center),
+                     _setting('TTL_SECONDS'))
+
+
+def set_missing(game_id):
+    """Caches the game id as unknown."""
+    if is_enabled():
+        _cache().set(_key(game_id), MISSING, _setting('NEGATIVE_TTL_SECONDS'))
+
+
+def invalidate(*game_ids):
+    """Deletes the cached lookups of the game ids."""
+    if is_enabled() and game_ids:
+        _cache().delete_many([_key(game_id) for game_id in game_ids])
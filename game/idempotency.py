@@ -0,0 +1,240 @@
+"""Encapsulates the idempotency keys of the scoring requests.
+
+A lane controller that retries a request after a timeout sends the same
+``Idempotency-Key`` header; the retry gets the response of the original
+request instead of recording the frame a second time:
+
+1. the first request claims the key by inserting an IdempotencyRecord, which
+   is unique per game and key.
+2. once the frame is saved, the response is stored in the record, and in an
+   in-memory LRU cache in front of the table.
+3. the retries are answered from the cache or the table. A retry arriving
+   while the first request is still in progress gets a 409 error, and a
+   retry with a different score a 422 error.
+
+Responses with a 500 error are not stored, so that the request can be
+retried. Records expire after a TTL, and the table is pruned to a bounded
+number of records, off the requests: every PRUNE_INTERVAL stored responses
+by a background task if GAME_TASKS is enabled, and by the
+prune_idempotency_records command otherwise:
+
+    GAME_IDEMPOTENCY = {
+        'TTL_SECONDS': 86400,
+        'LEASE_SECONDS': 30,
+        'MAX_RECORDS': 100000,
+        'CACHE_SIZE': 10000,
+        'PRUNE_INTERVAL': 100,
+    }
+"""
+import collections
+import datetime
+import itertools
+import json
+import re
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db import transaction
+from django.utils import timezone
+
+from game import models as game_models
+from game import tasks
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+DEFAULTS = {
+    'TTL_SECONDS': 86400,
+    # Seconds after which a claim without response is considered abandoned.
+    'LEASE_SECONDS': 30,
+    'MAX_RECORDS': 100000,
+    'CACHE_SIZE': 10000,
+    # Number of stored responses between two prunings of the table by a
+    # background task, if GAME_TASKS is enabled.
+    'PRUNE_INTERVAL': 100,
+}
+
+_KEY_PATTERN = re.compile(r'^[\x21-\x7e]{1,64}$')
+
+Replay = collections.namedtuple('Replay', ['status_code', 'data'])
+
+
+def _setting(name):
+    return getattr(settings, 'GAME_IDEMPOTENCY', {}).get(name, DEFAULTS[name])
+
+
+class IdempotencyError(Exception):
+    """Raised when the request can not be processed for its key."""
+
+    def __init__(self, error_code, error_message):
+        super(IdempotencyError, self).__init__(error_message)
+        self.error_code = error_code
+        self.error_message = error_message
+
+
+class ResponseCache(object):
+    """LRU cache of the stored responses, keyed by game id and key."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Maps (game_id, key) to (score, replay, created timestamp).
+        self._entries = collections.OrderedDict()
+
+    def get(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+            return entry
+
+    def put(self, cache_key, entry):
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > _setting('CACHE_SIZE'):
+                self._entries.popitem(last=False)
+
+    def discard(self, cache_key):
+        with self._lock:
+            self._entries.pop(cache_key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = ResponseCache()
+
+_completed = itertools.count(1)
+
+
+def _is_expired(created_timestamp, seconds, now):
+    return created_timestamp < now - datetime.timedelta(seconds=seconds)
+
+
+def _replay(key, score, entry):
+    stored_score, replay, _ = entry
+    if stored_score != score:
+        raise IdempotencyError(
+            422, 'Idempotency-Key: {} was used for score: {}.'.format(
+                key, stored_score))
+    return replay
+
+
+def _in_progress(key):
+    return IdempotencyError(
+        409, 'A request with the Idempotency-Key: {} is in progress.'.format(
+            key))
+
+
+def claim(game_id, key, score):
+    """Claims the key for the request, unless it was already processed.
+
+    Returns:
+        the replay of the stored response, or None if the key was claimed and
+        the request must be processed, and then completed or released
+
+    Raises:
+        IdempotencyError: if the key is invalid, used for another score, or
+            claimed by a request in progress
+    """
+    if not _KEY_PATTERN.match(key):
+        raise IdempotencyError(
+            400, 'Idempotency-Key: {} is invalid.'.format(key))
+    now = timezone.now()
+    entry = cache.get((game_id, key))
+    if entry is not None:
+        if not _is_expired(entry[2], _setting('TTL_SECONDS'), now):
+            return _replay(key, score, entry)
+        cache.discard((game_id, key))
+    try:
+        with transaction.atomic():
+            game_models.IdempotencyRecord.objects.create(
+                game_id=game_id, idempotency_key=key, score=score,
+                created_timestamp=now)
+        return None
+    except IntegrityError:
+        return _claim_existing(game_id, key, score, now)
+
+
+def _claim_existing(game_id, key, score, now):
+    """Replays the existing record of the key, or takes it over if expired.
+    """
+    record = game_models.IdempotencyRecord.objects.filter(
+        game_id=game_id, idempotency_key=key).first()
+    if record is None:
+        # The claim was released in the meantime.
+        raise _in_progress(key)
+    # A claim without response expires after the lease.
+    expiry = _setting(
+        'LEASE_SECONDS' if record.response is None else 'TTL_SECONDS')
+    if _is_expired(record.created_timestamp, expiry, now):
+        # Takes over the record, unless another request just did.
+        if game_models.IdempotencyRecord.objects.filter(
+                pk=record.pk,
+                created_timestamp=record.created_timestamp).update(
+                score=score, status_code=None, response=None,
+                created_timestamp=now):
+            return None
+        raise _in_progress(key)
+    if record.response is None:
+        if record.score != score:
+            raise IdempotencyError(
+                422, 'Idempotency-Key: {} was used for score: {}.'.format(
+                    key, record.score))
+        raise _in_progress(key)
+    entry = (record.score,
+             Replay(record.status_code, json.loads(record.response)),
+             record.created_timestamp)
+    cache.put((game_id, key), entry)
+    return _replay(key, score, entry)
+
+
+def complete(game_id, key, score, status_code, data):
+    """Stores the response of the request that claimed the key."""
+    now = timezone.now()
+    game_models.IdempotencyRecord.objects.filter(
+        game_id=game_id, idempotency_key=key).update(
+        status_code=status_code, response=json.dumps(data),
+        created_timestamp=now)
+    cache.put((game_id, key), (score, Replay(status_code, data), now))
+    if next(_completed) % _setting('PRUNE_INTERVAL') == 0 and (
+            tasks.is_enabled()):
+        tasks.get_runner().submit('prune_idempotency_records', prune,
+                                  key='idempotency')
+
+
+def release(game_id, key):
+    """Releases the claim of a request that failed, so that it can be retried.
+    """
+    game_models.IdempotencyRecord.objects.filter(
+        game_id=game_id, idempotency_key=key, response__isnull=True).delete()
+
+
+def prune(now=None):
+    """Deletes the expired records, and the oldest beyond MAX_RECORDS.
+
+    Both are deleted by a single range of the created_timestamp index: below
+    the expiry, or up to the newest record beyond MAX_RECORDS if it is more
+    recent, along with the records created at the same timestamp.
+
+    Returns:
+        the number of deleted records
+    """
+    now = now or timezone.now()
+    records = game_models.IdempotencyRecord.objects
+    expiry = now - datetime.timedelta(seconds=_setting('TTL_SECONDS'))
+    expired_qs = records.filter(created_timestamp__lt=expiry)
+    # Read from the index only.
+    boundary = records.order_by('-created_timestamp').values_list(
+        'created_timestamp', flat=True)[_setting('MAX_RECORDS'):][:1]
+    for created_timestamp in boundary:
+        if created_timestamp >= expiry:
+            expired_qs = records.filter(
+                created_timestamp__lte=created_timestamp)
+    deleted, _ = expired_qs.delete()
+    return deleted
@@ -0,0 +1,140 @@
+"""Encapsulates an append-only journal of JSON records with group commit.
+
+Every record is a line of JSON. Writing a record only buffers it; a record
+is durable once the journal is synced past its sequence number. Concurrent
+callers of sync() share the fsync of the first one, so that the records of
+a burst of requests are made durable together:
+
+    sequence = journal.write({'game_id': game_id, 'frame': 1})
+    journal.sync(sequence)
+
+The records applied elsewhere are dropped from the start of the journal.
+Rewriting the records left costs as much as writing them, so the journal is
+only compacted once the records to drop are at least as large as the records
+left, and emptied once every record is applied; it is never more than about
+twice the size of the records not applied yet. A crash may leave a partial
+last line, which read() skips.
+"""
+import collections
+import itertools
+import json
+import logging
+import os
+import shutil
+import threading
+
+
+class Journal(object):
+    """Journal file, opened for appending.
+
+    Attributes:
+        path: path of the journal
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'ab')
+        # Guards the writes to the file, and the sequence numbers.
+        self._lock = threading.Lock()
+        # Held by the caller syncing the file for every waiting caller.
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        # Sequence number of the last record dropped from the journal.
+        self._dropped = 0
+        # End offsets in the file of the records not dropped yet.
+        self._offsets = collections.deque()
+
+    def write(self, record):
+        """Buffers the record, and returns its sequence number."""
+        line = json.dumps(record, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            self._file.write(line + b'\n')
+            self._offsets.append(self._file.tell())
+            self._written += 1
+            return self._written
+
+    def sync(self, sequence):
+        """Returns once the records up to the sequence number are durable."""
+        if self._synced >= sequence:
+            return
+        with self._sync_lock:
+            if self._synced >= sequence:
+                # Synced by the caller holding the lock meanwhile.
+                return
+            with self._lock:
+                self._file.flush()
+                written = self._written
+            os.fsync(self._file.fileno())
+            self._synced = written
+
+    def truncate(self, sequence):
+        """Drops the records up to the sequence number from the journal.
+
+        The records might be kept until enough of them can be dropped; the
+        records are applied idempotently when the journal is read back.
+
+        Returns:
+            True if the records were dropped
+        """
+        with self._sync_lock, self._lock:
+            self._file.flush()
+            if self._written == sequence:
+                self._file.truncate(0)
+                self._file.seek(0)
+                os.fsync(self._file.fileno())
+                self._offsets.clear()
+            elif sequence <= self._dropped:
+                return False
+            else:
+                dropped = sequence - self._dropped
+                offset = self._offsets[dropped - 1]
+                if offset < self._offsets[-1] - offset:
+                    return False
+                self._compact(offset)
+                self._offsets = collections.deque(
+                    end - offset for end in itertools.islice(
+                        self._offsets, dropped, None))
+            self._dropped = sequence
+            self._synced = self._written
+            return True
+
+    def _compact(self, offset):
+        """Replaces the journal by its records after the offset."""
+        path = self.path + '.compact'
+        with open(self.path, 'rb') as journal_file, \
+                open(path, 'wb') as compacted_file:
+            journal_file.seek(offset)
+            shutil.copyfileobj(journal_file, compacted_file)
+            compacted_file.flush()
+            os.fsync(compacted_file.fileno())
+        os.replace(path, self.path)
+        directory = os.open(os.path.dirname(self.path) or '.', os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._file.close()
+        self._file = open(self.path, 'ab')
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read(path):
+    """Returns the records of the journal, in the order they were written.
+
+    A partial last line, written when the process crashed, is skipped.
+    """
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, 'rb') as journal_file:
+        for line in journal_file:
+            if not line.endswith(b'\n'):
+                logging.warning(
+                    'Skipped a partial record at the end of {}.'.format(path))
+                break
+            records.append(json.loads(line.decode('utf-8')))
+    return records
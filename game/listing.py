@@ -0,0 +1,116 @@
+"""Encapsulates the listing of the games, newest first, by pages.
+"""
+import base64
+import datetime
+import json
+
+from django.db import models as django_models
+from django.utils import dateparse
+from django.utils import timezone
+
+from game import models as game_models
+from game import services
+
+# Number of games listed per page unless the request asks for another one.
+DEFAULT_GAMES_PER_PAGE = 20
+
+GAME_STATUS_IN_PROGRESS = 'in_progress'
+GAME_STATUS_COMPLETED = 'completed'
+
+
+def list_games(queryset, status=None, start=None, end=None, cursor=None,
+               limit=DEFAULT_GAMES_PER_PAGE):
+    """Lists the games, newest first, with their current scores.
+
+    The games are paginated by the (created_timestamp, game_id) of the last
+    game of the previous page rather than by an offset, so that every page
+    is read from the index on these columns, however deep it is. The scores
+    of the games of a page are fetched by a single query.
+
+    Args:
+        queryset: queryset of the frame scores
+        status: optional status of the games, 'in_progress' or 'completed'
+        start: optional first day on which the games were registered
+            (inclusive)
+        end: optional last day on which the games were registered
+            (inclusive)
+        cursor: optional next_cursor of the previous page
+        limit: maximum number of games of the page
+
+    Returns:
+        game page instance, whose next_cursor is None on the last page
+    """
+    game_page = game_models.GamePage()
+    after = _decode_cursor(cursor) if cursor is not None else None
+    for error_message in _list_games_errors(status, limit, cursor, after):
+        game_page.add_error(game_models.Error(
+            error_code=400, error_message=error_message))
+    if game_page.errors:
+        return game_page
+    games_qs = game_models.GameRegistration.objects.annotate(
+        completed=django_models.Exists(queryset.model.objects.filter(
+            game=django_models.OuterRef('pk'), frame=10)))
+    if status is not None:
+        games_qs = games_qs.filter(
+            completed=status == GAME_STATUS_COMPLETED)
+    if start is not None:
+        games_qs = games_qs.filter(created_timestamp__gte=_start_of_day(start))
+    if end is not None:
+        games_qs = games_qs.filter(created_timestamp__lt=_start_of_day(
+            end + datetime.timedelta(days=1)))
+    if after is not None:
+        created_timestamp, game_id = after
+        # The first filter bounds the range scan of the index.
+        games_qs = games_qs.filter(
+            created_timestamp__lte=created_timestamp).filter(
+            django_models.Q(created_timestamp__lt=created_timestamp) |
+            django_models.Q(game_id__lt=game_id))
+    games = list(games_qs.order_by(
+        '-created_timestamp', '-game_id').values_list(
+        'game_id', 'created_timestamp', 'center', 'completed')[:limit + 1])
+    if len(games) > limit:
+        games = games[:limit]
+        game_id, created_timestamp = games[-1][:2]
+        game_page.next_cursor = _encode_cursor(created_timestamp, game_id)
+    scores = services.get_current_scores(queryset, [game[0] for game in games])
+    for game_id, created_timestamp, center, completed in games:
+        game_page.games.append(game_models.GameSummary(
+            game_id, created_timestamp, center, completed,
+            *scores.get(game_id, (None, None, None))))
+    return game_page
+
+
+def _list_games_errors(status, limit, cursor, after):
+    """Yields the error messages of the invalid parameters of a listing."""
+    if status not in (None, GAME_STATUS_IN_PROGRESS, GAME_STATUS_COMPLETED):
+        yield 'Status: {} is invalid.'.format(status)
+    if not 1 <= limit <= services.MAX_GAMES_PER_REQUEST:
+        yield 'Between 1 and {} games are listed per page.'.format(
+            services.MAX_GAMES_PER_REQUEST)
+    if cursor is not None and after is None:
+        yield 'Cursor: {} is invalid.'.format(cursor)
+
+
+def _start_of_day(day):
+    return timezone.make_aware(
+        datetime.datetime.combine(day, datetime.time.min))
+
+
+def _encode_cursor(created_timestamp, game_id):
+    return base64.urlsafe_b64encode(json.dumps(
+        [created_timestamp.isoformat(), game_id]).encode('utf-8')).decode(
+        'ascii')
+
+
+def _decode_cursor(cursor):
+    """Returns the (created_timestamp, game_id) of the cursor, or None."""
+    try:
+        created_timestamp, game_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        created_timestamp = dateparse.parse_datetime(created_timestamp)
+    except (TypeError, ValueError):
+        return None
+    if (created_timestamp is None or timezone.is_naive(created_timestamp) or
+            not isinstance(game_id, str)):
+        return None
+    return created_timestamp, game_id
@@ -0,0 +1,115 @@
+"""Encapsulates the in-process striped locks serializing the writes of a game.
+
+Two frames of the same game saved concurrently both read the latest frame
+and its version, score it, and only then is one of them rejected by the
+unique constraint of the frames. Holding the lock of the game for the whole
+write makes the second frame wait for the first one to be committed
+instead, while the writes of other games stay parallel.
+
+The locks are a fixed array indexed by a hash of the game id, so that their
+memory does not grow with the number of games; two games sharing a stripe
+merely wait for each other. A writer waiting longer than TIMEOUT_SECONDS
+gives up. The locks only serialize the writes of the current process:
+
+    GAME_WRITE_LOCKS = {
+        'ENABLED': True,
+        'STRIPES': 1024,
+        'TIMEOUT_SECONDS': 5,
+    }
+"""
+import contextlib
+import threading
+import time
+import zlib
+
+from django.conf import settings
+
+from game import metrics
+
+DEFAULTS = {
+    'ENABLED': False,
+    'STRIPES': 1024,
+    'TIMEOUT_SECONDS': 5,
+}
+
+WAIT_DURATION = metrics.Histogram(
+    'game_write_lock_wait_seconds',
+    'Time waited for the write lock of a game, by outcome.', 'outcome')
+
+
+class LockTimeout(Exception):
+    """Raised when the lock of a game was not acquired in time."""
+
+
+def _setting(name):
+    return getattr(settings, 'GAME_WRITE_LOCKS', {}).get(
+        name, DEFAULTS[name])
+
+
+class StripedLocks(object):
+    """Fixed array of locks, indexed by a hash of the key."""
+
+    def __init__(self, stripes):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def __len__(self):
+        return len(self._locks)
+
+    def _lock(self, key):
+        return self._locks[zlib.crc32(key.encode('utf-8')) % len(self._locks)]
+
+    @contextlib.contextmanager
+    def hold(self, key, timeout=None):
+        """Holds the lock of the key.
+
+        Args:
+            key: string key, e.g. the game id
+            timeout: seconds to wait for the lock, or None to wait forever
+
+        Raises:
+            LockTimeout: if the lock was not acquired within the timeout
+        """
+        lock = self._lock(key)
+        start = time.perf_counter()
+        if not lock.acquire(timeout=-1 if timeout is None else timeout):
+            WAIT_DURATION.observe(time.perf_counter() - start, 'timeout')
+            raise LockTimeout(
+                'Lock of {} not acquired in {} seconds.'.format(key, timeout))
+        WAIT_DURATION.observe(time.perf_counter() - start, 'acquired')
+        try:
+            yield
+        finally:
+            lock.release()
+
+
+_locks = None
+_locks_lock = threading.Lock()
+
+
+def _game_locks():
+    """Returns the locks of the games, created on the first write."""
+    global _locks
+    if _locks is None:
+        with _locks_lock:
+            if _locks is None:
+                _locks = StripedLocks(_setting('STRIPES'))
+    return _locks
+
+
+@contextlib.contextmanager
+def hold_game(game_id, required=False):
+    """Serializes the writes of the game, if GAME_WRITE_LOCKS is enabled.
+
+    Args:
+        game_id: unique game id
+        required: holds the lock even if GAME_WRITE_LOCKS is disabled, for
+            the writes that are not serialized by the database
+
+    Raises:
+        LockTimeout: if the lock was not acquired within TIMEOUT_SECONDS
+    """
+    if not (required or _setting('ENABLED')):
+        yield
+        return
+    with _game_locks().hold(game_id, _setting('TIMEOUT_SECONDS')):
+        yield
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from game import retention
+
+
+class Command(BaseCommand):
+    help = 'Writes the completed games to a memory-mapped archive file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the archive.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of games read per query.')
+
+    def handle(self, *args, **options):
+        games = retention.archive_games(options['path'], options['batch_size'])
+        self.stdout.write('Archived {} games to {}.'.format(
+            games, options['path']))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from game import services
+
+
+class Command(BaseCommand):
+    help = 'Scores the frames of the games written in the lazy scoring mode.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Number of dirty games fetched per query.')
+        parser.add_argument(
+            '--interval', type=float,
+            help='Sweeps the dirty games every INTERVAL seconds until '
+                 'interrupted, instead of once.')
+
+    def handle(self, *args, **options):
+        while True:
+            games = services.materialize_dirty_games(options['batch_size'])
+            self.stdout.write(
+                'Materialized the scores of {} games.'.format(games))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
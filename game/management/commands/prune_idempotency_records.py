@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from game import idempotency
+
+
+class Command(BaseCommand):
+    help = ('Deletes the expired idempotency records, and the oldest beyond '
+            'GAME_IDEMPOTENCY[\'MAX_RECORDS\'].')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Prunes the records every INTERVAL seconds until '
+                 'interrupted, instead of once.')
+
+    def handle(self, *args, **options):
+        while True:
+            records = idempotency.prune()
+            self.stdout.write(
+                'Pruned {} idempotency records.'.format(records))
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,30 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils import dateparse
+from django.utils import timezone
+
+from game import retention
+
+
+class Command(BaseCommand):
+    help = 'Deletes games with all of their frames.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('game_ids', nargs='*', help='Ids of the games.')
+        parser.add_argument(
+            '--before', help='Deletes the games created before YYYY-MM-DD.')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['before']:
+            day = dateparse.parse_date(options['before'])
+            if day is None:
+                raise CommandError('--before must be formatted YYYY-MM-DD.')
+            before = timezone.make_aware(
+                datetime.datetime.combine(day, datetime.time.min))
+        if not options['game_ids'] and before is None:
+            raise CommandError('Pass game ids, --before, or both.')
+        games = retention.purge_games(options['game_ids'] or None, before)
+        self.stdout.write('Purged {} games.'.format(games))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from game import statistics
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the daily statistics of the centers from the frames.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of games aggregated per query.')
+
+    def handle(self, *args, **options):
+        rows = statistics.rebuild_statistics(options['batch_size'])
+        self.stdout.write('Rebuilt {} daily statistics.'.format(rows))
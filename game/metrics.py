@@ -0,0 +1,245 @@
+"""Encapsulates the metrics exposed in the Prometheus text format.
+
+Histograms and counters are accumulated per thread: every thread updates its
+own shard without taking a lock, and the shards are only summed up when the
+metrics are scraped. A thread takes a lock once, to register its shard, and
+the shard is merged into the totals of the finished threads once the thread
+is gone, so that short-lived threads do not add up.
+
+Usage:
+
+    FUNCTION_DURATION = metrics.Histogram(
+        'game_function_duration_seconds', 'Duration of the functions.',
+        'function')
+
+    @metrics.timed(FUNCTION_DURATION, 'register_game')
+    def register_game():
+        ...
+"""
+import bisect
+import collections
+import functools
+import threading
+import time
+import weakref
+
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry(object):
+    """Keeps every metric, and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = collections.OrderedDict()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(
+                    'Metric {} is already registered.'.format(metric.name))
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append('# HELP {} {}'.format(
+                metric.name, metric.documentation))
+            lines.append('# TYPE {} {}'.format(metric.name, metric.type))
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace(
+            '"', '\\"').replace('\n', '\\n'))
+        for name, value in labels) + '}'
+
+
+class _ShardOwner(object):
+    """Stands for a thread in the locals of the thread."""
+
+
+class _PerThreadMetric(object):
+    """Base class of the metrics accumulated in per thread shards."""
+    type = None
+
+    def __init__(self, name, documentation, labelname=None,
+                 registry=registry):
+        self.name = name
+        self.documentation = documentation
+        self.labelname = labelname
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # The shards of the live threads, by id.
+        self._shards = {}
+        # The values of the finished threads.
+        self._retired = {}
+        if registry is not None:
+            registry.register(self)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            # Freed with the thread locals, once the thread is gone.
+            self._local.owner = owner = _ShardOwner()
+            weakref.finalize(owner, self._retire, shard).atexit = False
+            with self._lock:
+                self._shards[id(shard)] = shard
+            return shard
+
+    def _retire(self, shard):
+        with self._lock:
+            del self._shards[id(shard)]
+            for label, value in shard.items():
+                self._retired[label] = self._merge(
+                    self._retired.get(label), value)
+
+    def _merged_shards(self):
+        with self._lock:
+            shards = list(self._shards.values())
+            merged = collections.OrderedDict(
+                (label, self._merge(None, value))
+                for label, value in self._retired.items())
+        for shard in shards:
+            # Copy, as the owning thread may add labels while iterating.
+            for label, value in list(shard.items()):
+                merged[label] = self._merge(merged.get(label), value)
+        return sorted(merged.items(), key=lambda item: str(item[0]))
+
+    def _labels(self, label, *extra):
+        labels = [(self.labelname, label)] if self.labelname else []
+        return _format_labels(labels + list(extra))
+
+
+class Counter(_PerThreadMetric):
+    """Monotonically increasing count, optionally per label value."""
+    type = 'counter'
+
+    def inc(self, label=None, amount=1):
+        shard = self._shard()
+        shard[label] = shard.get(label, 0) + amount
+
+    def _merge(self, merged, value):
+        return (merged or 0) + value
+
+    def value(self, label=None):
+        return dict(self._merged_shards()).get(label, 0)
+
+    def samples(self):
+        return ['{}{} {}'.format(self.name, self._labels(label),
+                                 _format_value(value))
+                for label, value in self._merged_shards()]
+
+
+class Histogram(_PerThreadMetric):
+    """Distribution of observed values in fixed buckets."""
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelname=None,
+                 buckets=DEFAULT_BUCKETS, registry=registry):
+        self.buckets = tuple(buckets)
+        super(Histogram, self).__init__(
+            name, documentation, labelname, registry)
+
+    def observe(self, value, label=None):
+        shard = self._shard()
+        state = shard.get(label)
+        if state is None:
+            # Bucket counts (the last one is +Inf), followed by the sum.
+            state = shard[label] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def _merge(self, merged, value):
+        if merged is None:
+            return list(value)
+        return [a + b for a, b in zip(merged, value)]
+
+    def samples(self):
+        samples = []
+        for label, state in self._merged_shards():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                samples.append('{}_bucket{} {}'.format(
+                    self.name,
+                    self._labels(label, ('le', _format_value(bound))),
+                    cumulative))
+            samples.append('{}_sum{} {}'.format(
+                self.name, self._labels(label), _format_value(state[-1])))
+            samples.append('{}_count{} {}'.format(
+                self.name, self._labels(label), cumulative))
+        return samples
+
+
+class CallbackMetric(object):
+    """Metric whose values are read from a callback when scraped.
+
+    The callback returns a mapping of label values to values, or a single
+    value if the metric has no label.
+    """
+
+    def __init__(self, name, documentation, metric_type, labelname, callback,
+                 registry=registry):
+        self.name = name
+        self.documentation = documentation
+        self.type = metric_type
+        self.labelname = labelname
+        self.callback = callback
+        if registry is not None:
+            registry.register(self)
+
+    def samples(self):
+        values = self.callback()
+        if self.labelname is None:
+            return ['{} {}'.format(self.name, _format_value(values))]
+        return ['{}{} {}'.format(
+            self.name, _format_labels([(self.labelname, label)]),
+            _format_value(value))
+            for label, value in sorted(values.items())]
+
+
+def timed(histogram, label):
+    """Decorator observing the duration of every call of the function."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, label)
+        return wrapper
+    return decorator
+
+
+FUNCTION_DURATION = Histogram(
+    'game_function_duration_seconds',
+    'Duration of the service functions and of serialization.', 'function')
+
+ERRORS = Counter(
+    'game_errors_total', 'Number of errors returned, by error code.',
+    'error_code')
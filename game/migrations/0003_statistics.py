@@ -0,0 +1,43 @@
+# Generated by Django 2.1.4 on 2026-10-19 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_auto_20180717_1333'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('center', models.CharField(help_text='Bowling center.', max_length=32)),
+                ('day', models.DateField(help_text='Day on which the games were registered.')),
+                ('frames', models.PositiveIntegerField(default=0)),
+                ('strikes', models.PositiveIntegerField(default=0)),
+                ('spares', models.PositiveIntegerField(default=0)),
+                ('open_frames', models.PositiveIntegerField(default=0)),
+                ('tenth_frames', models.PositiveIntegerField(default=0, help_text='Number of 10th frames played.')),
+                ('tenth_frame_conversions', models.PositiveIntegerField(default=0, help_text='Number of 10th frames earning a bonus attempt.')),
+                ('completed_games', models.PositiveIntegerField(default=0)),
+                ('total_score', models.PositiveIntegerField(default=0, help_text='Sum of the final scores of completed games.')),
+            ],
+            bases=(models.Model, object),
+        ),
+        migrations.AddField(
+            model_name='gameregistration',
+            name='center',
+            field=models.CharField(blank=True, default='', help_text='Bowling center at which the game is played.', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='dailystatistics',
+            index=models.Index(fields=['day'], name='game_dailys_day_444b7a_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='dailystatistics',
+            unique_together={('center', 'day')},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.1.4 on 2026-10-19 04:26
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_id', models.CharField(help_text='Unique game id.', max_length=16)),
+                ('idempotency_key', models.CharField(help_text='Idempotency-Key header of the request.', max_length=64)),
+                ('score', models.CharField(help_text='Score of the request.', max_length=8)),
+                ('status_code', models.PositiveSmallIntegerField(null=True)),
+                ('response', models.TextField(help_text='JSON body of the response.', null=True)),
+                ('created_timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            bases=(models.Model, object),
+        ),
+        migrations.AddIndex(
+            model_name='idempotencyrecord',
+            index=models.Index(fields=['created_timestamp'], name='game_idempo_created_bcbae2_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='idempotencyrecord',
+            unique_together={('game_id', 'idempotency_key')},
+        ),
+    ]
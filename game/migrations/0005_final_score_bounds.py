@@ -0,0 +1,104 @@
+# Generated by Django 2.1.4 on 2026-10-19 04:28
+
+import itertools
+
+import django.core.validators
+from django.db import migrations, models
+
+# A copy of the scoring of game.scoring when the migration was written, so
+# that later changes to the module do not change what the migration does.
+LAST_FRAME = 10
+STRIKE = 10
+
+
+def _pins(score):
+    return STRIKE if score == 'X' else int(score)
+
+
+def _frame_rolls(frame, first_attempt, second_attempt, third_attempt):
+    first = _pins(first_attempt)
+    if first == STRIKE and frame < LAST_FRAME:
+        return [first]
+    rolls = [first, _pins(second_attempt)]
+    if frame == LAST_FRAME and sum(rolls) >= STRIKE:
+        rolls.append(_pins(third_attempt))
+    return rolls
+
+
+def _play_frame(score, pending_bonuses, frame, rolls):
+    for roll in rolls:
+        score += roll * (1 + len(pending_bonuses))
+        pending_bonuses = [owed - 1 for owed in pending_bonuses if owed > 1]
+    if frame < LAST_FRAME:
+        if rolls[0] == STRIKE:
+            pending_bonuses.append(2)
+        elif sum(rolls) == STRIKE:
+            pending_bonuses.append(1)
+    return score, pending_bonuses
+
+
+def _next_state(state, frame, first_attempt, second_attempt, third_attempt):
+    """Returns the (pending bonuses, guaranteed, maximum) after the frame."""
+    pending_bonuses, guaranteed_score, _ = state
+    score, pending_bonuses = _play_frame(
+        guaranteed_score, [int(owed) for owed in pending_bonuses], frame,
+        _frame_rolls(frame, first_attempt, second_attempt, third_attempt))
+    max_possible_score, max_pending_bonuses = score, pending_bonuses
+    for next_frame in range(frame + 1, LAST_FRAME + 1):
+        max_possible_score, max_pending_bonuses = _play_frame(
+            max_possible_score, max_pending_bonuses, next_frame,
+            [STRIKE] * (3 if next_frame == LAST_FRAME else 1))
+    return (''.join(str(owed) for owed in pending_bonuses), score,
+            max_possible_score)
+
+
+def project_final_scores(apps, schema_editor):
+    """Sets the bounds of the final score of the frames already played.
+
+    The frames of a game are replayed in order; every version of a frame is
+    projected from the latest version of the previous frame.
+    """
+    ScorePerFrame = apps.get_model('game', 'ScorePerFrame')
+    frames = ScorePerFrame.objects.order_by(
+        'game_id', 'frame', 'frame_version').iterator()
+    for _, game_frames in itertools.groupby(frames, lambda f: f.game_id):
+        state = ('', 0, 300)
+        for _, versions in itertools.groupby(game_frames, lambda f: f.frame):
+            next_state = state
+            for frame in versions:
+                next_state = _next_state(
+                    state, frame.frame, frame.first_attempt_score,
+                    frame.second_attempt_score, frame.third_attempt_score)
+                (frame.pending_bonuses, frame.guaranteed_score,
+                 frame.max_possible_score) = next_state
+                frame.save(update_fields=[
+                    'pending_bonuses', 'guaranteed_score',
+                    'max_possible_score'])
+            state = next_state
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0004_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scoreperframe',
+            name='guaranteed_score',
+            field=models.PositiveIntegerField(help_text='Final score if every remaining roll misses.', null=True, validators=[django.core.validators.MaxValueValidator(300)]),
+        ),
+        migrations.AddField(
+            model_name='scoreperframe',
+            name='max_possible_score',
+            field=models.PositiveIntegerField(help_text='Final score if every remaining roll is a strike.', null=True, validators=[django.core.validators.MaxValueValidator(300)]),
+        ),
+        migrations.AddField(
+            model_name='scoreperframe',
+            name='pending_bonuses',
+            field=models.CharField(blank=True, default='', help_text='Bonus rolls still owed to the previous frames.', max_length=2),
+        ),
+        migrations.RunPython(
+            project_final_scores, migrations.RunPython.noop),
+    ]
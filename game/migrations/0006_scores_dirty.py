@@ -0,0 +1,18 @@
+# Generated by Django 2.1.4 on 2026-10-19 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_final_score_bounds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gameregistration',
+            name='scores_dirty',
+            field=models.BooleanField(db_index=True, default=False, help_text='Whether frames of the game are waiting to be scored.'),
+        ),
+    ]
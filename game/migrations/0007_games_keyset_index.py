@@ -0,0 +1,21 @@
+# Generated by Django 2.1.4 on 2026-10-19 05:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0006_scores_dirty'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gameregistration',
+            index=models.Index(fields=['created_timestamp', 'game_id'], name='game_gamere_created_115045_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scoreperframe',
+            index=models.Index(fields=['game', 'frame'], name='game_scorep_game_id_a0cd07_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.1.4 on 2026-10-19 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_games_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurgedStatistics',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('center', models.CharField(help_text='Bowling center.', max_length=32)),
+                ('day', models.DateField(help_text='Day on which the games were registered.')),
+                ('frames', models.PositiveIntegerField(default=0)),
+                ('strikes', models.PositiveIntegerField(default=0)),
+                ('spares', models.PositiveIntegerField(default=0)),
+                ('open_frames', models.PositiveIntegerField(default=0)),
+                ('tenth_frames', models.PositiveIntegerField(default=0, help_text='Number of 10th frames played.')),
+                ('tenth_frame_conversions', models.PositiveIntegerField(default=0, help_text='Number of 10th frames earning a bonus attempt.')),
+                ('completed_games', models.PositiveIntegerField(default=0)),
+                ('total_score', models.PositiveIntegerField(default=0, help_text='Sum of the final scores of completed games.')),
+            ],
+            options={
+                'unique_together': {('center', 'day')},
+            },
+            bases=(models.Model, object),
+        ),
+    ]
@@ -3,7 +3,11 @@ from django.core import validators
 from django.utils import timezone
 
 from game import fields as game_fields
+from game import metrics
+from game import scoring
+from game import tracing
 
+import collections
 import functools
 import random
 
@@ -15,8 +19,17 @@ def random_string(char_length):
     return ''.join([random.choice(allowed_chars) for i in range(char_length)])
 
 
+def _slots_repr(self):
+    return '{}:{}'.format(self.__class__.__name__, {
+        slot: getattr(self, slot) for slot in self.__slots__})
+
+
 class ErrorModel(object):
-    errors = []
+    """Mixin of the results carrying errors.
+
+    Every subclass initialises its own list of errors.
+    """
+    __slots__ = ()
 
     def add_error(self, error_object):
         """Appends the error to the list of errors."""
@@ -43,16 +56,66 @@ class GameRegistration(BaseModel, ErrorModel):
         default=functools.partial(random_string, char_length=16),
         validators=[validators.MinLengthValidator(16)])
     created_timestamp = models.DateTimeField(default=timezone.now)
+    center = models.CharField(
+        max_length=32, default='', blank=True,
+        help_text='Bowling center at which the game is played.')
+    # Set while frames appended in the lazy scoring mode are not scored yet.
+    scores_dirty = models.BooleanField(
+        default=False, db_index=True,
+        help_text='Whether frames of the game are waiting to be scored.')
 
     def __repr__(self):
         return '{}:{}'.format(self.__class__.__name__, self.__dict__)
 
     class Meta:
         indexes = [
-            models.Index(fields=['game_id'])
+            models.Index(fields=['game_id']),
+            # Keyset pagination of the games, newest first.
+            models.Index(fields=['created_timestamp', 'game_id']),
         ]
 
 
+class ScoreUnitOfWork(object):
+    """Collects the frames scored retroactively while a frame is scored.
+
+    A strike or a spare changes the scores of up to two previous frames, and
+    the same frame may be changed more than once. The changes are flushed by
+    a single UPDATE of the changed fields, instead of a full-row save per
+    change.
+    """
+    FIELDS = ('frame_score', 'total_score_for_frame')
+
+    def __init__(self):
+        # Maps the primary key to the frame.
+        self._frames = collections.OrderedDict()
+
+    def add(self, frame):
+        """Registers the frame as changed."""
+        self._frames[frame.pk] = frame
+
+    def flush(self):
+        """Writes the changed fields of the frames with one UPDATE.
+
+        Returns:
+            the number of updated frames
+        """
+        if not self._frames:
+            return 0
+        frames = list(self._frames.values())
+        self._frames.clear()
+        with tracing.span('retroactive_update', frames=[
+                frame.frame for frame in frames]):
+            # Same statement as QuerySet.bulk_update of Django 2.2.
+            return ScorePerFrame.objects.filter(
+                pk__in=[frame.pk for frame in frames]).update(**{
+                    field: models.Case(*[
+                        models.When(pk=frame.pk, then=models.Value(
+                            getattr(frame, field)))
+                        for frame in frames],
+                        output_field=ScorePerFrame._meta.get_field(field))
+                    for field in self.FIELDS})
+
+
 class ScorePerFrame(BaseModel, ErrorModel):
     score_per_frame_id = models.AutoField(primary_key=True)
     game = models.ForeignKey(
@@ -78,18 +141,26 @@ class ScorePerFrame(BaseModel, ErrorModel):
     total_score_for_frame = models.PositiveIntegerField(
         validators=[validators.MaxValueValidator(300)],
         help_text='Total score till this frame.', null=True)
+    # Bounds of the final score after this frame; see game.scoring.
+    pending_bonuses = models.CharField(
+        max_length=2, default='', blank=True,
+        help_text='Bonus rolls still owed to the previous frames.')
+    guaranteed_score = models.PositiveIntegerField(
+        validators=[validators.MaxValueValidator(300)], null=True,
+        help_text='Final score if every remaining roll misses.')
+    max_possible_score = models.PositiveIntegerField(
+        validators=[validators.MaxValueValidator(300)], null=True,
+        help_text='Final score if every remaining roll is a strike.')
 
     def __init__(self, * args, **kwargs):
         super(ScorePerFrame, self).__init__(*args, **kwargs)
         self.errors = []
 
-    def queryset_by_game(self):
-        return ScorePerFrame.objects.filter(game=self.game)
-
-    def get_previous_frame(self, frame):
-        """Returns the previous frame."""
-        return self.queryset_by_game().filter(frame__lt=frame).order_by(
-            '-frame').first()
+    @property
+    def state(self):
+        """Returns the state of the game after this frame."""
+        return scoring.FrameState(self.pending_bonuses, self.guaranteed_score,
+                                  self.max_possible_score)
 
     @property
     def is_spare(self):
@@ -100,6 +171,21 @@ class ScorePerFrame(BaseModel, ErrorModel):
     def is_strike(self):
         return self.first_attempt_score == 'X'
 
+    @property
+    def attempts(self):
+        """Returns the pins knocked down in each attempt that was played.
+
+        A strike in any frame except the last one has a single attempt. The
+        third attempt only applies to a strike or a spare in the last frame.
+        """
+        if self.is_strike and self.frame < 10:
+            return [str(self.first_attempt_score)]
+        attempts = [str(self.first_attempt_score),
+                    str(self.second_attempt_score)]
+        if self.frame == 10 and (self.is_strike or self.is_spare):
+            attempts.append(str(self.third_attempt_score))
+        return attempts
+
     def _get_score(self, score):
         score_dict = {
             'X': 10
@@ -107,199 +193,61 @@ class ScorePerFrame(BaseModel, ErrorModel):
         val = score_dict.get(score)
         return val if val is not None else int(score)
 
-    def _calculate_scores_for_open_frame(self, total, previous_score,
-                                         prior_to_previous, prev):
-        """Calculates the frame scores for an open frame.
-
-        Args:
-            total: score of the current frame
-            previous_score: model score representing the last frame
-            prior_to_previous: model score representing the penultimate frame
-            prev: model score representing the frame prior to the penultimate
-                 frame
-
-        Returns:
-            total score of the current frame
-        """
-        if self.frame == 1:
-            self.total_score_for_frame = total
-            return total
-        # Current score
-        if previous_score.is_strike:
-            previous_score.frame_score = 10 + total
-            # Just save the totals.
-            # Check if the frame prior was a strike or not.
-            if prior_to_previous and prior_to_previous.is_strike:
-                prior_to_previous.frame_score = (
-                    20 + self._get_score(self.first_attempt_score))
-                if prior_to_previous.frame > 1:
-                    prior_to_previous.total_score_for_frame = (
-                        prev.total_score_for_frame +
-                        prior_to_previous.frame_score)
-                else:
-                    prior_to_previous.total_score_for_frame = (
-                        prior_to_previous.frame_score)
-                prior_to_previous.save(recursive_save=False)
-                previous_score.total_score_for_frame = (
-                    prior_to_previous.total_score_for_frame +
-                    previous_score.frame_score)
-            previous_score.save(recursive_save=False)
-        elif previous_score.is_spare:
-            # Initialise the score of the previous entry, and then calculate the
-            # frame score.
-            previous_score.frame_score = (
-                10 + self._get_score(self.first_attempt_score))
-            if prior_to_previous:
-                previous_score.total_score_for_frame = (
-                    (prior_to_previous.total_score_for_frame or 0) +
-                    previous_score.frame_score)
-            previous_score.save(recursive_save=False)
-        self.total_score_for_frame = (
-            previous_score.total_score_for_frame + total)
-
-    def _calculate_scores_for_strike(
-            self, total, previous_score, prior_to_previous, prev):
-        """Calculates the frame scores for an open frame.
-
-        Args:
-            total: score of the current frame
-            previous_score: model score representing the last frame
-            prior_to_previous: model score representing the penultimate frame
-            prev: model score representing the frame prior to the penultimate
-                 frame
+    @metrics.timed(metrics.FUNCTION_DURATION, 'calculate_frame_score')
+    def calculate_frame_score(self):
+        """Scores the frame, and the previous frames it scores retroactively.
 
-        Returns:
-            total score of the current frame
-        """
-        # No need to calculate the current frame's score. It will be calculated
-        # recursively.
-        if previous_score:
-            if previous_score.is_strike:
-                if prior_to_previous and prior_to_previous.is_strike:
-                    prior_to_previous.frame_score = 30
-                    if prior_to_previous.frame == 1:
-                        prior_to_previous.total_score_for_frame = (
-                            prior_to_previous.frame_score)
-                    else:
-                        prior_to_previous.total_score_for_frame = (
-                            prev.total_score_for_frame +
-                            prior_to_previous.frame_score)
-                    prior_to_previous.save(recursive_save=False)
-            elif previous_score.is_spare:
-                previous_score.frame_score = 20
-                if (prior_to_previous and
-                    prior_to_previous.total_score_for_frame):
-                        previous_score.total_score_for_frame = (
-                            prior_to_previous.total_score_for_frame +
-                            previous_score.frame_score)
-            previous_score.save(recursive_save=False)
-        if self.frame == 10:
-            if (previous_score and previous_score.is_strike and
-                previous_score.frame_score is None):
-                    previous_score.frame_score = 10 + (
-                        self._get_score(self.first_attempt_score) +
-                        self._get_score(self.second_attempt_score))
-                    previous_score.total_score_for_frame = (
-                        previous_score.frame_score +
-                        prior_to_previous.total_score_for_frame)
-                    previous_score.save(recursive_save=False)
-            self.total_score_for_frame = (
-                previous_score.total_score_for_frame + total)
-
-    def _calculate_scores_for_spare(
-            self, total, previous_score, prior_to_previous, prev):
-        """Calculates the frame scores for an open frame.
-
-        Args:
-            total: score of the current frame
-            previous_score: model score representing the last frame
-            prior_to_previous: model score representing the penultimate frame
-            prev: model score representing the frame prior to the penultimate
-                frame
+        The bounds of the final score follow from the state of the previous
+        frame alone. The previous frames still owed bonus rolls, at most two,
+        are scored again with this frame, and written together if changed.
 
         Returns:
-            total score of the current frame
-        """
-        if previous_score:
-            if previous_score.is_strike:
-                previous_score.frame_score = 20
-                if (prior_to_previous and prior_to_previous.is_strike and
-                    prior_to_previous.frame_score is None):
-                        prior_to_previous.frame_score = (
-                            20 + self._get_score(self.first_attempt_score))
-                        prior_to_previous.total_score_for_frame = (
-                            (prev.total_score_for_frame if
-                                prev else 0) +
-                            prior_to_previous.frame_score)
-                        prior_to_previous.save(recursive_save=False)
-                previous_score.total_score_for_frame = (
-                    (prior_to_previous.total_score_for_frame
-                     if prior_to_previous is not None else 0) +
-                    previous_score.frame_score)
-            elif previous_score.is_spare:
-                previous_score.frame_score = (
-                    10 + self._get_score(self.first_attempt_score))
-                if prior_to_previous:
-                    previous_score.total_score_for_frame = (
-                        prior_to_previous.total_score_for_frame +
-                        previous_score.frame_score)
-            previous_score.save(recursive_save=False)
-        if self.frame == 10:
-            # Last frame
-            self.total_score_for_frame = (
-                previous_score.total_score_for_frame + total)
-
-    def calculate_frame_score(self):
-        """
-        Calculates the  score of the frame and  retroactively calculate the
-        scores of the previous frames.
+            the score of the frame, or None until its bonus rolls are played
         """
-        total = (self._get_score(self.first_attempt_score) +
-                 self._get_score(self.second_attempt_score) +
-                 self._get_score(self.third_attempt_score))
-        previous_score = self.get_previous_frame(self.frame)
-        prior_to_previous = (
-            self.get_previous_frame(previous_score.frame)
-            if previous_score else None)
-        # one before penultimate
-        prev = (
-            self.get_previous_frame(prior_to_previous.frame)
-            if prior_to_previous else None)
-        # If the frame was open, then return the sum of the attempted scores.
-        if total < 10:
-            self._calculate_scores_for_open_frame(
-                total, previous_score, prior_to_previous, prev)
-            return total
-        elif self.is_strike:
-            self._calculate_scores_for_strike(
-                total, previous_score, prior_to_previous, prev)
-        elif self.is_spare:
-            self._calculate_scores_for_spare(
-                total, previous_score, prior_to_previous, prev)
-
-        if self.frame == 10:
-            return total
-
-        # Assigning a temporary score in the mean time. This represents the
-        # total score of all frames until now.
-        if self.total_score_for_frame is None:
-            if (previous_score and previous_score.total_score_for_frame and
-                prior_to_previous and
-                prior_to_previous.total_score_for_frame):  # NOQA: E129
-                    self.total_score_for_frame = max(
-                        previous_score.total_score_for_frame,
-                        prior_to_previous.total_score_for_frame)
-            elif (previous_score and
-                  previous_score.total_score_for_frame is not None):
-                self.total_score_for_frame = (
-                    previous_score.total_score_for_frame)
+        with tracing.span('previous_frames', game_id=self.game_id,
+                          frame=self.frame):
+            # The latest version of the frames owed bonus rolls, and of the
+            # frame before them.
+            previous_frames = {
+                frame.frame: frame for frame in ScorePerFrame.objects.filter(
+                    game_id=self.game_id, frame__lt=self.frame,
+                    frame__gte=self.frame - 3).order_by(
+                    'frame', 'frame_version')}
+        previous_frame = previous_frames.get(self.frame - 1)
+        previous_state = (previous_frame.state if previous_frame is not None
+                          else scoring.INITIAL_STATE)
+        (self.pending_bonuses, self.guaranteed_score,
+         self.max_possible_score) = scoring.next_state(
+            previous_state, self.frame, self.first_attempt_score,
+            self.second_attempt_score, self.third_attempt_score)
+        first_frame = self.frame - len(previous_state.pending_bonuses)
+        open_frames = [previous_frames[frame]
+                       for frame in range(first_frame, self.frame)]
+        scored_frame = previous_frames.get(first_frame - 1)
+        scores = scoring.score_frames(
+            [(frame.first_attempt_score, frame.second_attempt_score,
+              frame.third_attempt_score) for frame in open_frames + [self]],
+            first_frame,
+            *((scored_frame.total_score_for_frame, scored_frame.state)
+              if scored_frame is not None else ()))
+        changed_frames = ScoreUnitOfWork()
+        for frame, (frame_score, total_score, _) in zip(open_frames, scores):
+            if (frame.frame_score, frame.total_score_for_frame) != (
+                    frame_score, total_score):
+                frame.frame_score = frame_score
+                frame.total_score_for_frame = total_score
+                changed_frames.add(frame)
+        frame_score, self.total_score_for_frame, _ = scores[-1]
+        changed_frames.flush()
+        return frame_score
 
     def save(self, *args, **kwargs):
         """Saves the score of the user's frame."""
         recursive_save = kwargs.pop('recursive_save', True)
-        if recursive_save:
-            self.frame_score = self.calculate_frame_score()
-        super(ScorePerFrame, self).save(*args, **kwargs)
+        with tracing.span('save', game_id=self.game_id, frame=self.frame):
+            if recursive_save:
+                self.frame_score = self.calculate_frame_score()
+            super(ScorePerFrame, self).save(*args, **kwargs)
 
     def __repr__(self):
         return '{}:{}'.format(self.__class__.__name__, self.__dict__)
@@ -307,27 +255,231 @@ class ScorePerFrame(BaseModel, ErrorModel):
     class Meta:
         unique_together = ('frame', 'frame_version', 'game')
         indexes = [
+            # Whether a game has reached a frame, e.g. is completed.
+            models.Index(fields=['game', 'frame']),
             models.Index(fields=['frame']),
             models.Index(fields=['first_attempt_score']),
             models.Index(fields=['second_attempt_score']),
             models.Index(fields=['third_attempt_score'])]
 
 
+class BaseStatistics(BaseModel):
+    """Counters of the frames of the games of a bowling center, by day."""
+    center = models.CharField(max_length=32, help_text='Bowling center.')
+    day = models.DateField(help_text='Day on which the games were registered.')
+    frames = models.PositiveIntegerField(default=0)
+    strikes = models.PositiveIntegerField(default=0)
+    spares = models.PositiveIntegerField(default=0)
+    open_frames = models.PositiveIntegerField(default=0)
+    tenth_frames = models.PositiveIntegerField(
+        default=0, help_text='Number of 10th frames played.')
+    tenth_frame_conversions = models.PositiveIntegerField(
+        default=0, help_text='Number of 10th frames earning a bonus attempt.')
+    completed_games = models.PositiveIntegerField(default=0)
+    total_score = models.PositiveIntegerField(
+        default=0, help_text='Sum of the final scores of completed games.')
+
+    COUNTERS = ('frames', 'strikes', 'spares', 'open_frames', 'tenth_frames',
+                'tenth_frame_conversions', 'completed_games', 'total_score')
+
+    def __repr__(self):
+        return '{}:{}'.format(self.__class__.__name__, self.__dict__)
+
+    class Meta(BaseModel.Meta):
+        abstract = True
+
+
+class DailyStatistics(BaseStatistics):
+    """Counters of the frames played at a bowling center on a given day.
+
+    The counters are updated incrementally whenever a frame is scored, and the
+    day is the day on which the game was registered.
+    """
+
+    def _rate(self, count, total):
+        return float(count) / total if total else None
+
+    @property
+    def strike_rate(self):
+        return self._rate(self.strikes, self.frames)
+
+    @property
+    def spare_rate(self):
+        return self._rate(self.spares, self.frames)
+
+    @property
+    def open_frame_rate(self):
+        return self._rate(self.open_frames, self.frames)
+
+    @property
+    def average_score(self):
+        return self._rate(self.total_score, self.completed_games)
+
+    @property
+    def tenth_frame_conversion_rate(self):
+        return self._rate(self.tenth_frame_conversions, self.tenth_frames)
+
+    class Meta:
+        unique_together = ('center', 'day')
+        indexes = [
+            models.Index(fields=['day'])
+        ]
+
+
+class PurgedStatistics(BaseStatistics):
+    """Counters of the frames of the purged games of a center on a given day.
+
+    The daily statistics keep counting the purged games; their counters are
+    kept apart, so that the statistics rebuilt from the frames left still
+    count them.
+    """
+
+    class Meta:
+        unique_together = ('center', 'day')
+
+
+class IdempotencyRecord(BaseModel):
+    """Response of a scoring request carrying an Idempotency-Key header.
+
+    A record without a response is claimed by a request still in progress.
+    """
+    game_id = models.CharField(max_length=16, help_text='Unique game id.')
+    idempotency_key = models.CharField(
+        max_length=64, help_text='Idempotency-Key header of the request.')
+    score = models.CharField(max_length=8, help_text='Score of the request.')
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.TextField(
+        null=True, help_text='JSON body of the response.')
+    created_timestamp = models.DateTimeField(default=timezone.now)
+
+    def __repr__(self):
+        return '{}:{}'.format(self.__class__.__name__, self.__dict__)
+
+    class Meta:
+        unique_together = ('game_id', 'idempotency_key')
+        indexes = [
+            models.Index(fields=['created_timestamp'])
+        ]
+
+
+class ErrorResult(ErrorModel):
+    """Result of a request that failed, carrying nothing but its errors.
+
+    The services return it on their error paths rather than an empty model
+    instance, which would pay for the construction of a Django model.
+    """
+    __slots__ = ('errors',)
+
+    def __init__(self, errors=None):
+        self.errors = list(errors) if errors is not None else []
+
+    def __eq__(self, other):
+        return (isinstance(other, ErrorResult) and
+                self.errors == other.errors)
+
+    __repr__ = _slots_repr
+
+
+class Statistics(ErrorModel):
+    """Encapsulates the daily statistics matching a query."""
+    __slots__ = ('days', 'errors')
+
+    def __init__(self, days=None):
+        self.days = days if days is not None else []
+        self.errors = []
+
+    __repr__ = _slots_repr
+
+
 class Game(ErrorModel):
     """Encapsulates all the frames in addition to the score."""
+    __slots__ = ('game_id', 'total_score', 'guaranteed_score',
+                 'max_possible_score', 'errors')
 
-    def __init__(self, game_id=None, total_score=None):
+    def __init__(self, game_id=None, total_score=None, guaranteed_score=None,
+                 max_possible_score=None):
         self.game_id = game_id
         self.total_score = total_score
+        self.guaranteed_score = guaranteed_score
+        self.max_possible_score = max_possible_score
         self.errors = []
 
     def __eq__(self, other):
-        return (self.game_id == other.game_id and
+        return (isinstance(other, Game) and
+                self.game_id == other.game_id and
                 self.total_score == other.total_score and
+                self.guaranteed_score == other.guaranteed_score and
+                self.max_possible_score == other.max_possible_score and
                 self.errors == other.errors)
 
-    def __repr__(self):
-        return '{}:{}'.format(self.__class__.__name__, self.__dict__)
+    __repr__ = _slots_repr
+
+
+class GameBatch(ErrorModel):
+    """Encapsulates the scorecards of several games registered together."""
+    __slots__ = ('games', 'errors')
+
+    def __init__(self, games=None):
+        self.games = games if games is not None else []
+        self.errors = []
+
+    __repr__ = _slots_repr
+
+
+class GameScores(ErrorModel):
+    """Encapsulates the scores of several games fetched together."""
+    __slots__ = ('games', 'errors')
+
+    def __init__(self, games=None):
+        self.games = games if games is not None else []
+        self.errors = []
+
+    __repr__ = _slots_repr
+
+
+class GameSummary(ErrorModel):
+    """Encapsulates a game of a listing, with its current score."""
+    __slots__ = ('game_id', 'created_timestamp', 'center', 'completed',
+                 'total_score', 'guaranteed_score', 'max_possible_score',
+                 'errors')
+
+    def __init__(self, game_id=None, created_timestamp=None, center='',
+                 completed=False, total_score=None, guaranteed_score=None,
+                 max_possible_score=None):
+        self.game_id = game_id
+        self.created_timestamp = created_timestamp
+        self.center = center
+        self.completed = completed
+        self.total_score = total_score
+        self.guaranteed_score = guaranteed_score
+        self.max_possible_score = max_possible_score
+        self.errors = []
+
+    __repr__ = _slots_repr
+
+
+class GamePage(ErrorModel):
+    """Encapsulates a page of games, and the cursor of the next page."""
+    __slots__ = ('games', 'next_cursor', 'errors')
+
+    def __init__(self, games=None, next_cursor=None):
+        self.games = games if games is not None else []
+        self.next_cursor = next_cursor
+        self.errors = []
+
+    __repr__ = _slots_repr
+
+
+class Scorecard(ErrorModel):
+    """Encapsulates the frames played so far in a game."""
+    __slots__ = ('game_id', 'frames', 'errors')
+
+    def __init__(self, game_id=None, frames=None):
+        self.game_id = game_id
+        self.frames = frames if frames is not None else []
+        self.errors = []
+
+    __repr__ = _slots_repr
 
 
 class Error(object):
@@ -339,6 +491,8 @@ class Error(object):
         error_code: HTTP error code representation
         error_message error message that represents the error
     """
+    __slots__ = ('error_code', 'error_message')
+
     def __init__(self, error_code, error_message):
         self.error_code = error_code
         self.error_message = error_message
@@ -347,5 +501,4 @@ class Error(object):
         return (self.error_code == other.error_code and
                 self.error_message == other.error_message)
 
-    def __repr__(self):
-        return '{}:{}'.format(self.__class__.__name__, self.__dict__)
+    __repr__ = _slots_repr
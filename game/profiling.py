@@ -0,0 +1,239 @@
+"""Encapsulates the opt-in profiling of individual requests.
+
+A request is profiled when it carries the configured token, either in the
+``X-Profile`` header or in the ``profile`` query parameter:
+
+    GAME_PROFILING = {'TOKEN': '<secret>', 'TOP_N': 30, 'BUFFER_SIZE': 20}
+
+The request runs under pyinstrument if it is installed, and cProfile
+otherwise. The top functions by cumulative time and the SQL queries of the
+request are kept in a bounded ring buffer in the process, and the id of the
+captured profile is returned in the ``X-Profile-Id`` response header.
+"""
+import collections
+import contextlib
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import pstats
+import threading
+import time
+
+from django import db
+from django.conf import settings
+from django.utils import timezone
+
+try:
+    import pyinstrument
+except ImportError:  # pragma: no cover
+    pyinstrument = None
+
+
+DEFAULT_TOP_N = 30
+DEFAULT_BUFFER_SIZE = 20
+
+HEADER = 'HTTP_X_PROFILE'
+QUERY_PARAMETER = 'profile'
+
+# Requests to the profiles themselves are never profiled.
+EXCLUDED_PATH_PREFIX = '/profiles'
+
+
+def _setting(name, default=None):
+    return getattr(settings, 'GAME_PROFILING', {}).get(name, default)
+
+
+def is_enabled():
+    return bool(_setting('TOKEN'))
+
+
+def is_authorized(request):
+    """Returns True if the request carries the configured profiling token."""
+    token = _setting('TOKEN')
+    if not token:
+        return False
+    candidate = (request.META.get(HEADER) or
+                 request.GET.get(QUERY_PARAMETER) or '')
+    return hmac.compare_digest(candidate.encode(), token.encode())
+
+
+class Profile(object):
+    """A profile captured for a single request.
+
+    Attributes:
+        profile_id: id of the profile in the ring buffer
+        profiler: name of the profiler, i.e. cprofile or pyinstrument
+        functions: top functions by cumulative time
+        queries: SQL queries executed by the request with their durations
+        report: raw profile; marshalled pstats for cProfile, text otherwise
+    """
+
+    def __init__(self, profile_id, method, path, status_code, duration,
+                 profiler, functions, queries, report):
+        self.profile_id = profile_id
+        self.created = timezone.now()
+        self.method = method
+        self.path = path
+        self.status_code = status_code
+        self.duration = duration
+        self.profiler = profiler
+        self.functions = functions
+        self.queries = queries
+        self.report = report
+
+    def summary(self):
+        return collections.OrderedDict([
+            ('profile_id', self.profile_id),
+            ('created', self.created.isoformat()),
+            ('method', self.method),
+            ('path', self.path),
+            ('status_code', self.status_code),
+            ('duration', self.duration),
+            ('profiler', self.profiler),
+            ('query_count', len(self.queries)),
+        ])
+
+    def details(self):
+        details = self.summary()
+        details['functions'] = self.functions
+        details['queries'] = self.queries
+        return details
+
+
+class ProfileBuffer(object):
+    """Keeps the most recently captured profiles."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._profiles = collections.deque()
+
+    def next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def add(self, profile):
+        max_size = _setting('BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+        with self._lock:
+            self._profiles.append(profile)
+            while len(self._profiles) > max_size:
+                self._profiles.popleft()
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile.profile_id == profile_id:
+                    return profile
+        return None
+
+    def all(self):
+        with self._lock:
+            return list(reversed(self._profiles))
+
+
+profiles = ProfileBuffer()
+
+
+class QueryLog(object):
+    """Execute wrapper recording the SQL queries of a connection."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'duration': time.perf_counter() - start})
+
+
+def _top_functions(profiler, top_n):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    stats.sort_stats('cumulative')
+    functions = []
+    for func in stats.fcn_list[:top_n]:
+        primitive_calls, calls, total_time, cumulative_time, _ = (
+            stats.stats[func])
+        functions.append(collections.OrderedDict([
+            ('function', pstats.func_std_string(func)),
+            ('calls', calls),
+            ('total_time', total_time),
+            ('cumulative_time', cumulative_time),
+        ]))
+    return functions, marshal.dumps(stats.stats)
+
+
+def _top_sampled_functions(session, top_n):
+    """Returns the top functions of a pyinstrument session.
+
+    The time of the frames sampled is summed up by function; a recursive
+    function counts the time of its outermost frame only. The number of
+    calls is unknown to a sampling profiler.
+    """
+    root = session.root_frame() if session is not None else None
+    if root is None:
+        return []
+    total_times = collections.Counter()
+    cumulative_times = collections.Counter()
+    frames = [(root, frozenset())]
+    while frames:
+        frame, callers = frames.pop()
+        function = '{}:{}({})'.format(
+            frame.file_path, frame.line_no, frame.function)
+        total_times[function] += frame.total_self_time
+        if function not in callers:
+            cumulative_times[function] += frame.time
+        frames.extend((child, callers | {function})
+                      for child in frame.children)
+    return [collections.OrderedDict([
+        ('function', function),
+        ('calls', None),
+        ('total_time', total_times[function]),
+        ('cumulative_time', cumulative_time),
+    ]) for function, cumulative_time in cumulative_times.most_common(top_n)]
+
+
+class ProfilingMiddleware(object):
+    """Profiles the requests carrying the profiling token."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if (request.path.startswith(EXCLUDED_PATH_PREFIX) or
+                not is_authorized(request)):
+            return self.get_response(request)
+        query_log = QueryLog()
+        start = time.perf_counter()
+        with contextlib.ExitStack() as stack:
+            for connection in db.connections.all():
+                stack.enter_context(connection.execute_wrapper(query_log))
+            if pyinstrument is not None:
+                profiler_name = 'pyinstrument'
+                profiler = pyinstrument.Profiler()
+                profiler.start()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.stop()
+                functions = _top_sampled_functions(
+                    profiler.last_session, _setting('TOP_N', DEFAULT_TOP_N))
+                report = profiler.output_text().encode()
+            else:
+                profiler_name = 'cprofile'
+                profiler = cProfile.Profile()
+                response = profiler.runcall(self.get_response, request)
+                functions, report = _top_functions(
+                    profiler, _setting('TOP_N', DEFAULT_TOP_N))
+        profile = Profile(
+            profiles.next_id(), request.method, request.path,
+            response.status_code, time.perf_counter() - start, profiler_name,
+            functions, query_log.queries, report)
+        profiles.add(profile)
+        response['X-Profile-Id'] = str(profile.profile_id)
+        return response
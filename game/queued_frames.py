@@ -0,0 +1,196 @@
+"""Encapsulates the frames saved through the write-behind queue.
+
+With GAME_WRITE_BEHIND enabled, services.set_frame_score validates and
+scores the frame in memory from the frames saved and queued for the game,
+and queues it; commit_frames then saves the queued frames in batches, from
+the writer thread of game.writebehind.
+"""
+import collections
+import functools
+import logging
+import operator
+
+from django.db import models as django_models
+from django.db import transaction
+from django.utils import timezone
+
+from game import exceptions
+from game import models as game_models
+from game import scoring
+from game import services
+from game import singleflight
+from game import statistics as game_statistics
+from game import writebehind
+
+
+def start_on_startup():
+    """Commits the frames left in the journal by a crash, and starts the
+    write-behind queue, if enabled.
+
+    Called when the process starts, so that the reads, which only wait for
+    the frames of a started queue, do not miss the frames of the journal.
+    """
+    if not writebehind.is_enabled():
+        return
+    try:
+        writebehind.get_queue(commit_frames)
+    except Exception:
+        # E.g. before the tables are migrated; retried on the first write.
+        logging.exception('Unable to replay the write-behind journal.')
+
+
+def set_frame_score(game_id, score):
+    """Validates and scores the frame in memory, and queues it.
+
+    The frame returned is acknowledged once it is durable in the journal of
+    the write-behind queue, before it is committed to the database.
+    """
+    try:
+        game_object, is_returned = services.get_game_object(game_id)
+        if not is_returned:
+            return game_object
+        if not services.is_valid_score(score):
+            return services.invalid_score(score)
+        if game_object.scores_dirty:
+            services.materialize_scores(game_id)
+        queue = writebehind.get_queue(commit_frames)
+        played = _played_attempts(queue, game_id)
+        if len(played) == 10:
+            return game_models.ErrorResult([game_models.Error(
+                error_code=400,
+                error_message='Game:\'{}\' has already been played.'.format(
+                    game_id))])
+        frame = len(played) + 1
+        try:
+            attempts = services.parse_frame(score, frame)
+        except exceptions.ScoringException:
+            return services.invalid_score(score)
+        attempts = tuple(str(attempt) for attempt in attempts)
+        scores = scoring.score_frames(played + [attempts])
+        queue.submit(game_id, {'game_id': game_id, 'frame': frame,
+                               'attempts': attempts})
+        if singleflight.is_enabled():
+            # The reads after the acknowledgement wait for the frame, and
+            # must not share the reads started before it.
+            singleflight.versions.bump(game_id)
+        return _scored_frame(game_object, frame, attempts, scores[-1])
+    except:
+        logging.exception(
+            ('Unable to queue the frame for score {}'
+             ' and game:{}.'.format(score, game_id)))
+        return game_models.ErrorResult([game_models.Error(
+            error_code=500,
+            error_message=('Unable to save score: \'{score}\' for game: '
+                           '\'{game}\'.'.format(game=game_id, score=score)))])
+
+
+def _played_attempts(queue, game_id):
+    """Returns the attempts of the frames saved or queued for the game."""
+    # Read before the database: a frame committed meanwhile is then in both.
+    queued = {record['frame']: tuple(record['attempts'])
+              for record in queue.pending(game_id)}
+    attempts = _saved_attempts([game_id])[game_id]
+    attempts.update(queued)
+    return [attempts[frame] for frame in range(1, len(attempts) + 1)]
+
+
+def _saved_attempts(game_ids):
+    """Returns the attempts of the saved frames, by game id and frame."""
+    attempts = collections.defaultdict(dict)
+    for game_id, frame, first, second, third in (
+            game_models.ScorePerFrame.objects.filter(
+                game__in=game_ids).order_by('frame_version').values_list(
+                'game_id', 'frame', 'first_attempt_score',
+                'second_attempt_score', 'third_attempt_score')):
+        attempts[game_id][frame] = (first, second, third)
+    return attempts
+
+
+def _scored_frame(game_object, frame, attempts, scores):
+    frame_score, total_score, state = scores
+    return game_models.ScorePerFrame(
+        game=game_object, frame=frame, frame_version=1,
+        first_attempt_score=attempts[0], second_attempt_score=attempts[1],
+        third_attempt_score=attempts[2], frame_score=frame_score,
+        total_score_for_frame=total_score,
+        pending_bonuses=state.pending_bonuses,
+        guaranteed_score=state.guaranteed_score,
+        max_possible_score=state.max_possible_score)
+
+
+def commit_frames(records):
+    """Saves the frames queued by the write-behind path in one transaction.
+
+    The frames of every game are scored again from all of its attempts, and
+    the frames they score retroactively are updated. The frames already
+    saved, e.g. when the journal is replayed after a crash, are skipped.
+
+    Args:
+        records: list of dictionaries of the game_id, frame and attempts
+    """
+    queued = collections.OrderedDict()
+    for record in records:
+        queued.setdefault(record['game_id'], {})[record['frame']] = tuple(
+            record['attempts'])
+    queryset = game_models.ScorePerFrame.objects.select_related('game')
+    with transaction.atomic():
+        games = game_models.GameRegistration.objects.in_bulk(list(queued))
+        saved = _saved_attempts(list(queued))
+        frames, changed_frames = [], []
+        statistics = collections.defaultdict(collections.Counter)
+        for game_id, game_frames in queued.items():
+            game_object = games.get(game_id)
+            if game_object is None:
+                logging.warning(
+                    'Dropped the frames of the purged game:{}.'.format(
+                        game_id))
+                continue
+            attempts = dict(game_frames)
+            attempts.update(saved[game_id])
+            new_frames = sorted(set(attempts) - set(saved[game_id]))
+            if not new_frames:
+                continue
+            if sorted(attempts) != list(range(1, len(attempts) + 1)):
+                logging.error('Dropped the frames {} of game:{}, which do not '
+                              'follow its saved frames.'.format(
+                                  new_frames, game_id))
+                continue
+            scores = scoring.score_frames(
+                [attempts[frame] for frame in sorted(attempts)])
+            for frame in new_frames:
+                score_per_frame = _scored_frame(
+                    game_object, frame, attempts[frame], scores[frame - 1])
+                frames.append(score_per_frame)
+                statistics[(game_object.center, timezone.localdate(
+                    game_object.created_timestamp))].update(
+                    game_statistics.frame_statistics(score_per_frame))
+                services.publish_frame_on_commit(queryset, game_id, frame)
+            # A strike or a spare is scored by the next two frames.
+            for frame in range(max(1, new_frames[0] - 2), new_frames[0]):
+                changed_frames.append((game_id, frame, scores[frame - 1]))
+        game_models.ScorePerFrame.objects.bulk_create(frames)
+        _update_frame_scores(changed_frames)
+        for (center, day), counters in statistics.items():
+            game_statistics.increment_statistics(center, day, counters)
+
+
+def _update_frame_scores(changed_frames):
+    """Updates the scores of the frames with one UPDATE.
+
+    Args:
+        changed_frames: list of (game id, frame, scores) tuples
+    """
+    if not changed_frames:
+        return
+    updates = {}
+    # In the order of the scores returned by scoring.score_frames.
+    for index, field in enumerate(('frame_score', 'total_score_for_frame')):
+        updates[field] = django_models.Case(*[
+            django_models.When(game=game_id, frame=frame,
+                               then=django_models.Value(scores[index]))
+            for game_id, frame, scores in changed_frames],
+            output_field=game_models.ScorePerFrame._meta.get_field(field))
+    game_models.ScorePerFrame.objects.filter(functools.reduce(
+        operator.or_, [django_models.Q(game=game_id, frame=frame)
+                       for game_id, frame, _ in changed_frames])).update(
+        **updates)
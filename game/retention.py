@@ -0,0 +1,103 @@
+"""Encapsulates the retention of the games: archiving and purging them.
+"""
+import collections
+
+from django.db import models as django_models
+from django.db import transaction
+
+from game import archive
+from game import existence
+from game import models as game_models
+from game import scoring
+from game import services
+from game import statistics as game_statistics
+
+
+def purge_games(game_ids=None, before=None):
+    """Deletes games with all of their frames.
+
+    The statistics of the centers keep counting the frames of the deleted
+    games, which are added to the purged statistics for when the statistics
+    are rebuilt.
+
+    Args:
+        game_ids: optional ids of the games to delete
+        before: optional datetime; the games created before it are deleted
+
+    Returns:
+        number of games deleted
+    """
+    if game_ids is None and before is None:
+        return 0
+    games_qs = game_models.GameRegistration.objects.all()
+    if game_ids is not None:
+        games_qs = games_qs.filter(pk__in=game_ids)
+    if before is not None:
+        games_qs = games_qs.filter(created_timestamp__lt=before)
+    with transaction.atomic(savepoint=False):
+        purged_game_ids = list(games_qs.values_list('game_id', flat=True))
+        for (center, day), counters in game_statistics.aggregate_statistics(
+                purged_game_ids).items():
+            game_statistics.increment_statistics(
+                center, day, counters, game_models.PurgedStatistics)
+        game_models.GameRegistration.objects.filter(
+            pk__in=purged_game_ids).delete()
+        services.bump_versions_on_commit(*purged_game_ids)
+    existence.invalidate(*purged_game_ids)
+    return len(purged_game_ids)
+
+
+def archive_games(path, batch_size=1000):
+    """Writes every completed game to a new archive, ordered by game id.
+
+    The games are read in batches, with one query for the games and one for
+    their frames per batch; the scores of a game left dirty by the lazy
+    scoring mode are materialized first.
+
+    Args:
+        path: path of the archive, replaced once it is written; see
+            game.archive
+        batch_size: number of games read per query
+
+    Returns:
+        number of games archived
+    """
+    completed_qs = game_models.GameRegistration.objects.annotate(
+        completed=django_models.Exists(game_models.ScorePerFrame.objects.filter(
+            game=django_models.OuterRef('pk'), frame=10))).filter(
+        completed=True).order_by('game_id')
+    last_game_id = None
+    with archive.ArchiveWriter(path) as writer:
+        while True:
+            batch_qs = completed_qs
+            if last_game_id is not None:
+                batch_qs = batch_qs.filter(game_id__gt=last_game_id)
+            games = list(batch_qs.values_list(
+                'game_id', 'created_timestamp', 'scores_dirty')[:batch_size])
+            if not games:
+                return len(writer)
+            last_game_id = games[-1][0]
+            for game_id, _, scores_dirty in games:
+                if scores_dirty:
+                    services.materialize_scores(game_id)
+            frames = collections.defaultdict(dict)
+            for (game_id, frame, first, second, third,
+                 total_score) in game_models.ScorePerFrame.objects.filter(
+                    game__in=[game_id for game_id, _, _ in games]).order_by(
+                    'frame_version').values_list(
+                    'game_id', 'frame', 'first_attempt_score',
+                    'second_attempt_score', 'third_attempt_score',
+                    'total_score_for_frame'):
+                # The latest version of every frame is kept.
+                frames[game_id][frame] = (first, second, third, total_score)
+            for game_id, created_timestamp, _ in games:
+                writer.append(_archived_game(
+                    game_id, created_timestamp, frames[game_id]))
+
+
+def _archived_game(game_id, created_timestamp, frames):
+    rolls = []
+    for frame in sorted(frames):
+        rolls.extend(scoring.frame_rolls(frame, *frames[frame][:3]))
+    return archive.ArchivedGame(
+        game_id, created_timestamp, rolls, frames[10][3] or 0)
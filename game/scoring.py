@@ -0,0 +1,127 @@
+"""Encapsulates the bounds of the final score of a game in progress.
+
+The bonus of a strike is the pins of the next two rolls, and the bonus of a
+spare the pins of the next roll. The rolls still owed to the previous frames
+are the only state needed to score the next frame, and there are at most two
+of them, e.g. '12' after a strike followed by another strike:
+
+1. the guaranteed score is the final score if every remaining roll misses,
+   i.e. the pins knocked down so far with the bonuses they already earned.
+2. the maximum possible score is the final score if every remaining roll is
+   a strike.
+
+Both are computed from the state of the previous frame, in constant time.
+"""
+import collections
+
+LAST_FRAME = 10
+STRIKE = 10
+
+FrameState = collections.namedtuple(
+    'FrameState', ['pending_bonuses', 'guaranteed_score', 'max_possible_score'])
+
+# State of a game before its first frame.
+INITIAL_STATE = FrameState('', 0, 300)
+
+
+def pins(score):
+    """Returns the pins knocked down by an attempt, i.e. 10 for 'X'."""
+    return STRIKE if score == 'X' else int(score)
+
+
+def frame_rolls(frame, first_attempt, second_attempt, third_attempt):
+    """Returns the pins of the rolls played in the frame."""
+    first = pins(first_attempt)
+    if first == STRIKE and frame < LAST_FRAME:
+        return [first]
+    rolls = [first, pins(second_attempt)]
+    if frame == LAST_FRAME and sum(rolls) >= STRIKE:
+        rolls.append(pins(third_attempt))
+    return rolls
+
+
+def _play_frame(score, pending_bonuses, frame, rolls):
+    """Adds the rolls of the frame to the score.
+
+    Every roll counts for its own frame, and once more for every previous
+    frame still owed a bonus roll.
+    """
+    for roll in rolls:
+        score += roll * (1 + len(pending_bonuses))
+        pending_bonuses = [owed - 1 for owed in pending_bonuses if owed > 1]
+    if frame < LAST_FRAME:
+        if rolls[0] == STRIKE:
+            pending_bonuses.append(2)
+        elif sum(rolls) == STRIKE:
+            pending_bonuses.append(1)
+    return score, pending_bonuses
+
+
+def _max_possible_score(score, pending_bonuses, frame):
+    for next_frame in range(frame + 1, LAST_FRAME + 1):
+        score, pending_bonuses = _play_frame(
+            score, pending_bonuses, next_frame,
+            [STRIKE] * (3 if next_frame == LAST_FRAME else 1))
+    return score
+
+
+def next_state(state, frame, first_attempt, second_attempt, third_attempt):
+    """Returns the state of the game after the frame.
+
+    Args:
+        state: state of the game after the previous frame
+        frame: number of the frame
+        first_attempt, second_attempt, third_attempt: scores of the attempts,
+            as stored in ScorePerFrame
+
+    Returns:
+        FrameState instance
+    """
+    score, pending_bonuses = _play_frame(
+        state.guaranteed_score,
+        [int(owed) for owed in state.pending_bonuses], frame,
+        frame_rolls(frame, first_attempt, second_attempt, third_attempt))
+    return FrameState(
+        ''.join(str(owed) for owed in pending_bonuses), score,
+        _max_possible_score(score, pending_bonuses, frame))
+
+
+def score_frames(frames, first_frame=1, total_score=None,
+                 state=INITIAL_STATE):
+    """Scores consecutive frames of a game at once, in memory.
+
+    A strike or a spare whose bonus rolls are not played yet has no frame
+    score, and carries the total score of the previous frame, as stored in
+    ScorePerFrame while the game is in progress.
+
+    Args:
+        frames: the attempts (first, second, third) of the frames, as stored
+            in ScorePerFrame
+        first_frame: number of the first of the frames
+        total_score: total score of the frame before the first one
+        state: state of the game after the frame before the first one
+
+    Returns:
+        list of (frame score, total score for the frame, FrameState) tuples
+    """
+    rolls_per_frame = [frame_rolls(frame, *attempts)
+                       for frame, attempts in enumerate(frames, first_frame)]
+    rolls = [roll for played in rolls_per_frame for roll in played]
+    scores = []
+    position = 0
+    for frame, (attempts, played) in enumerate(
+            zip(frames, rolls_per_frame), first_frame):
+        # A strike or a spare before the last frame counts the next rolls.
+        bonus_rolls = 0
+        if frame < LAST_FRAME and played[0] == STRIKE:
+            bonus_rolls = 2
+        elif frame < LAST_FRAME and sum(played) == STRIKE:
+            bonus_rolls = 1
+        end = position + len(played) + bonus_rolls
+        frame_score = sum(rolls[position:end]) if end <= len(rolls) else None
+        position += len(played)
+        if frame_score is not None:
+            total_score = (total_score or 0) + frame_score
+        state = next_state(state, frame, *attempts)
+        scores.append((frame_score, total_score, state))
+    return scores
@@ -10,11 +10,13 @@ class BaseSerializer(serializers.Serializer, object):
 
     def to_representation(self, instance):
         """Return just errors if applicable, and exclude errors otherwise."""
+        # If error exists, then all fields should be removed. The other fields
+        # are not read, since an ErrorResult does not have them.
+        if getattr(instance, 'errors', None):
+            return collections.OrderedDict(
+                errors=[error_representation(error)
+                        for error in instance.errors])
         ret = super(BaseSerializer, self).to_representation(instance)
-        # If error exists, then all fields should be removed.
-        if 'errors' in ret and ret.get('errors'):
-            return collections.OrderedDict(errors=ret['errors'])
-
         return collections.OrderedDict((k, v) for k, v in ret.items()
                                        if k != 'errors')
 
@@ -25,6 +27,17 @@ class ErrorSerializer(serializers.Serializer):
     error_message = serializers.CharField(max_length=200)
 
 
+def error_representation(error):
+    """Returns the representation of the error by the ErrorSerializer.
+
+    The errors are rendered on every failed request; building them directly
+    skips the deep copy of the serializer fields.
+    """
+    return collections.OrderedDict((
+        ('error_code', int(error.error_code)),
+        ('error_message', str(error.error_message))))
+
+
 class GameRegistrationSerializer(BaseSerializer, serializers.ModelSerializer):
     """Serializer representation of game instance."""
     created = serializers.DateTimeField(source='created_timestamp',
@@ -52,4 +65,75 @@ class ScoreSerializer(BaseSerializer):
     """Encapsulates the scores per frame and the total score."""
     total_score = serializers.IntegerField(required=True)
     game_id = serializers.CharField(max_length=16, min_length=16)
+    guaranteed_score = serializers.IntegerField()
+    max_possible_score = serializers.IntegerField()
+    errors = ErrorSerializer(required=False, many=True)
+
+
+class GameScoresSerializer(BaseSerializer):
+    """Encapsulates the total scores, or the errors, of several games."""
+    games = ScoreSerializer(many=True)
+    errors = ErrorSerializer(required=False, many=True)
+
+
+class GameSummarySerializer(serializers.Serializer):
+    """Representation of a game of a listing, with its current score."""
+    game_id = serializers.CharField(max_length=16, min_length=16)
+    created = serializers.DateTimeField(source='created_timestamp')
+    center = serializers.CharField(max_length=32)
+    completed = serializers.BooleanField()
+    total_score = serializers.IntegerField()
+    guaranteed_score = serializers.IntegerField()
+    max_possible_score = serializers.IntegerField()
+
+
+class GamePageSerializer(BaseSerializer):
+    """Encapsulates a page of games, and the cursor of the next page."""
+    games = GameSummarySerializer(many=True)
+    next_cursor = serializers.CharField()
+    errors = ErrorSerializer(required=False, many=True)
+
+
+class FrameSerializer(serializers.Serializer):
+    """Compact representation of a single frame in a scorecard."""
+    frame = serializers.IntegerField()
+    attempts = serializers.ListField(child=serializers.CharField())
+    frame_score = serializers.IntegerField()
+    total_score_for_frame = serializers.IntegerField()
+    guaranteed_score = serializers.IntegerField()
+    max_possible_score = serializers.IntegerField()
+
+
+class ScorecardSerializer(BaseSerializer):
+    """Encapsulates every frame played so far with its running total."""
+    game_id = serializers.CharField(max_length=16, min_length=16)
+    frames = FrameSerializer(many=True)
+    errors = ErrorSerializer(required=False, many=True)
+
+
+class GameBatchSerializer(BaseSerializer):
+    """Encapsulates the scorecards, or the errors, of several games."""
+    games = ScorecardSerializer(many=True)
+    errors = ErrorSerializer(required=False, many=True)
+
+
+class DailyStatisticsSerializer(serializers.ModelSerializer):
+    """Representation of the counters and rates of a center on a day."""
+    strike_rate = serializers.FloatField(read_only=True)
+    spare_rate = serializers.FloatField(read_only=True)
+    open_frame_rate = serializers.FloatField(read_only=True)
+    average_score = serializers.FloatField(read_only=True)
+    tenth_frame_conversion_rate = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = models.DailyStatistics
+        fields = ('center', 'day', 'frames', 'completed_games', 'strike_rate',
+                  'spare_rate', 'open_frame_rate', 'average_score',
+                  'tenth_frame_conversion_rate')
+        read_only_fields = fields
+
+
+class StatisticsSerializer(BaseSerializer):
+    """Encapsulates the daily statistics matching a query."""
+    days = DailyStatisticsSerializer(many=True)
     errors = ErrorSerializer(required=False, many=True)
@@ -1,36 +1,163 @@
 """Module that encapsulates all service functions.
 """
+import collections
+import functools
 import logging
 import re
+from django.conf import settings
 from django.db import DatabaseError
 from django.db import models as django_models
 from django.db import transaction
+from django.utils import timezone
 
+from game import bloom
+from game import events
+from game import existence
 from game import exceptions
+from game import locks
+from game import metrics
+from game import tracing
 from game import models as game_models
+from game import scoring
+from game import singleflight
+from game import statistics as game_statistics
+from game import tasks
+from game import writebehind
 
 
 SCORING_TYPE_STRIKE = 'strike'
 SCORING_TYPE_SPARE = 'spare'
 SCORING_TYPE_OPEN = 'open'
 
+# Maximum number of games whose scores can be fetched in one request.
+MAX_GAMES_PER_REQUEST = 100
 
-def register_game():
-    """Registers the game and returns the game instance."""
+SCORING_MODE_EAGER = 'eager'
+SCORING_MODE_LAZY = 'lazy'
+
+# Fields of a frame written when its scores are materialized.
+MATERIALIZED_FIELDS = ('frame_score', 'total_score_for_frame',
+                       'pending_bonuses', 'guaranteed_score',
+                       'max_possible_score')
+
+# Concurrent reads of the score of the same version of a game.
+_get_frame_score_group = singleflight.Group('get_frame_score')
+
+
+@metrics.timed(metrics.FUNCTION_DURATION, 'register_game')
+def register_game(center=''):
+    """Registers the game and returns the game instance.
+
+    Args:
+        center: optional name of the bowling center at which the game is
+            played; statistics are collected per center
+    """
+    if not _is_valid_center(center):
+        return game_models.ErrorResult([game_models.Error(
+            error_code=400,
+            error_message='Center: {} is invalid.'.format(center))])
     try:
         with transaction.atomic(savepoint=False):
             game_object = game_models.GameRegistration()
+            game_object.center = center
             game_object.save()
+            bloom.add(game_object.game_id)
+            bump_versions_on_commit(game_object.game_id)
+            # The id might have been probed before it was registered.
+            existence.invalidate(game_object.game_id)
             return game_object
     except DatabaseError:
         logging.exception('Unable to register the game')
-        game_object = game_models.GameRegistration()
-        game_object.add_error(
-            game_models.Error(
-                error_code=500, error_message='Unable to register the game.'))
-        return game_object
+        return game_models.ErrorResult([game_models.Error(
+            error_code=500, error_message='Unable to register the game.')])
+
+
+@metrics.timed(metrics.FUNCTION_DURATION, 'register_games')
+def register_games(games, center=''):
+    """Registers complete games and scores all of their frames at once.
 
+    Every game is a string of its ten frames separated by spaces, e.g.
+    'X 7/ 9-0 X X 8-1 7/ X X X-X-X', in the format of set_frame_score. The
+    games are validated first, and none is registered if any is invalid.
+    The frames are then scored in memory, and the games and all of their
+    frames are inserted in one transaction, with one query per table.
+
+    Args:
+        games: list of at most MAX_GAMES_PER_REQUEST game strings
+        center: optional bowling center at which the games were played
 
+    Returns:
+        game batch instance with the scorecard of every game, in order
+    """
+    error_result = game_models.ErrorResult()
+    if not _is_valid_center(center):
+        error_result.add_error(game_models.Error(
+            error_code=400,
+            error_message='Center: {} is invalid.'.format(center)))
+    if (not isinstance(games, list) or not games or
+            len(games) > MAX_GAMES_PER_REQUEST):
+        error_result.add_error(game_models.Error(
+            error_code=400,
+            error_message='Between 1 and {} games are required.'.format(
+                MAX_GAMES_PER_REQUEST)))
+        return error_result
+    parsed_games = []
+    for index, game in enumerate(games, 1):
+        try:
+            parsed_games.append(_parse_game(game))
+        except exceptions.ScoringException as e:
+            error_result.add_error(game_models.Error(
+                error_code=400,
+                error_message='Game {}: {}'.format(index, e)))
+    if error_result.errors:
+        return error_result
+    try:
+        with transaction.atomic(savepoint=False):
+            return _create_games(parsed_games, center)
+    except DatabaseError:
+        logging.exception('Unable to register the games')
+        return game_models.ErrorResult([game_models.Error(
+            error_code=500, error_message='Unable to register the games.')])
+
+
+def _create_games(parsed_games, center):
+    """Inserts the games and their frames scored in memory."""
+    registrations = [game_models.GameRegistration(center=center)
+                     for _ in parsed_games]
+    game_models.GameRegistration.objects.bulk_create(registrations)
+    game_ids = [registration.game_id for registration in registrations]
+    bloom.add(*game_ids)
+    existence.invalidate(*game_ids)
+    bump_versions_on_commit(*game_ids)
+    game_batch = game_models.GameBatch()
+    frames = []
+    statistics = collections.defaultdict(collections.Counter)
+    for registration, attempts in zip(registrations, parsed_games):
+        scorecard = game_models.Scorecard(registration.game_id)
+        for frame, ((first, second, third),
+                    (frame_score, total_score, state)) in enumerate(
+                zip(attempts, scoring.score_frames(attempts)), 1):
+            score_per_frame = game_models.ScorePerFrame(
+                game=registration, frame=frame, frame_version=1,
+                first_attempt_score=first, second_attempt_score=second,
+                third_attempt_score=third, frame_score=frame_score,
+                total_score_for_frame=total_score,
+                pending_bonuses=state.pending_bonuses,
+                guaranteed_score=state.guaranteed_score,
+                max_possible_score=state.max_possible_score)
+            statistics[timezone.localdate(
+                registration.created_timestamp)].update(
+                game_statistics.frame_statistics(score_per_frame))
+            scorecard.frames.append(score_per_frame)
+        frames.extend(scorecard.frames)
+        game_batch.games.append(scorecard)
+    game_models.ScorePerFrame.objects.bulk_create(frames)
+    for day, counters in statistics.items():
+        game_statistics.increment_statistics(center, day, counters)
+    return game_batch
+
+
+@metrics.timed(metrics.FUNCTION_DURATION, 'set_frame_score')
 def set_frame_score(score_queryset, game_id, score):
     """Sets the frame score for a valid game.
 
@@ -44,117 +171,437 @@ def set_frame_score(score_queryset, game_id, score):
 
     3. If the score format is valid, then and no frames have been played, then
        a frame is created and the score calculated.
+
+    The writes of the same game are serialized in the process if
+    GAME_WRITE_LOCKS is enabled; a write waiting longer than its timeout
+    returns a 503 error. If GAME_WRITE_BEHIND is enabled, the frame is
+    scored in memory and committed later by the write-behind queue.
     """
     try:
-        with transaction.atomic(savepoint=False):
+        if writebehind.is_enabled():
+            # Imported here, as game.queued_frames builds on this module.
+            from game import queued_frames
+            # The frames queued for the game are numbered in memory.
+            with locks.hold_game(game_id, required=True):
+                return queued_frames.set_frame_score(game_id, score)
+        with locks.hold_game(game_id):
+            return _set_frame_score(score_queryset, game_id, score)
+    except locks.LockTimeout:
+        logging.warning(
+            'Timed out waiting for the write lock of game:{}.'.format(game_id))
+        return game_models.ErrorResult([game_models.Error(
+            error_code=503,
+            error_message=('Another score is being saved for game: \'{}\'. '
+                           'Retry later.'.format(game_id)))])
+
+
+def _set_frame_score(score_queryset, game_id, score):
+    try:
+        with tracing.span('transaction', game_id=game_id), \
+                transaction.atomic(savepoint=False):
             # If the game has not been created, then return a 404.
-            game_object, game_object_created = _get_game_object(
-                game_id, game_models.ScorePerFrame)
+            with tracing.span('game_lookup', game_id=game_id):
+                game_object, game_object_created = get_game_object(game_id)
             if not game_object_created:
                 # Error object is returned
                 return game_object
 
-            if not _is_valid_score(score):
-                frame_score = game_models.ScorePerFrame()
-                frame_score.add_error(game_models.Error(
-                    error_code=400,
-                    error_message='Score format: {} is invalid.'.format(score)))
-                return frame_score
+            _materialize_before_eager_write(game_object)
 
             spf_qs = score_queryset.filter(game=game_object)
-            if not spf_qs or len(spf_qs) == 0:
+            with tracing.span('frames_lookup', game_id=game_id):
+                is_first_frame = not spf_qs.exists()
+            if is_first_frame:
                 # First frame.
-
-                (first_score, second_score,
-                 third_score) = _parse_score(score, 1)
-                bowling_frame = game_object.game_score.create(
-                    frame=1,
-                    first_attempt_score=first_score,
-                    second_attempt_score=second_score,
-                    third_attempt_score=third_score,
-                    frame_version=1)
+                try:
+                    attempts = parse_frame(score, 1)
+                except exceptions.ScoringException:
+                    return invalid_score(score)
+                first_score, second_score, third_score = attempts
+                with tracing.span('create_frame', game_id=game_id, frame=1):
+                    bowling_frame = _create_frame(
+                        game_object,
+                        frame=1,
+                        first_attempt_score=first_score,
+                        second_attempt_score=second_score,
+                        third_attempt_score=third_score,
+                        frame_version=1)
+                game_statistics.record_frame_statistics(
+                    game_object, bowling_frame)
+                publish_frame_on_commit(score_queryset, game_id, 1)
                 return bowling_frame
 
             # If the game has been completed, then return a 400.
-            number_of_played_frames = spf_qs.aggregate(
-                django_models.Max('frame')).get('frame__max', 0)
+            with tracing.span('max_frame_aggregate', game_id=game_id):
+                number_of_played_frames = spf_qs.aggregate(
+                    django_models.Max('frame')).get('frame__max', 0)
 
             if number_of_played_frames == 10:
-                frame_score = game_models.ScorePerFrame()
-                frame_score.add_error(game_models.Error(
+                return game_models.ErrorResult([game_models.Error(
                     error_code=400,
                     error_message='Game:\'{}\' has already been played.'.format(
-                        game_id)))
-                return frame_score
+                        game_id))])
 
             # Parse the score, and check if the version has been created.
-            (first_score, second_score,
-             third_score) = _parse_score(score, number_of_played_frames + 1)
-            version_number_tuple = spf_qs.filter(game=game_object).filter(
-                frame=number_of_played_frames + 1).values_list(
-                'frame_version').first()
+            try:
+                attempts = parse_frame(score, number_of_played_frames + 1)
+            except exceptions.ScoringException:
+                return invalid_score(score)
+            first_score, second_score, third_score = attempts
+            with tracing.span('version_lookup', game_id=game_id,
+                              frame=number_of_played_frames + 1):
+                version_number_tuple = spf_qs.filter(
+                    game=game_object).filter(
+                    frame=number_of_played_frames + 1).values_list(
+                    'frame_version').first()
             (version_number, ) = (
                 version_number_tuple
                 if version_number_tuple is not None else (0, ))
             # Update the frame by to indicate a new frame is being played.
-            score_per_frame = game_object.game_score.create(
-                first_attempt_score=first_score,
-                second_attempt_score=second_score,
-                third_attempt_score=third_score,
-                frame=number_of_played_frames + 1,
-                frame_version=version_number + 1)
+            with tracing.span('create_frame', game_id=game_id,
+                              frame=number_of_played_frames + 1):
+                score_per_frame = _create_frame(
+                    game_object,
+                    first_attempt_score=first_score,
+                    second_attempt_score=second_score,
+                    third_attempt_score=third_score,
+                    frame=number_of_played_frames + 1,
+                    frame_version=version_number + 1)
+            game_statistics.record_frame_statistics(
+                game_object, score_per_frame)
+            publish_frame_on_commit(
+                score_queryset, game_id, score_per_frame.frame)
             return score_per_frame
     except:
         logging.exception(
             ('Unable to save the frame for score {}'
              ' and game:{}.'.format(score, game_id)))
-        frame_score = game_models.ScorePerFrame()
-        frame_score.add_error(game_models.Error(
+        return game_models.ErrorResult([game_models.Error(
             error_code=500,
             error_message=('Unable to save score: \'{score}\' for game: '
-                           '\'{game}\'.'.format(game=game_id, score=score))))
-        return frame_score
+                           '\'{game}\'.'.format(game=game_id, score=score)))])
+
+
+def publish_frame_on_commit(queryset, game_id, frame):
+    """Publishes the frame to the live subscribers once it has been saved."""
+    bump_versions_on_commit(game_id)
+    # The events of a game are published in the order of its frames.
+    tasks.on_commit('publish_frame', _publish_frame, queryset, game_id, frame,
+                    key=game_id)
+
+
+def bump_versions_on_commit(*game_ids):
+    """Stops the reads started after the commit from sharing the results of
+    the reads started before.
+    """
+    if singleflight.is_enabled():
+        transaction.on_commit(
+            functools.partial(singleflight.versions.bump, *game_ids))
+
+
+def _publish_frame(queryset, game_id, frame):
+    """Publishes the frame, and the frames it has scored retroactively."""
+    if not events.hub.has_subscribers(game_id):
+        return
+    try:
+        scorecard = get_scorecard(queryset, game_id, since_frame=frame - 1)
+        events.publish_scorecard(frame, scorecard)
+    except:
+        logging.exception(
+            'Unable to publish frame {} for game:{}.'.format(frame, game_id))
+
+
+def _is_lazy_scoring():
+    return (getattr(settings, 'GAME_SCORING_MODE', SCORING_MODE_EAGER) ==
+            SCORING_MODE_LAZY)
+
+
+def _create_frame(game_object, **fields):
+    """Creates the frame of the game.
+
+    In the eager scoring mode, the frame is scored along with the previous
+    frames it scores retroactively. In the lazy scoring mode, the frame is
+    only appended and the game marked dirty; its scores are materialized on
+    the next read, or by the materialize_scores command.
+    """
+    if not _is_lazy_scoring():
+        return game_object.game_score.create(**fields)
+    frame = game_models.ScorePerFrame(game=game_object, **fields)
+    frame.save(recursive_save=False)
+    # Always written, so that a concurrent materialization of the game,
+    # which locks it, can not clear the flag of this frame.
+    game_models.GameRegistration.objects.filter(pk=game_object.pk).update(
+        scores_dirty=True)
+    existence.invalidate(game_object.pk)
+    return frame
+
+
+def _materialize_before_eager_write(game_object):
+    """Materializes a game left dirty by the lazy mode before scoring on.
+    """
+    if game_object.scores_dirty and not _is_lazy_scoring():
+        materialize_scores(game_object.game_id)
+
+
+@metrics.timed(metrics.FUNCTION_DURATION, 'materialize_scores')
+def materialize_scores(game_id):
+    """Scores the frames appended to the game in the lazy scoring mode.
 
+    The frames are scored one after the other in the order they were played,
+    exactly like the eager mode would have scored them on every write; the
+    frames not scored yet are the ones without final score bounds.
 
+    Returns:
+        number of frames scored
+    """
+    with transaction.atomic(savepoint=False):
+        game_object = game_models.GameRegistration.objects.select_for_update(
+        ).filter(pk=game_id, scores_dirty=True).first()
+        if game_object is None:
+            return 0
+        frames = list(game_models.ScorePerFrame.objects.filter(
+            game=game_object, max_possible_score__isnull=True).order_by(
+            'frame', 'frame_version'))
+        for frame in frames:
+            frame.game = game_object
+            frame.frame_score = frame.calculate_frame_score()
+            frame.save(recursive_save=False, update_fields=MATERIALIZED_FIELDS)
+            if frame.frame == 10:
+                # The frame was counted by the statistics without its total.
+                game_statistics.increment_statistics(
+                    game_object.center,
+                    timezone.localdate(game_object.created_timestamp),
+                    {'total_score': frame.total_score_for_frame or 0})
+        game_models.GameRegistration.objects.filter(pk=game_id).update(
+            scores_dirty=False)
+        return len(frames)
+
+
+def materialize_dirty_games(batch_size=100):
+    """Materializes the scores of every dirty game, in batches by game id.
+
+    A game written again while the games are processed is left to the next
+    call, and a game that can not be scored is logged and skipped.
+
+    Returns:
+        number of games materialized
+    """
+    dirty_qs = game_models.GameRegistration.objects.filter(
+        scores_dirty=True).order_by('game_id')
+    materialized = 0
+    last_game_id = None
+    while True:
+        batch_qs = dirty_qs
+        if last_game_id is not None:
+            batch_qs = batch_qs.filter(game_id__gt=last_game_id)
+        game_ids = list(batch_qs.values_list('game_id', flat=True)[
+            :batch_size])
+        if not game_ids:
+            return materialized
+        last_game_id = game_ids[-1]
+        for game_id in game_ids:
+            try:
+                materialize_scores(game_id)
+            except Exception:
+                logging.exception(
+                    'Unable to materialize the scores of game:{}.'.format(
+                        game_id))
+                continue
+            materialized += 1
+
+
+@metrics.timed(metrics.FUNCTION_DURATION, 'get_frame_score')
 def get_frame_score(queryset, game_id):
-    """Gets the scores of the all the frames in addition to the total score."""
+    """Gets the scores of the all the frames in addition to the total score.
+
+    Concurrent reads of the same version of the game share a single
+    computation if GAME_SINGLE_FLIGHT is enabled.
+    """
+    if not singleflight.is_enabled():
+        return _get_frame_score(queryset, game_id)
+    return _get_frame_score_group.do(
+        (game_id, singleflight.versions.get(game_id)),
+        functools.partial(_get_frame_score, queryset, game_id))
+
+
+def _get_frame_score(queryset, game_id):
+    writebehind.wait(game_id)
     with transaction.atomic(savepoint=False):
-        game_object, is_returned = _get_game_object(game_id, game_models.Game)
-        game_object.game_id = game_id
+        game_object, is_returned = get_game_object(game_id)
         if not is_returned:
             return game_object
+        if game_object.scores_dirty:
+            materialize_scores(game_id)
         spf_qs = queryset.filter(game=game_object).order_by('frame')
         # If number of played frames = 10, that means the game has been
         # completed. In that event,
         total_score = None
+        state = scoring.INITIAL_STATE
         for score in reversed(spf_qs):
             if total_score is None and score.total_score_for_frame is not None:
                 total_score = score.total_score_for_frame
-        return game_models.Game(game_id, total_score)
+            if state is scoring.INITIAL_STATE:
+                # The bounds of the final score are kept by the latest frame.
+                state = score.state
+        return game_models.Game(
+            game_id, total_score, state.guaranteed_score,
+            state.max_possible_score)
+
 
+def get_frame_scores(queryset, game_ids):
+    """Gets the total scores of several games at once.
+
+    The existence and the latest total score of every game are resolved by a
+    single query, irrespective of the number of games.
+
+    Args:
+        queryset: queryset of the frame scores
+        game_ids: iterable of unique game ids
 
-def _get_game_object(game_id, clazz_instance):
+    Returns:
+        game scores instance with a game instance per distinct game id, in
+        the order of the game ids; unknown games carry a 404 error
+    """
+    game_ids = list(collections.OrderedDict.fromkeys(game_ids))
+    game_scores = game_models.GameScores()
+    if not game_ids or len(game_ids) > MAX_GAMES_PER_REQUEST:
+        game_scores.add_error(game_models.Error(
+            error_code=400,
+            error_message=('Between 1 and {} game ids are required.'.format(
+                MAX_GAMES_PER_REQUEST))))
+        return game_scores
+    scores = get_current_scores(queryset, game_ids)
+    for game_id in game_ids:
+        if game_id in scores:
+            game_scores.games.append(
+                game_models.Game(game_id, *scores[game_id]))
+            continue
+        game_scores.games.append(_game_not_found(game_id))
+    return game_scores
+
+
+def get_current_scores(queryset, game_ids):
+    """Returns the scores of the existing games by id, once scored.
+
+    The frames queued for the games are committed first, and the games with
+    frames left to score are materialized.
+    """
+    writebehind.wait(*game_ids)
+    scores = _get_scores(queryset, game_ids)
+    dirty_game_ids = [game_id for game_id, (scores_dirty, _) in scores.items()
+                      if scores_dirty]
+    if dirty_game_ids:
+        for game_id in dirty_game_ids:
+            materialize_scores(game_id)
+        scores.update(_get_scores(queryset, dirty_game_ids))
+    return {game_id: game_scores
+            for game_id, (_, game_scores) in scores.items()}
+
+
+def _get_scores(queryset, game_ids):
+    """Returns the dirty flag and the scores of the existing games by id."""
+    frames = queryset.model.objects.filter(
+        game=django_models.OuterRef('pk')).order_by('-frame', '-frame_version')
+    latest_total = frames.filter(total_score_for_frame__isnull=False).values(
+        'total_score_for_frame')[:1]
+    return {
+        game_id: (scores_dirty, (
+            total_score,
+            scoring.INITIAL_STATE.guaranteed_score
+            if guaranteed_score is None else guaranteed_score,
+            scoring.INITIAL_STATE.max_possible_score
+            if max_possible_score is None else max_possible_score))
+        for (game_id, scores_dirty, total_score, guaranteed_score,
+             max_possible_score) in game_models.GameRegistration.objects.filter(
+            pk__in=game_ids).annotate(
+            total_score=django_models.Subquery(latest_total),
+            guaranteed_score=django_models.Subquery(
+                frames.values('guaranteed_score')[:1]),
+            max_possible_score=django_models.Subquery(
+                frames.values('max_possible_score')[:1])).values_list(
+            'game_id', 'scores_dirty', 'total_score', 'guaranteed_score',
+            'max_possible_score')}
+
+
+def get_scorecard(queryset, game_id, since_frame=None):
+    """Gets every frame played so far along with the running total.
+
+    All frames are fetched in a single ordered query; if a frame has been
+    recorded more than once, only its latest frame version is returned.
+
+    Args:
+        queryset: queryset of the frame scores
+        game_id: unique game id
+        since_frame: optional number of the last frame known to the caller;
+            only frames that are new, or that may still have been updated
+            retroactively since (i.e. the caller's last two frames), are
+            returned
+
+    Returns:
+        scorecard instance
+    """
+    writebehind.wait(game_id)
+    with transaction.atomic(savepoint=False):
+        game_object, is_returned = get_game_object(game_id)
+        if not is_returned:
+            return game_object
+        if game_object.scores_dirty:
+            materialize_scores(game_id)
+        latest_version = queryset.model.objects.filter(
+            game=django_models.OuterRef('game'),
+            frame=django_models.OuterRef('frame')).order_by(
+            '-frame_version').values('frame_version')[:1]
+        spf_qs = queryset.filter(
+            game=game_object,
+            frame_version=django_models.Subquery(latest_version))
+        if since_frame:
+            # A strike or a spare is scored by the next two attempts, so the
+            # last two frames seen by the caller might have changed since.
+            spf_qs = spf_qs.filter(frame__gt=since_frame - 2)
+        return game_models.Scorecard(
+            game_id, list(spf_qs.order_by('frame')))
+
+
+def _game_not_found(game_id):
+    return game_models.ErrorResult([game_models.Error(
+        error_code=404,
+        error_message='No game was found for the game id: {}.'.format(
+            game_id))])
+
+
+def get_game_object(game_id):
     """Returns the game object by game id.
 
     Returns:
-        a tuple of game object and boolean flag indicating that the game object
-        was created or not
+        a tuple of the game object, or of an error result if the game does not
+        exist, and a boolean flag indicating that the game object was found
     """
+    if not bloom.might_exist(game_id):
+        return _game_not_found(game_id), False
+    cached = existence.get(game_id)
+    if cached == existence.MISSING:
+        return _game_not_found(game_id), False
+    if cached is not None:
+        return cached, True
     try:
         with transaction.atomic(savepoint=False):
             game_object = game_models.GameRegistration.objects.get(pk=game_id)
-            return game_object, True
     except game_models.GameRegistration.DoesNotExist:
         logging.error('No game was found for game id : {}'.format(game_id))
-        clazz_object = clazz_instance()
-        clazz_object.add_error(game_models.Error(
-            error_code=404,
-            error_message='No game was found for the game id: {}.'.format(
-                game_id)))
-        return clazz_object, False
+        if bloom.is_enabled():
+            bloom.LOOKUPS.inc('false_positive')
+        existence.set_missing(game_id)
+        return _game_not_found(game_id), False
+    existence.set_found(game_object)
+    return game_object, True
 
 
-def _is_valid_score(score):
+def _is_valid_center(center):
+    """Validates the name of the bowling center."""
+    return re.match(r'^[A-Za-z0-9_\-]{0,32}$', center) is not None
+
+
+def is_valid_score(score):
     """Validates the string representation of the score.
 
     The acceptable formats is given below:
@@ -182,6 +629,62 @@ def _is_valid_score(score):
     return True if p.match(score) else False
 
 
+def _parse_game(game):
+    """Parses the score string of a complete game.
+
+    Returns:
+        list of the attempts (first, second, third) of the ten frames
+
+    Raises:
+        InvalidGameException: if the game does not have ten valid frames
+    """
+    scores = game.split() if isinstance(game, str) else []
+    if len(scores) != 10:
+        raise exceptions.InvalidGameException(
+            'A game has 10 frames separated by spaces.')
+    frames = []
+    for frame, score in enumerate(scores, 1):
+        frames.append(tuple(parse_frame(score, frame)))
+    return frames
+
+
+def parse_frame(score, frame):
+    """Parses and validates the score of a frame.
+
+    Every path writing frames validates their scores with this function: the
+    format of the score, its attempts for the frame, and the pins standing.
+
+    Returns:
+        the attempts (first, second, third) of the frame
+
+    Raises:
+        ScoringException: if the score is invalid for the frame
+    """
+    if not is_valid_score(score):
+        raise exceptions.InvalidScoreException(score, frame)
+    attempts = _parse_score(score, frame)
+    if attempts is None or not _is_valid_pins(
+            scoring.frame_rolls(frame, *attempts)):
+        raise exceptions.InvalidScoreException(score, frame)
+    return attempts
+
+
+def invalid_score(score):
+    return game_models.ErrorResult([game_models.Error(
+        error_code=400,
+        error_message='Score format: {} is invalid.'.format(score))])
+
+
+def _is_valid_pins(rolls):
+    """Checks that no roll knocks down more pins than are standing."""
+    standing = 10
+    for roll in rolls:
+        if roll > standing:
+            return False
+        standing = standing - roll or 10
+    return True
+
+
 def _handle_strike(arr, score, number_of_played_frames):
     """Handles the scenario in which the bowling attempt is a strike.
 
@@ -0,0 +1,19 @@
+"""Encapsulates all signal receivers associated with the bowling game."""
+from django.conf import settings
+
+
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Applies the configured PRAGMA statements to a new SQLite connection.
+
+    The PRAGMAs are read from the ``GAME_SQLITE_PRAGMAS`` setting, which is an
+    iterable of ``(name, value)`` pairs. Connections to any other database
+    vendor are left untouched.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'GAME_SQLITE_PRAGMAS', ())
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas:
+            cursor.execute('PRAGMA {}={}'.format(name, value))
@@ -0,0 +1,116 @@
+"""Encapsulates the coalescing of concurrent computations of the same result.
+
+When a game is over, every screen of the center reads its score at the same
+instant. A group runs a single computation per key at a time, and the
+callers asking for the same key meanwhile wait for it and share its result,
+or its exception:
+
+    group = singleflight.Group('get_frame_score')
+    game = group.do((game_id, versions.get(game_id)), compute)
+
+The key carries the data version of the game, which is bumped once a write
+to the game is committed, or queued by the write-behind path, so that a
+caller never shares a computation that started before a write it has seen.
+Like the live events hub, the versions only see the writes of the current
+process.
+"""
+import threading
+import zlib
+
+from django.conf import settings
+
+from game import metrics
+
+COALESCED = metrics.Counter(
+    'game_coalesced_requests_total',
+    'Number of calls that shared the result of a computation in flight, by '
+    'function.', 'function')
+
+
+def is_enabled():
+    return getattr(settings, 'GAME_SINGLE_FLIGHT', {}).get('ENABLED', False)
+
+
+class _Call(object):
+    """A computation in flight, and its outcome once done."""
+    __slots__ = ('done', 'result', 'exception')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class Group(object):
+    """Runs at most one computation per key at a time, across threads."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        """Returns the result of function(), shared with concurrent callers.
+
+        Args:
+            key: hashable key of the result
+            function: callable computing the result, called by the first
+                caller of the key only
+
+        Raises:
+            the exception raised by function(), to every caller sharing it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+        if not is_leader:
+            COALESCED.inc(self.name)
+            call.done.wait()
+            if call.exception is not None:
+                raise call.exception
+            return call.result
+        try:
+            call.result = function()
+        except Exception as exception:
+            call.exception = exception
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        """Returns the number of computations in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+class Versions(object):
+    """Data versions of the games, in a fixed number of striped counters.
+
+    Two games sharing a stripe share a version, so that a write to one only
+    stops the reads of the other from sharing a computation started before.
+    """
+
+    def __init__(self, stripes=4096):
+        self._lock = threading.Lock()
+        self._versions = [0] * stripes
+
+    def _stripe(self, game_id):
+        return zlib.crc32(game_id.encode('utf-8')) % len(self._versions)
+
+    def get(self, game_id):
+        return self._versions[self._stripe(game_id)]
+
+    def bump(self, *game_ids):
+        """Bumps the versions of the games, once their writes are committed.
+        """
+        with self._lock:
+            for game_id in game_ids:
+                self._versions[self._stripe(game_id)] += 1
+
+
+versions = Versions()
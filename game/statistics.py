@@ -0,0 +1,168 @@
+"""Encapsulates the daily statistics of the bowling centers.
+
+Every scored frame increments the counters of its game's center on the day
+the game was registered. The counters can be rebuilt from the frames saved,
+along with the counters of the purged games, by rebuild_statistics.
+"""
+import collections
+
+from django.db import IntegrityError
+from django.db import models as django_models
+from django.db import transaction
+from django.db.models import functions
+from django.utils import timezone
+
+from game import models as game_models
+from game import tasks
+
+
+def frame_statistics(score_per_frame):
+    """Returns the statistics counters incremented by a scored frame."""
+    counters = collections.Counter(frames=1)
+    if score_per_frame.is_strike:
+        counters['strikes'] += 1
+    elif score_per_frame.is_spare:
+        counters['spares'] += 1
+    else:
+        counters['open_frames'] += 1
+    if score_per_frame.frame == 10:
+        counters['tenth_frames'] += 1
+        if score_per_frame.is_strike or score_per_frame.is_spare:
+            counters['tenth_frame_conversions'] += 1
+        counters['completed_games'] += 1
+        counters['total_score'] += score_per_frame.total_score_for_frame or 0
+    return counters
+
+
+def record_frame_statistics(game_object, score_per_frame):
+    """Increments the statistics of the game's center and day by the frame.
+
+    The statistics are incremented by a background task once the frame is
+    committed if GAME_TASKS is enabled, and in the transaction otherwise.
+    """
+    arguments = (
+        game_object.center, timezone.localdate(game_object.created_timestamp),
+        frame_statistics(score_per_frame))
+    if tasks.is_enabled():
+        # The frames of a center increment the same rows, one at a time.
+        tasks.on_commit('record_statistics', increment_statistics,
+                        *arguments, key=game_object.center)
+    else:
+        increment_statistics(*arguments)
+
+
+def increment_statistics(center, day, counters,
+                         model=game_models.DailyStatistics):
+    """Increments the statistics counters of a center on a given day."""
+    statistics_qs = model.objects.filter(center=center, day=day)
+    updates = {name: django_models.F(name) + value
+               for name, value in counters.items()}
+    if statistics_qs.update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(center=center, day=day, **counters)
+    except IntegrityError:
+        # Created concurrently by another frame.
+        statistics_qs.update(**updates)
+
+
+def get_statistics(center=None, start=None, end=None):
+    """Gets the daily statistics, optionally of a center and a date range.
+
+    Args:
+        center: optional bowling center
+        start: optional first day (inclusive)
+        end: optional last day (inclusive)
+
+    Returns:
+        statistics instance with the matching days ordered by center and day
+    """
+    statistics_qs = game_models.DailyStatistics.objects.order_by(
+        'center', 'day')
+    if center is not None:
+        statistics_qs = statistics_qs.filter(center=center)
+    if start is not None:
+        statistics_qs = statistics_qs.filter(day__gte=start)
+    if end is not None:
+        statistics_qs = statistics_qs.filter(day__lte=end)
+    return game_models.Statistics(list(statistics_qs))
+
+
+def rebuild_statistics(batch_size=1000):
+    """Recomputes the daily statistics from the scored frames.
+
+    The games are processed in batches ordered by game id. The counters of a
+    batch are computed by a single grouped aggregate query, rather than frame
+    by frame, and all the counters are written with one bulk insert, along
+    with the counters of the purged games.
+
+    The statistics are deleted first, in the same transaction, so that the
+    frames incremented meanwhile wait for the new counters instead of being
+    lost with the old ones.
+
+    Returns:
+        number of daily statistics rows written
+    """
+    totals = collections.defaultdict(collections.Counter)
+    game_qs = game_models.GameRegistration.objects.order_by('game_id')
+    with transaction.atomic():
+        game_models.DailyStatistics.objects.all().delete()
+        for purged in game_models.PurgedStatistics.objects.all():
+            totals[(purged.center, purged.day)].update(
+                {name: getattr(purged, name)
+                 for name in game_models.DailyStatistics.COUNTERS})
+        last_game_id = None
+        while True:
+            batch_qs = game_qs
+            if last_game_id is not None:
+                batch_qs = batch_qs.filter(game_id__gt=last_game_id)
+            game_ids = list(batch_qs.values_list('game_id', flat=True)[
+                :batch_size])
+            if not game_ids:
+                break
+            last_game_id = game_ids[-1]
+            for key, counters in aggregate_statistics(game_ids).items():
+                totals[key].update(counters)
+        game_models.DailyStatistics.objects.bulk_create(
+            game_models.DailyStatistics(center=center, day=day, **counters)
+            for (center, day), counters in totals.items())
+    return len(totals)
+
+
+def aggregate_statistics(game_ids):
+    """Counts the scored frames of the games by a grouped aggregate query.
+
+    Returns:
+        dictionary of the counters by center and day
+    """
+    pins = (functions.Cast('first_attempt_score', django_models.IntegerField())
+            + functions.Cast('second_attempt_score',
+                             django_models.IntegerField()))
+    is_strike = django_models.Q(first_attempt_score='X')
+    is_spare = ~is_strike & django_models.Q(pins=10)
+    is_tenth = django_models.Q(frame=10)
+    aggregates = {
+        'frames': django_models.Count('pk'),
+        'strikes': django_models.Count('pk', filter=is_strike),
+        'spares': django_models.Count('pk', filter=is_spare),
+        'open_frames': django_models.Count(
+            'pk', filter=~is_strike & ~django_models.Q(pins=10)),
+        'tenth_frames': django_models.Count('pk', filter=is_tenth),
+        'tenth_frame_conversions': django_models.Count(
+            'pk', filter=is_tenth & (is_strike | is_spare)),
+        'completed_games': django_models.Count('pk', filter=is_tenth),
+        'total_score': django_models.Sum(
+            'total_score_for_frame', filter=is_tenth),
+    }
+    rows = game_models.ScorePerFrame.objects.filter(
+        game__in=game_ids).annotate(
+        pins=pins, center=django_models.F('game__center'),
+        day=functions.TruncDate('game__created_timestamp')).values(
+        'center', 'day').annotate(**aggregates)
+    totals = {}
+    for row in rows:
+        center, day = row.pop('center'), row.pop('day')
+        totals[(center, day)] = collections.Counter(
+            {name: value or 0 for name, value in row.items()})
+    return totals
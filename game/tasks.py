@@ -0,0 +1,251 @@
+"""Encapsulates the in-process runner of the work done after a commit.
+
+The work that follows a write, such as the statistics of the frame or its
+live score event, does not change the response. With the runner enabled, it
+is queued once the transaction is committed and run by a pool of worker
+threads, instead of delaying the response:
+
+    tasks.on_commit('publish_frame', publish, game_id, frame, key=game_id)
+
+The tasks of the same key run on the same worker, in the order they were
+queued. Every worker has a queue of at most MAX_QUEUE_SIZE tasks; a task
+submitted to a full queue waits for room, so that the requests slow down
+under load instead of the tasks being lost or reordered. A task raising an
+exception is retried after RETRY_SECONDS, up to MAX_ATTEMPTS times in all.
+On exit the queued tasks are run for at most DRAIN_SECONDS. The tasks queued
+by a process are lost if it crashes:
+
+    GAME_TASKS = {
+        'ENABLED': True,
+        'WORKERS': 4,
+        'MAX_QUEUE_SIZE': 1000,
+        'MAX_ATTEMPTS': 3,
+        'RETRY_SECONDS': 0.5,
+        'DRAIN_SECONDS': 10,
+    }
+"""
+import atexit
+import collections
+import functools
+import itertools
+import logging
+import queue
+import threading
+import time
+import zlib
+
+from django import db
+from django.conf import settings
+from django.db import transaction
+
+from game import metrics
+
+DEFAULTS = {
+    'ENABLED': False,
+    'WORKERS': 4,
+    'MAX_QUEUE_SIZE': 1000,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_SECONDS': 0.5,
+    'DRAIN_SECONDS': 10,
+}
+
+TASKS = metrics.Counter(
+    'game_tasks_total',
+    'Number of background tasks, by outcome: succeeded, retried, failed, '
+    'or dropped on exit.', 'outcome')
+QUEUE_FULL = metrics.Counter(
+    'game_task_queue_full_total',
+    'Number of tasks that waited for room in a full queue, by task.', 'task')
+LAG = metrics.Histogram(
+    'game_task_lag_seconds',
+    'Time a background task waited in the queue, by task.', 'task')
+DURATION = metrics.Histogram(
+    'game_task_duration_seconds',
+    'Time a background task ran for, retries included, by task.', 'task')
+
+Task = collections.namedtuple(
+    'Task', ['name', 'function', 'args', 'queued_at'])
+
+# Stops the worker it is queued to.
+_STOP = object()
+
+
+def _setting(name):
+    return getattr(settings, 'GAME_TASKS', {}).get(name, DEFAULTS[name])
+
+
+def is_enabled():
+    return _setting('ENABLED')
+
+
+class TaskRunner(object):
+    """Pool of worker threads, each running the tasks of its own queue.
+
+    Args:
+        workers: number of worker threads
+        max_queue_size: maximum number of tasks queued per worker
+        max_attempts: number of times a failing task is run in all
+        retry_seconds: seconds between two attempts of a failing task
+    """
+
+    def __init__(self, workers, max_queue_size, max_attempts, retry_seconds):
+        self._queues = [queue.Queue(max_queue_size) for _ in range(workers)]
+        self._max_attempts = max_attempts
+        self._retry_seconds = retry_seconds
+        self._next_queue = itertools.count()
+        self._stopping = False
+        self._threads = []
+
+    def start(self):
+        for index, tasks in enumerate(self._queues):
+            thread = threading.Thread(
+                target=self._run, args=(tasks,),
+                name='game-tasks-{}'.format(index), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def __len__(self):
+        """Returns the number of queued tasks."""
+        return sum(tasks.qsize() for tasks in self._queues)
+
+    def submit(self, name, function, *args, key=None):
+        """Queues function(*args), waiting for room if the queue is full.
+
+        The function is called by the caller once the runner is stopped.
+
+        Args:
+            name: name of the task, labelling its metrics
+            function: callable run by a worker
+            args: positional arguments of the function
+            key: string key, e.g. the game id, whose tasks run in order;
+                the tasks without a key are spread over the workers
+        """
+        task = Task(name, function, args, time.monotonic())
+        if key is None:
+            index = next(self._next_queue)
+        else:
+            index = zlib.crc32(key.encode('utf-8'))
+        if self._stopping:
+            self._execute(task)
+            return
+        tasks = self._queues[index % len(self._queues)]
+        try:
+            tasks.put_nowait(task)
+        except queue.Full:
+            QUEUE_FULL.inc(name)
+            logging.warning(
+                'Waiting for room in the queue of task {}.'.format(name))
+            tasks.put(task)
+
+    def stop(self, timeout=None):
+        """Runs the queued tasks, and stops the workers.
+
+        Returns:
+            False if some tasks were still queued when the timeout expired
+        """
+        self._stopping = True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for tasks in self._queues:
+            try:
+                tasks.put(_STOP, timeout=self._remaining(deadline))
+            except queue.Full:
+                pass
+        for thread in self._threads:
+            thread.join(self._remaining(deadline))
+        dropped = sum(task is not _STOP for tasks in self._queues
+                      for task in list(tasks.queue))
+        if dropped:
+            TASKS.inc('dropped', dropped)
+            logging.error('Dropped {} queued tasks on exit.'.format(dropped))
+        return not any(thread.is_alive() for thread in self._threads)
+
+    @staticmethod
+    def _remaining(deadline):
+        if deadline is None:
+            return None
+        return max(0, deadline - time.monotonic())
+
+    def _run(self, tasks):
+        try:
+            while True:
+                task = tasks.get()
+                if task is _STOP:
+                    return
+                LAG.observe(time.monotonic() - task.queued_at, task.name)
+                self._execute(task)
+        finally:
+            db.connection.close()
+
+    def _execute(self, task):
+        start = time.perf_counter()
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                task.function(*task.args)
+                TASKS.inc('succeeded')
+                break
+            except Exception:
+                if attempt == self._max_attempts:
+                    TASKS.inc('failed')
+                    logging.exception('Task {} failed {} times.'.format(
+                        task.name, attempt))
+                    break
+                TASKS.inc('retried')
+                logging.warning('Task {} failed; retrying.'.format(
+                    task.name), exc_info=True)
+                # The connection might be broken.
+                db.connection.close()
+                time.sleep(self._retry_seconds)
+        DURATION.observe(time.perf_counter() - start, task.name)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """Returns the runner of the process, started on the first task."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                runner = TaskRunner(
+                    _setting('WORKERS'), _setting('MAX_QUEUE_SIZE'),
+                    _setting('MAX_ATTEMPTS'), _setting('RETRY_SECONDS'))
+                runner.start()
+                atexit.register(runner.stop, _setting('DRAIN_SECONDS'))
+                _runner = runner
+    return _runner
+
+
+def on_commit(name, function, *args, key=None):
+    """Runs function(*args) once the current transaction is committed.
+
+    The function is queued to the runner if GAME_TASKS is enabled, and
+    called by the committing thread otherwise.
+
+    Args:
+        name: name of the task, labelling its metrics
+        function: callable run after the commit
+        args: positional arguments of the function
+        key: string key, e.g. the game id, whose tasks run in order
+    """
+    if is_enabled():
+        transaction.on_commit(lambda: get_runner().submit(
+            name, function, *args, key=key))
+    else:
+        transaction.on_commit(functools.partial(function, *args))
+
+
+def shutdown(timeout=None):
+    """Runs the queued tasks and stops the runner, e.g. in tests."""
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        atexit.unregister(runner.stop)
+        runner.stop(timeout)
+
+
+metrics.CallbackMetric(
+    'game_task_queue_depth', 'Number of background tasks queued.', 'gauge',
+    None, lambda: len(_runner) if _runner is not None else 0)
@@ -0,0 +1,206 @@
+"""Encapsulates the in-process rate limiting and load shedding of requests.
+
+Two mechanisms protect the single SQLite writer from a misbehaving lane
+controller:
+
+1. token bucket throttles, keyed by client and by game id, which reject the
+   requests above the configured rate with a 429 error.
+2. a concurrency limiter, which rejects the writes with a 503 error once the
+   number of writes in progress passes a threshold.
+
+Both are configured in the settings, and are disabled unless configured:
+
+    GAME_RATE_LIMITS = {
+        'client': {'RATE': 20, 'BURST': 40, 'MAX_KEYS': 10000},
+        'game': {'RATE': 2, 'BURST': 12, 'MAX_KEYS': 10000},
+    }
+    GAME_MAX_PENDING_WRITES = 32
+"""
+import collections
+import json
+import math
+import threading
+import time
+
+from django import http
+from django.conf import settings
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+from game import metrics
+
+DEFAULT_MAX_KEYS = 10000
+
+WRITE_METHODS = frozenset(['POST', 'PUT', 'PATCH', 'DELETE'])
+
+_counter_lock = threading.Lock()
+_rejected = collections.Counter()
+
+
+def record_rejection(reason):
+    """Increments the number of requests rejected for the given reason."""
+    with _counter_lock:
+        _rejected[reason] += 1
+
+
+def rejected_counts():
+    """Returns the number of rejected requests per reason."""
+    with _counter_lock:
+        return dict(_rejected)
+
+
+metrics.CallbackMetric(
+    'game_rejected_requests_total', 'Number of requests rejected, by reason.',
+    'counter', 'reason', rejected_counts)
+
+
+class TokenBucketStore(object):
+    """Token buckets for a bounded number of keys.
+
+    Every key owns a bucket holding up to ``burst`` tokens, which is refilled
+    at ``rate`` tokens per second. Once more than ``max_keys`` keys are
+    tracked, the least recently used key is evicted; an evicted key starts
+    again with a full bucket, which is what it would have after being idle.
+    """
+
+    def __init__(self, rate, burst, max_keys=DEFAULT_MAX_KEYS):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # Maps key to [tokens, time of last update].
+        self._buckets = collections.OrderedDict()
+
+    def consume(self, key, now=None):
+        """Takes a token from the bucket of the key.
+
+        Returns:
+            0 if a token was available, or else the number of seconds until
+            the next token is available
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            if bucket is None:
+                bucket = [self.burst, now]
+            else:
+                bucket[0] = min(
+                    self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0
+            return (1 - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(scope):
+    """Returns the token bucket store of the scope, or None if disabled."""
+    config = getattr(settings, 'GAME_RATE_LIMITS', {}).get(scope)
+    if not config:
+        return None
+    key = (scope, config['RATE'], config['BURST'],
+           config.get('MAX_KEYS', DEFAULT_MAX_KEYS))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(key, TokenBucketStore(*key[1:]))
+    return store
+
+
+class TokenBucketThrottle(throttling.BaseThrottle):
+    """Base class of the throttles backed by a token bucket store."""
+    scope = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        store = get_store(self.scope)
+        key = self.get_key(request, view)
+        if store is None or key is None:
+            return True
+        self._wait = store.consume(key)
+        if self._wait:
+            record_rejection(self.scope)
+            return False
+        return True
+
+    def wait(self):
+        return self._wait
+
+
+class ClientRateThrottle(TokenBucketThrottle):
+    """Limits the request rate of every client.
+
+    The client is the peer address, unless REST_FRAMEWORK['NUM_PROXIES']
+    tells how many proxies in front of the server append to the
+    X-Forwarded-For header; the client sets it freely otherwise.
+    """
+    scope = 'client'
+
+    def get_key(self, request, view):
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get('REMOTE_ADDR')
+        return self.get_ident(request)
+
+
+class GameRateThrottle(TokenBucketThrottle):
+    """Limits the request rate for every game."""
+    scope = 'game'
+
+    def get_key(self, request, view):
+        return view.kwargs.get('game_id')
+
+
+class WriteConcurrencyMiddleware(object):
+    """Sheds writes once too many of them are in progress in the process.
+
+    Writes beyond the ``GAME_MAX_PENDING_WRITES`` setting are rejected with a
+    503 error and a Retry-After header, instead of queueing for the database
+    lock.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self._lock = threading.Lock()
+        self.pending_writes = 0
+
+    def __call__(self, request):
+        max_pending_writes = getattr(settings, 'GAME_MAX_PENDING_WRITES', None)
+        if max_pending_writes is None or request.method not in WRITE_METHODS:
+            return self.get_response(request)
+        with self._lock:
+            if self.pending_writes >= max_pending_writes:
+                rejected = True
+            else:
+                rejected = False
+                self.pending_writes += 1
+        if rejected:
+            record_rejection('concurrency')
+            return self._service_unavailable()
+        try:
+            return self.get_response(request)
+        finally:
+            with self._lock:
+                self.pending_writes -= 1
+
+    def _service_unavailable(self):
+        retry_after = getattr(settings, 'GAME_RETRY_AFTER_SECONDS', 1)
+        response = http.HttpResponse(
+            json.dumps({'errors': [{
+                'error_code': 503,
+                'error_message': 'Too many scores are being saved. '
+                                 'Retry in {} seconds.'.format(retry_after)}]}),
+            content_type='application/json', status=503)
+        response['Retry-After'] = str(int(math.ceil(retry_after)))
+        return response
@@ -0,0 +1,231 @@
+"""Encapsulates the lightweight tracing of the service layer.
+
+A trace is started by ``trace()`` and made of nested spans started by
+``span()``; each span records its duration, its attributes and the number of
+SQL queries executed while it was open:
+
+    with tracing.trace('set_score', game_id=game_id):
+        with tracing.span('game_lookup', game_id=game_id):
+            ...
+
+The decision to sample a trace is taken once, when it starts, so that a trace
+is either recorded completely or not at all. Spans outside of a sampled trace
+cost a single lookup. Sampled traces are handed to the configured exporter
+when they end; JsonFileExporter appends them to PATH, which defaults to
+DEFAULT_PATH in the temporary directory:
+
+    GAME_TRACING = {
+        'EXPORTER': 'game.tracing.JsonFileExporter',
+        'SAMPLE_RATE': 0.01,
+        'PATH': '/var/log/bowling_game/traces.jsonl',
+    }
+"""
+import contextlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django import db
+from django.conf import settings
+from django.utils import module_loading
+
+DEFAULT_SAMPLE_RATE = 0.01
+DEFAULT_PATH = os.path.join(
+    tempfile.gettempdir(), 'bowling_game-traces.jsonl')
+
+_local = threading.local()
+
+# Marks the thread as running a trace that was not sampled.
+_UNSAMPLED = object()
+
+
+def _setting(name, default=None):
+    return getattr(settings, 'GAME_TRACING', {}).get(name, default)
+
+
+def _new_id():
+    return '{:016x}'.format(random.getrandbits(64))
+
+
+class Exporter(object):
+    """Base class of the exporters of the sampled traces.
+
+    Args:
+        options: the GAME_TRACING setting
+    """
+
+    def __init__(self, options):
+        self.options = options
+
+    def export(self, spans):
+        """Exports the spans of a trace, as dictionaries."""
+        raise NotImplementedError('.export() must be overridden')
+
+
+class JsonFileExporter(Exporter):
+    """Appends every span to a file as a line of JSON."""
+
+    def __init__(self, options):
+        super(JsonFileExporter, self).__init__(options)
+        self.path = options.get('PATH', DEFAULT_PATH)
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(span) + '\n' for span in spans)
+        with self._lock:
+            with open(self.path, 'a') as trace_file:
+                trace_file.write(lines)
+
+
+class InMemoryExporter(Exporter):
+    """Keeps the spans in memory; used by the tests."""
+
+    def __init__(self, options):
+        super(InMemoryExporter, self).__init__(options)
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def get_exporter():
+    """Returns the configured exporter, or None if tracing is disabled."""
+    options = getattr(settings, 'GAME_TRACING', {})
+    if not options.get('EXPORTER'):
+        return None
+    key = tuple(sorted(options.items()))
+    exporter = _exporters.get(key)
+    if exporter is None:
+        with _exporters_lock:
+            exporter = _exporters.get(key)
+            if exporter is None:
+                exporter = _exporters[key] = module_loading.import_string(
+                    options['EXPORTER'])(options)
+    return exporter
+
+
+class _NoopSpan(object):
+    """Span returned outside of a sampled trace."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span(object):
+    """A timed operation within a trace."""
+
+    def __init__(self, trace, name, attributes):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+        self.span_id = _new_id()
+        self.parent_id = None
+        self.query_count = 0
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        stack = self.trace.stack
+        self.parent_id = stack[-1].span_id if stack else None
+        stack.append(self)
+        self.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self._start
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.trace.stack.pop()
+        self.trace.finished.append(self)
+        return False
+
+    def to_dict(self):
+        attributes = dict(self.attributes, query_count=self.query_count)
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration': self.duration,
+            'attributes': attributes,
+        }
+
+
+class Trace(object):
+    """The spans of a sampled trace."""
+
+    def __init__(self):
+        self.trace_id = _new_id()
+        self.stack = []
+        self.finished = []
+
+    def __call__(self, execute, sql, params, many, context):
+        """Counts the query in every open span; installed as execute wrapper.
+        """
+        for open_span in self.stack:
+            open_span.query_count += 1
+        return execute(sql, params, many, context)
+
+
+def span(name, **attributes):
+    """Returns a span nested in the current trace.
+
+    The span does nothing unless a sampled trace is in progress in the thread.
+    """
+    current = getattr(_local, 'trace', None)
+    if current is None or current is _UNSAMPLED:
+        return _NOOP_SPAN
+    return Span(current, name, attributes)
+
+
+@contextlib.contextmanager
+def trace(name, **attributes):
+    """Starts a trace, or a span if a trace is already in progress."""
+    if getattr(_local, 'trace', None) is not None:
+        with span(name, **attributes) as nested_span:
+            yield nested_span
+        return
+    exporter = get_exporter()
+    if (exporter is None or
+            random.random() >= _setting('SAMPLE_RATE', DEFAULT_SAMPLE_RATE)):
+        _local.trace = _UNSAMPLED
+        try:
+            yield _NOOP_SPAN
+        finally:
+            _local.trace = None
+        return
+    current = _local.trace = Trace()
+    try:
+        with contextlib.ExitStack() as stack:
+            for connection in db.connections.all():
+                stack.enter_context(connection.execute_wrapper(current))
+            with Span(current, name, attributes) as root_span:
+                yield root_span
+    finally:
+        _local.trace = None
+        try:
+            exporter.export([finished.to_dict()
+                             for finished in current.finished])
+        except Exception:
+            logging.exception('Unable to export trace {}.'.format(
+                current.trace_id))
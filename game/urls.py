@@ -3,11 +3,44 @@ from django.conf.urls import url
 from game import viewset
 
 urlpatterns = format_suffix_patterns([
+    url(r'^game$',
+        viewset.BowlingViewSet.as_view({'get': 'list_games'}),
+        name='list-games'),
     url(r'^game/register$',
         viewset.BowlingViewSet.as_view({'post': 'register_game'}),
         name='register-game'),
+    url(r'^game/register/batch$',
+        viewset.BowlingViewSet.as_view({'post': 'register_games'}),
+        name='register-games'),
+    url(r'^game/scores$',
+        viewset.ScoreViewSet.as_view({'get': 'get_scores'}),
+        name='get-scores'),
     url(r'^game/(?P<game_id>[A-Za-z0-9\-]+)/score/(?P<score>X-X-X|X-X-[0-9]|X-[0-9]/|X-[0-9]-[0-9]|X{1}|[0-9]/X|[0-9]/[0-9]|[0-9]/|[0-9]-[0-9])$',      # NOQA: E501
         viewset.ScoreViewSet.as_view({'post': 'set_score'}), name='play-game'),
     url(r'^game/(?P<game_id>[A-Za-z0-9\-]+)/score$',
-        viewset.ScoreViewSet.as_view({'get': 'get_score'}), name='get-score')
+        viewset.ScoreViewSet.as_view({'get': 'get_score'}), name='get-score'),
+    url(r'^game/(?P<game_id>[A-Za-z0-9\-]+)/scorecard$',
+        viewset.ScoreViewSet.as_view({'get': 'get_scorecard'}),
+        name='get-scorecard'),
+    url(r'^game/(?P<game_id>[A-Za-z0-9\-]+)/events$',
+        viewset.ScoreEventViewSet.as_view({'get': 'stream_score'}),
+        name='score-events'),
+    url(r'^statistics$',
+        viewset.StatisticsViewSet.as_view({'get': 'get_statistics'}),
+        name='get-statistics'),
+    url(r'^throttling$',
+        viewset.ThrottlingViewSet.as_view({'get': 'get_rejections'}),
+        name='get-throttling'),
+    url(r'^metrics$',
+        viewset.MetricsViewSet.as_view({'get': 'get_metrics'}),
+        name='get-metrics'),
+    url(r'^profiles$',
+        viewset.ProfileViewSet.as_view({'get': 'list_profiles'}),
+        name='list-profiles'),
+    url(r'^profiles/(?P<profile_id>[0-9]+)$',
+        viewset.ProfileViewSet.as_view({'get': 'get_profile'}),
+        name='get-profile'),
+    url(r'^profiles/(?P<profile_id>[0-9]+)/download$',
+        viewset.ProfileViewSet.as_view({'get': 'download_profile'}),
+        name='download-profile')
 ])
@@ -2,55 +2,389 @@
 Encapsulates all the view sets required to play the bowling game.
 """
 
+import time
+
+from django import db
+from django import http
+from django.utils import dateparse
+
+from game import events
+from game import idempotency
+from game import listing
+from game import metrics
 from game import models
+from game import profiling
 from game import serializers
 from game import services as bowling_services
+from game import statistics as game_statistics
+from game import throttling
+from game import tracing
 
+from rest_framework import renderers
 from rest_framework import status
+from rest_framework import views
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import viewsets
 
 
 def serialized_object(serializer_class, obj, http_status):
-    serialized_instance = serializer_class(obj)
-    return Response(serialized_instance.data, status=http_status)
+    for error in obj.errors:
+        metrics.ERRORS.inc(str(error.error_code))
+    start = time.perf_counter()
+    with tracing.span('serialization', serializer=serializer_class.__name__):
+        data = serializer_class(obj).data
+    metrics.FUNCTION_DURATION.observe(
+        time.perf_counter() - start, 'serialization')
+    return Response(data, status=http_status)
+
+
+def _error_response(error_code, error_message):
+    metrics.ERRORS.inc(str(error_code))
+    error_object = models.Error(error_code=error_code,
+                                error_message=error_message)
+    return Response(
+        {'errors': [serializers.ErrorSerializer(error_object).data]},
+        status=error_code)
+
+
+def exception_handler(exc, context):
+    """Returns the REST framework errors in the format of the game errors."""
+    response = views.exception_handler(exc, context)
+    # Exceptions left unhandled are returned as a 500 error by Django.
+    metrics.ERRORS.inc(
+        str(response.status_code) if response is not None else '500')
+    if response is not None:
+        detail = response.data
+        if isinstance(detail, dict) and 'detail' in detail:
+            detail = detail['detail']
+        response.data = {'errors': [{'error_code': response.status_code,
+                                     'error_message': str(detail)}]}
+    return response
+
+
+def _date_params(request, response):
+    """Returns the start and end dates (YYYY-MM-DD) of the query parameters.
+
+    The invalid dates are added to the errors of the response.
+    """
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.query_params.get(name)
+        try:
+            dates[name] = (dateparse.parse_date(value)
+                           if value is not None else None)
+        except ValueError:
+            dates[name] = None
+        if value is not None and dates[name] is None:
+            response.add_error(models.Error(
+                error_code=400,
+                error_message='{}: {} is invalid.'.format(name, value)))
+    return dates
 
 
 class BowlingViewSet(viewsets.ModelViewSet):
     queryset = models.GameRegistration.objects.all()
     serializer_class = serializers.GameRegistrationSerializer
 
+    def get_serializer_class(self):
+        if self.action == 'list_games':
+            return serializers.GamePageSerializer
+        return super(BowlingViewSet, self).get_serializer_class()
+
+    @action(detail=False)
+    def list_games(self, request):
+        """Lists the games, newest first, with their current scores.
+
+        The optional status (in_progress or completed), start and end
+        (YYYY-MM-DD) query parameters restrict the games listed; limit is the
+        number of games per page, and cursor the next_cursor of the previous
+        page.
+        """
+        response = models.GamePage()
+        dates = _date_params(request, response)
+        limit = request.query_params.get(
+            'limit', str(listing.DEFAULT_GAMES_PER_PAGE))
+        if not limit.isdigit():
+            response.add_error(models.Error(
+                error_code=400,
+                error_message='limit: {} is invalid.'.format(limit)))
+        if response.errors:
+            return serialized_object(self.get_serializer_class(), response,
+                                     status.HTTP_400_BAD_REQUEST)
+        response = listing.list_games(
+            models.ScorePerFrame.objects, request.query_params.get('status'),
+            cursor=request.query_params.get('cursor'), limit=int(limit),
+            **dates)
+        return serialized_object(
+            self.get_serializer_class(), response,
+            status.HTTP_400_BAD_REQUEST if response.errors else
+            status.HTTP_200_OK)
+
     @action(detail=True)
     def register_game(self, request, *args, **kwargs):
         """Registers the game."""
-        game_object = bowling_services.register_game()
+        game_object = bowling_services.register_game(
+            str(request.data.get('center', '')))
         return serialized_object(self.get_serializer_class(), game_object,
                                  status.HTTP_201_CREATED)
 
+    @action(detail=False)
+    def register_games(self, request, *args, **kwargs):
+        """Registers and scores complete games.
+
+        The body carries either a single game string in 'game', or a list of
+        them in 'games', and optionally the 'center' of the games.
+        """
+        game = request.data.get('game')
+        response = bowling_services.register_games(
+            [game] if game is not None else request.data.get('games'),
+            str(request.data.get('center', '')))
+        return serialized_object(
+            serializers.GameBatchSerializer, response,
+            status.HTTP_201_CREATED if not response.errors else
+            max(error.error_code for error in response.errors))
+
 
 class ScoreViewSet(viewsets.ModelViewSet):
     queryset = models.ScorePerFrame.objects.select_related('game')
 
+    def get_throttles(self):
+        if self.action == 'set_score':
+            return [throttling.ClientRateThrottle(),
+                    throttling.GameRateThrottle()]
+        return super(ScoreViewSet, self).get_throttles()
+
     def get_serializer_class(self):
         if self.action == 'get_score':
             return serializers.ScoreSerializer
+        elif self.action == 'get_scorecard':
+            return serializers.ScorecardSerializer
+        elif self.action == 'get_scores':
+            return serializers.GameScoresSerializer
         else:
             return serializers.ScorePerFrameSerializer
 
     @action(detail=True)
     def set_score(self, request, game_id, score):
-        """Sets the score of the given frame."""
-        response = bowling_services.set_frame_score(
-            self.get_queryset(), game_id, score)
-        return serialized_object(self.get_serializer_class(), response,
-                                 status.HTTP_200_OK)
+        """Sets the score of the given frame.
+
+        A request carrying an Idempotency-Key header that was already
+        processed gets the original response, and the frame is not recorded
+        again.
+        """
+        key = request.META.get(idempotency.HEADER)
+        if key is None:
+            return self._set_score(game_id, score)
+        try:
+            replay = idempotency.claim(game_id, key, score)
+        except idempotency.IdempotencyError as e:
+            return _error_response(e.error_code, e.error_message)
+        if replay is not None:
+            response = Response(replay.data, status=replay.status_code)
+            response[idempotency.REPLAYED_HEADER] = 'true'
+            return response
+        try:
+            response = self._set_score(game_id, score)
+        except Exception:
+            idempotency.release(game_id, key)
+            raise
+        if response.status_code >= 500 or any(
+                error['error_code'] >= 500
+                for error in response.data.get('errors', ())):
+            idempotency.release(game_id, key)
+        else:
+            idempotency.complete(game_id, key, score, response.status_code,
+                                 response.data)
+        return response
+
+    def _set_score(self, game_id, score):
+        with tracing.trace('set_score', game_id=game_id, score=score):
+            response = bowling_services.set_frame_score(
+                self.get_queryset(), game_id, score)
+            return serialized_object(self.get_serializer_class(), response,
+                                     status.HTTP_200_OK)
 
     @action(detail=True)
     def get_score(self, request, game_id):
         """Returns the total score by the latest frame."""
         response = bowling_services.get_frame_score(
             self.get_queryset(), game_id)
-        clazz = self.get_serializer_class()
-        serializer_instance = clazz(response)
-        return Response(serializer_instance.data, status=status.HTTP_200_OK)
+        return serialized_object(self.get_serializer_class(), response,
+                                 status.HTTP_200_OK)
+
+    @action(detail=False)
+    def get_scores(self, request):
+        """Returns the total scores of the comma separated game_ids."""
+        game_ids = [game_id for game_id in request.query_params.get(
+            'game_ids', '').split(',') if game_id]
+        response = bowling_services.get_frame_scores(
+            self.get_queryset(), game_ids)
+        return serialized_object(
+            self.get_serializer_class(), response,
+            status.HTTP_400_BAD_REQUEST if response.errors else
+            status.HTTP_200_OK)
+
+    @action(detail=True)
+    def get_scorecard(self, request, game_id):
+        """Returns every frame played so far with the running total."""
+        since_frame = request.query_params.get('since_frame')
+        if since_frame is not None and not since_frame.isdigit():
+            response = models.Scorecard(game_id)
+            response.add_error(models.Error(
+                error_code=400,
+                error_message='since_frame: {} is invalid.'.format(
+                    since_frame)))
+            return serialized_object(self.get_serializer_class(), response,
+                                     status.HTTP_400_BAD_REQUEST)
+        response = bowling_services.get_scorecard(
+            self.get_queryset(), game_id,
+            int(since_frame) if since_frame is not None else None)
+        return serialized_object(self.get_serializer_class(), response,
+                                 status.HTTP_200_OK)
+
+
+class ScoreEventViewSet(viewsets.GenericViewSet):
+    queryset = models.ScorePerFrame.objects.select_related('game')
+    serializer_class = serializers.ScorecardSerializer
+    renderer_classes = (renderers.JSONRenderer, events.EventStreamRenderer)
+
+    @action(detail=True)
+    def stream_score(self, request, game_id):
+        """Streams the frames of the game as Server-Sent Events.
+
+        The first event carries the frames saved so far, or only the frames
+        after the one in the Last-Event-ID header if the client is resuming.
+        Every frame scored afterwards is sent as soon as it is committed.
+        """
+        last_event_id = request.META.get('HTTP_LAST_EVENT_ID', '')
+        # Subscribe before reading the frames, so that no frame committed in
+        # the meantime is missed.
+        subscription = events.hub.subscribe(game_id)
+        scorecard = bowling_services.get_scorecard(
+            self.get_queryset(), game_id,
+            int(last_event_id) if last_event_id.isdigit() else None)
+        if scorecard.errors:
+            events.hub.unsubscribe(subscription)
+            return serialized_object(self.get_serializer_class(), scorecard,
+                                     status.HTTP_404_NOT_FOUND)
+        initial_events = []
+        if scorecard.frames:
+            initial_events.append(events.scorecard_event(
+                scorecard.frames[-1].frame, scorecard))
+        if not db.connection.in_atomic_block:
+            # The stream only waits for the frames published by the requests
+            # scoring them: it does not hold a database connection meanwhile.
+            db.connection.close()
+        response = http.StreamingHttpResponse(
+            events.event_stream(subscription, initial_events),
+            content_type=events.EventStreamRenderer.media_type)
+        response['Cache-Control'] = 'no-cache'
+        # Disables response buffering in nginx.
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+
+class StatisticsViewSet(viewsets.GenericViewSet):
+    queryset = models.DailyStatistics.objects.all()
+    serializer_class = serializers.StatisticsSerializer
+
+    @action(detail=False)
+    def get_statistics(self, request):
+        """Returns the daily statistics of the centers.
+
+        The optional center, start and end query parameters restrict the
+        statistics to a center and to a range of days (YYYY-MM-DD).
+        """
+        response = models.Statistics()
+        dates = _date_params(request, response)
+        if response.errors:
+            return serialized_object(self.get_serializer_class(), response,
+                                     status.HTTP_400_BAD_REQUEST)
+        response = game_statistics.get_statistics(
+            request.query_params.get('center'), **dates)
+        return serialized_object(self.get_serializer_class(), response,
+                                 status.HTTP_200_OK)
+
+
+class ThrottlingViewSet(viewsets.ViewSet):
+
+    @action(detail=False)
+    def get_rejections(self, request):
+        """Returns the number of requests rejected per reason."""
+        return Response({'rejected': throttling.rejected_counts()},
+                        status=status.HTTP_200_OK)
+
+
+class MetricsViewSet(viewsets.ViewSet):
+
+    @action(detail=False)
+    def get_metrics(self, request):
+        """Returns the metrics in the Prometheus text format."""
+        return http.HttpResponse(metrics.registry.render(),
+                                 content_type=metrics.CONTENT_TYPE)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """Lists and downloads the profiles captured by ProfilingMiddleware.
+
+    The requests must carry the profiling token, like the profiled requests.
+    """
+
+    def _forbidden(self, request):
+        if not profiling.is_enabled():
+            return _error_response(404, 'Profiling is disabled.')
+        if not profiling.is_authorized(request):
+            return _error_response(403, 'Forbidden from reading profiles.')
+        return None
+
+    def _get_profile(self, profile_id):
+        profile = profiling.profiles.get(int(profile_id))
+        if profile is None:
+            return None, _error_response(
+                404, 'No profile was found for the id: {}.'.format(
+                    profile_id))
+        return profile, None
+
+    @action(detail=False)
+    def list_profiles(self, request):
+        """Returns the summaries of the captured profiles, newest first."""
+        error_response = self._forbidden(request)
+        if error_response is not None:
+            return error_response
+        return Response(
+            {'profiles': [profile.summary()
+                          for profile in profiling.profiles.all()]},
+            status=status.HTTP_200_OK)
+
+    @action(detail=True)
+    def get_profile(self, request, profile_id):
+        """Returns the top functions and the queries of a profile."""
+        error_response = self._forbidden(request)
+        if error_response is not None:
+            return error_response
+        profile, error_response = self._get_profile(profile_id)
+        if error_response is not None:
+            return error_response
+        return Response(profile.details(), status=status.HTTP_200_OK)
+
+    @action(detail=True)
+    def download_profile(self, request, profile_id):
+        """Downloads the raw profile.
+
+        cProfile profiles are marshalled pstats that can be loaded with
+        ``pstats.Stats(path)`` or snakeviz; pyinstrument profiles are text.
+        """
+        error_response = self._forbidden(request)
+        if error_response is not None:
+            return error_response
+        profile, error_response = self._get_profile(profile_id)
+        if error_response is not None:
+            return error_response
+        extension = 'prof' if profile.profiler == 'cprofile' else 'txt'
+        response = http.HttpResponse(
+            profile.report, content_type='application/octet-stream')
+        response['Content-Disposition'] = (
+            'attachment; filename="profile-{}.{}"'.format(
+                profile.profile_id, extension))
+        return response
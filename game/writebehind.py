@@ -0,0 +1,300 @@
+"""Encapsulates the write-behind queue of the frames, with group commit.
+
+Every frame saved by its own transaction pays for the fsyncs of the
+database. With the write-behind path, a frame is validated and scored in
+memory, appended to a local journal, and acknowledged once the journal is
+synced. A single writer thread then commits the queued frames in batches,
+one transaction per batch:
+
+1. the journal is synced once for all the requests waiting on it.
+2. the writer takes up to BATCH_SIZE frames at a time, after waiting
+   LINGER_SECONDS for a burst of frames to queue up.
+3. a batch that fails to commit is retried, up to MAX_ATTEMPTS times in
+   all; a batch failing every time is appended to the dead letters at
+   DEAD_LETTER_PATH, to be investigated and replayed by hand, so that it
+   does not hold back the frames queued after it. The frames of every batch
+   committed or dead-lettered are dropped from the journal.
+4. when the process starts, the frames left in the journal by a crash are
+   committed before any request is served; see
+   game.queued_frames.start_on_startup.
+
+The reads of a game wait for its queued frames to be committed, for at most
+READ_TIMEOUT_SECONDS. The queue and the journal belong to the process, so
+that a single process must save the frames of a game:
+
+    GAME_WRITE_BEHIND = {
+        'ENABLED': True,
+        'JOURNAL_PATH': '/var/lib/bowling_game/frames.journal',
+        'BATCH_SIZE': 100,
+        'LINGER_SECONDS': 0.002,
+        'READ_TIMEOUT_SECONDS': 5,
+        'MAX_ATTEMPTS': 10,
+        'DEAD_LETTER_PATH': '/var/lib/bowling_game/frames.dead_letters',
+    }
+"""
+import atexit
+import collections
+import itertools
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from django import db
+from django.conf import settings
+
+from game import journal
+from game import metrics
+
+DEFAULTS = {
+    'ENABLED': False,
+    'JOURNAL_PATH': os.path.join(
+        tempfile.gettempdir(), 'bowling_game-frames.journal'),
+    'BATCH_SIZE': 100,
+    'LINGER_SECONDS': 0.002,
+    'READ_TIMEOUT_SECONDS': 5,
+    'MAX_ATTEMPTS': 10,
+    'DEAD_LETTER_PATH': os.path.join(
+        tempfile.gettempdir(), 'bowling_game-frames.dead_letters'),
+}
+
+# Seconds between the attempts to commit a batch that failed.
+RETRY_SECONDS = 1
+
+# Seconds the process waits on exit for the queued frames to be committed.
+DRAIN_SECONDS = 10
+
+BATCH_SIZES = metrics.Histogram(
+    'game_write_behind_batch_size', 'Number of frames committed per batch.',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+COMMIT_FAILURES = metrics.Counter(
+    'game_write_behind_commit_failures_total',
+    'Number of batches of frames that failed to commit.')
+DEAD_LETTERS = metrics.Counter(
+    'game_write_behind_dead_letters_total',
+    'Number of frames dead-lettered after failing to commit.')
+
+Item = collections.namedtuple('Item', ['sequence', 'key', 'record'])
+
+
+def _setting(name):
+    return getattr(settings, 'GAME_WRITE_BEHIND', {}).get(
+        name, DEFAULTS[name])
+
+
+def is_enabled():
+    return _setting('ENABLED')
+
+
+class WriteBehindQueue(object):
+    """Queue of the journaled records, committed by a single writer thread.
+
+    Args:
+        journal_file: Journal the records are written to
+        commit: callable committing a list of records in one transaction
+        batch_size: maximum number of records per commit
+        linger_seconds: seconds the writer waits for a batch to fill up
+        max_attempts: number of times a failing batch is committed in all
+        dead_letter_path: path of the journal the failed batches are
+            appended to
+    """
+
+    def __init__(self, journal_file, commit, batch_size, linger_seconds,
+                 max_attempts, dead_letter_path):
+        self._journal = journal_file
+        self._commit = commit
+        self._batch_size = batch_size
+        self._linger_seconds = linger_seconds
+        self._max_attempts = max_attempts
+        self._dead_letter_path = dead_letter_path
+        self._condition = threading.Condition()
+        # Records not committed yet, in the order of the journal.
+        self._items = collections.deque()
+        self._pending = collections.Counter()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='game-write-behind', daemon=True)
+        self._thread.start()
+
+    def submit(self, key, record):
+        """Journals and queues the record, and returns once it is durable.
+
+        The callers must serialize the records of the same key.
+        """
+        with self._condition:
+            sequence = self._journal.write(record)
+            self._items.append(Item(sequence, key, record))
+            self._pending[key] += 1
+            self._condition.notify_all()
+        self._journal.sync(sequence)
+        return sequence
+
+    def pending(self, key):
+        """Returns the records of the key not committed yet, in order."""
+        with self._condition:
+            if not self._pending[key]:
+                return []
+            return [item.record for item in self._items if item.key == key]
+
+    def __len__(self):
+        with self._condition:
+            return len(self._items)
+
+    def wait(self, key, timeout=None):
+        """Waits for the records of the key to be committed.
+
+        The writer thread does not wait, e.g. for the scorecard published
+        once its batch is committed: only it commits the records.
+
+        Returns:
+            False if the timeout expired first
+        """
+        if threading.current_thread() is self._thread:
+            return True
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending[key], timeout)
+
+    def flush(self, timeout=None):
+        """Waits for every queued record to be committed."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._items, timeout)
+
+    def stop(self, timeout=None):
+        """Commits the queued records, and stops the writer thread."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            while self._commit_next_batch():
+                pass
+        finally:
+            db.connection.close()
+
+    def _commit_next_batch(self):
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._items or self._stopping)
+            if not self._items:
+                return False
+            is_full = len(self._items) >= self._batch_size
+        if not is_full and self._linger_seconds:
+            time.sleep(self._linger_seconds)
+        with self._condition:
+            batch = list(itertools.islice(self._items, self._batch_size))
+        self._journal.sync(batch[-1].sequence)
+        self._commit_with_retry([item.record for item in batch])
+        BATCH_SIZES.observe(len(batch))
+        with self._condition:
+            for item in batch:
+                self._items.popleft()
+                self._pending[item.key] -= 1
+                if not self._pending[item.key]:
+                    del self._pending[item.key]
+            self._condition.notify_all()
+        self._journal.truncate(batch[-1].sequence)
+        return True
+
+    def _commit_with_retry(self, records):
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                self._commit(records)
+                return
+            except Exception:
+                COMMIT_FAILURES.inc()
+                # The connection might be broken.
+                db.connection.close()
+                if attempt == self._max_attempts:
+                    logging.exception(
+                        'Unable to commit {} frames {} times; appending them '
+                        'to {}.'.format(len(records), attempt,
+                                        self._dead_letter_path))
+                    break
+                logging.exception(
+                    'Unable to commit {} frames; retrying.'.format(
+                        len(records)))
+                time.sleep(RETRY_SECONDS)
+        dead_letters = journal.Journal(self._dead_letter_path)
+        try:
+            for record in records:
+                sequence = dead_letters.write(record)
+            dead_letters.sync(sequence)
+        finally:
+            dead_letters.close()
+        DEAD_LETTERS.inc(amount=len(records))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue(commit):
+    """Returns the queue of the process, started on the first call.
+
+    The records left in the journal by a crash are committed first.
+
+    Args:
+        commit: callable committing a list of records in one transaction
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = _start(commit)
+    return _queue
+
+
+def _start(commit):
+    path = _setting('JOURNAL_PATH')
+    batch_size = _setting('BATCH_SIZE')
+    records = journal.read(path)
+    for start in range(0, len(records), batch_size):
+        commit(records[start:start + batch_size])
+    if records:
+        logging.warning('Replayed {} frames from {}.'.format(
+            len(records), path))
+    journal_file = journal.Journal(path)
+    journal_file.truncate(0)
+    queue = WriteBehindQueue(
+        journal_file, commit, batch_size, _setting('LINGER_SECONDS'),
+        _setting('MAX_ATTEMPTS'), _setting('DEAD_LETTER_PATH'))
+    queue.start()
+    atexit.register(queue.stop, DRAIN_SECONDS)
+    return queue
+
+
+def wait(*keys):
+    """Waits for the queued records of the keys to be committed."""
+    queue = _queue
+    if queue is None:
+        return
+    timeout = _setting('READ_TIMEOUT_SECONDS')
+    for key in keys:
+        if not queue.wait(key, timeout):
+            logging.warning(
+                'Timed out waiting for the frames of {}.'.format(key))
+
+
+def shutdown():
+    """Commits the queued records and stops the queue, e.g. in tests."""
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.stop()
+        atexit.unregister(queue.stop)
+        queue._journal.close()
+
+
+metrics.CallbackMetric(
+    'game_write_behind_queue_depth',
+    'Number of frames acknowledged and not committed yet.', 'gauge', None,
+    lambda: len(_queue) if _queue is not None else 0)
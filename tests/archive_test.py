@@ -0,0 +1,135 @@
+"""Unit tests for the archive of the completed games."""
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+from django import test
+from django.utils import timezone
+
+from game import archive
+from game import models as game_models
+from game import retention
+from game import services
+
+
+def _game(game_id, final_score=300, rolls=(10,) * 12):
+    return archive.ArchivedGame(
+        game_id, datetime.datetime(2018, 7, 17, 13, 33, 1, 500,
+                                   tzinfo=datetime.timezone.utc),
+        rolls, final_score)
+
+
+class ArchiveTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'games.archive')
+        self.games = [_game('zzzzzzzzzzzzzzzz', 0, (0,) * 20),
+                      _game('aaaaaaaaaaaaaaaa'),
+                      _game('mmmmmmmmmmmmmmmm', 150, (5,) * 21)]
+        with archive.ArchiveWriter(self.path) as writer:
+            for game in self.games:
+                writer.append(game)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_archive__fixed_size_records(self):
+        assert archive.RECORD.size == 48
+        assert os.path.getsize(self.path) == archive.HEADER.size + 3 * 48
+        assert os.path.getsize(archive.index_path(self.path)) == (
+            3 * archive.INDEX_ENTRY.size)
+        assert not os.path.exists(self.path + '.tmp')
+
+    def test_archive__lookup_by_record_index(self):
+        with archive.ArchiveReader(self.path) as reader:
+            assert len(reader) == 3
+            assert [reader[index] for index in range(3)] == self.games
+            assert reader[-1] == self.games[-1]
+            assert list(reader) == self.games
+            with self.assertRaises(IndexError):
+                reader[3]
+
+    def test_archive__lookup_by_game_id(self):
+        with archive.ArchiveReader(self.path) as reader:
+            for game in self.games:
+                assert reader.find(game.game_id) == game
+            assert reader.find('bbbbbbbbbbbbbbbb') is None
+            assert reader.find('zzzzzzzzzzzzzzzzz') is None
+
+    def test_archive__records_memoryview(self):
+        reader = archive.ArchiveReader(self.path)
+        records = reader.records()
+        assert len(records) == 3 * archive.RECORD.size
+        assert archive.decode(records, archive.RECORD.size) == self.games[1]
+        records.release()
+        reader.close()
+
+    @unittest.skipIf(archive.numpy is None, 'NumPy is not installed.')
+    def test_archive__structured_array(self):
+        with archive.ArchiveReader(self.path) as reader:
+            records = reader.as_array()
+            assert list(records['final_score']) == [0, 300, 150]
+            assert records['game_id'][1] == b'aaaaaaaaaaaaaaaa'
+            assert list(records['rolls'][2]) == [5] * 21
+            del records
+
+    def test_archive__empty(self):
+        with archive.ArchiveWriter(self.path):
+            pass
+        with archive.ArchiveReader(self.path) as reader:
+            assert len(reader) == 0
+            assert reader.find('aaaaaaaaaaaaaaaa') is None
+
+    def test_archive__aborted_write_keeps_archive(self):
+        with self.assertRaises(ValueError):
+            with archive.ArchiveWriter(self.path) as writer:
+                writer.append(_game('bbbbbbbbbbbbbbbb', rolls=(1,) * 22))
+        with archive.ArchiveReader(self.path) as reader:
+            assert len(reader) == 3
+
+    def test_archive__invalid_file(self):
+        with open(self.path, 'wb') as invalid_file:
+            invalid_file.write(b'{"games": []}\n')
+        with self.assertRaises(archive.ArchiveError):
+            archive.ArchiveReader(self.path)
+
+
+class ArchiveGamesTest(test.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'games.archive')
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _play(self, scores, scoring_mode='eager'):
+        game_id = services.register_game().game_id
+        with test.override_settings(GAME_SCORING_MODE=scoring_mode):
+            for score in scores:
+                services.set_frame_score(self.queryset, game_id, score)
+        return game_id
+
+    def test_archive_games(self):
+        game_ids = [
+            self._play(['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/',
+                        '7/3']),
+            self._play(['X'] * 9 + ['X-X-X'], scoring_mode='lazy'),
+        ]
+        self._play(['X', '7/'])
+        assert retention.archive_games(self.path, batch_size=1) == 2
+        with archive.ArchiveReader(self.path) as reader:
+            assert [game.game_id for game in reader] == sorted(game_ids)
+            game = reader.find(game_ids[0])
+            assert game.rolls == (10, 7, 3, 7, 2, 9, 1, 10, 10, 10, 2, 3, 6,
+                                  4, 7, 3, 3)
+            assert game.final_score == 168
+            assert game.created_timestamp == (
+                game_models.GameRegistration.objects.get(
+                    pk=game_ids[0]).created_timestamp)
+            assert game.created_timestamp <= timezone.now()
+            assert reader.find(game_ids[1]).final_score == 300
@@ -0,0 +1,123 @@
+"""Unit tests for the Bloom filter of the registered game ids."""
+import time
+from unittest import mock
+
+from django import test
+
+from game import bloom
+from game import models as game_models
+from game import retention
+from game import services
+
+
+class BloomFilterTest(test.SimpleTestCase):
+
+    def test_bloom_filter__sized_for_error_rate(self):
+        bloom_filter = bloom.BloomFilter(10000, 0.01)
+        # About 9.6 bits and 7 hash functions per key.
+        assert bloom_filter.size == 95851
+        assert bloom_filter.hash_count == 7
+        assert bloom_filter.nbytes == 11982
+
+    def test_bloom_filter__no_false_negatives(self):
+        bloom_filter = bloom.BloomFilter(10000, 0.01)
+        keys = [game_models.random_string(16) for _ in range(10000)]
+        for key in keys:
+            bloom_filter.add(key)
+        assert len(bloom_filter) == 10000
+        assert all(key in bloom_filter for key in keys)
+
+    def test_bloom_filter__false_positive_rate(self):
+        bloom_filter = bloom.BloomFilter(10000, 0.01)
+        for _ in range(10000):
+            bloom_filter.add(game_models.random_string(16))
+        assert 0.009 < bloom_filter.false_positive_rate() < 0.011
+        false_positives = sum(game_models.random_string(15) in bloom_filter
+                              for _ in range(10000))
+        assert false_positives < 200
+
+    def test_bloom_filter__empty(self):
+        bloom_filter = bloom.BloomFilter(0, 0.01)
+        assert 'abcde12345' not in bloom_filter
+        assert bloom_filter.false_positive_rate() == 0.0
+
+
+@test.override_settings(GAME_BLOOM_FILTER={'ENABLED': True, 'CAPACITY': 1000,
+                                           'REBUILD_SECONDS': None})
+class GameIdFilterTest(test.TestCase):
+
+    def setUp(self):
+        bloom.game_ids.clear()
+        self.addCleanup(bloom.game_ids.clear)
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def test_might_exist__built_from_table(self):
+        game_ids = [game_models.GameRegistration.objects.create().game_id
+                    for _ in range(3)]
+        for game_id in game_ids:
+            assert bloom.might_exist(game_id)
+        assert bloom.game_ids.stats()['games'] == 3
+        assert bloom.game_ids.stats()['bytes'] == 1199
+
+    def test_get_frame_score__unknown_game_rejected_without_queries(self):
+        bloom.might_exist('abcde12345')
+        with self.assertNumQueries(0):
+            result = services.get_frame_score(self.queryset, 'abcde12345')
+        assert result.errors[0].error_code == 404
+        with self.assertNumQueries(0):
+            result = services.set_frame_score(
+                self.queryset, 'abcde12345', 'X')
+        assert result.errors[0].error_code == 404
+
+    def test_register_game__added(self):
+        bloom.might_exist('abcde12345')
+        game_id = services.register_game().game_id
+        with self.assertNumQueries(0):
+            assert bloom.might_exist(game_id)
+        games = services.register_games([' '.join(['9-0'] * 10)])
+        assert bloom.might_exist(games.games[0].game_id)
+        assert services.get_frame_score(
+            self.queryset, games.games[0].game_id).total_score == 90
+
+    def test_rebuild__drops_purged_games(self):
+        game_ids = [services.register_game().game_id for _ in range(2)]
+        assert bloom.game_ids.stats()['games'] == 0
+        assert bloom.might_exist(game_ids[0])
+        retention.purge_games(game_ids[:1])
+        assert bloom.might_exist(game_ids[0])
+        bloom.game_ids.rebuild()
+        assert not bloom.might_exist(game_ids[0])
+        assert bloom.might_exist(game_ids[1])
+        assert bloom.game_ids.stats()['games'] == 1
+
+    def test_disabled(self):
+        with test.override_settings(GAME_BLOOM_FILTER={}):
+            assert bloom.might_exist('abcde12345')
+            services.register_game()
+        assert bloom.game_ids.stats()['games'] == 0
+
+
+@test.override_settings(GAME_BLOOM_FILTER={'ENABLED': True, 'CAPACITY': 1000,
+                                           'REBUILD_SECONDS': None})
+class BuildOnStartupTest(test.TransactionTestCase):
+
+    def setUp(self):
+        bloom.game_ids.clear()
+        self.addCleanup(bloom.game_ids.clear)
+
+    def test_build_on_startup(self):
+        game_id = game_models.GameRegistration.objects.create().game_id
+        bloom.build_on_startup()
+        deadline = time.monotonic() + 5
+        while not bloom.game_ids.stats()['games']:
+            assert time.monotonic() < deadline, 'Timed out.'
+            time.sleep(0.001)
+        with self.assertNumQueries(0):
+            assert bloom.might_exist(game_id)
+            assert not bloom.might_exist('abcde12345')
+
+    def test_build_on_startup__disabled(self):
+        with test.override_settings(GAME_BLOOM_FILTER={}), \
+                mock.patch('threading.Thread') as thread:
+            bloom.build_on_startup()
+        assert not thread.called
@@ -0,0 +1,93 @@
+"""Unit tests for live score events."""
+from django import test
+
+from game import events
+from game import models as game_models
+from game import services
+
+
+class ScoreEventHubTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.hub = events.ScoreEventHub(max_queue_size=2)
+
+    def test_publish__subscribers_of_game_only(self):
+        subscription = self.hub.subscribe('abcde12345')
+        other_subscription = self.hub.subscribe('edcba54321')
+        self.hub.publish('abcde12345', events.Event(1, {'frame': 1}))
+        assert subscription.get(timeout=0) == events.Event(1, {'frame': 1})
+        assert self.hub.has_subscribers('edcba54321')
+        assert other_subscription._queue.empty()
+
+    def test_publish__slow_subscriber_dropped(self):
+        subscription = self.hub.subscribe('abcde12345')
+        for frame in range(1, 4):
+            self.hub.publish('abcde12345', events.Event(frame, {}))
+        assert subscription.dropped
+        assert subscription.get(timeout=0) is None
+        assert not self.hub.has_subscribers('abcde12345')
+        assert self.hub.dropped_count == 1
+
+    def test_unsubscribe(self):
+        subscription = self.hub.subscribe('abcde12345')
+        self.hub.unsubscribe(subscription)
+        assert self.hub.subscriber_count() == 0
+
+
+class EventStreamTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.subscription = events.hub.subscribe('abcde12345')
+
+    def tearDown(self):
+        events.hub.unsubscribe(self.subscription)
+
+    def test_event_stream__heartbeat(self):
+        stream = events.event_stream(self.subscription, heartbeat=0.01)
+        assert next(stream) == ': heartbeat\n\n'
+
+    def test_event_stream__initial_events_then_live_events(self):
+        stream = events.event_stream(
+            self.subscription, [events.Event(9, {'frame': 9})],
+            heartbeat=0.01)
+        # The event of frame 9 was already sent as an initial event.
+        events.hub.publish('abcde12345', events.Event(9, {'frame': 9}))
+        events.hub.publish('abcde12345', events.Event(10, {'frame': 10}))
+        assert list(stream) == [
+            'id: 9\nevent: frame\ndata: {"frame":9}\n\n',
+            'id: 10\nevent: frame\ndata: {"frame":10}\n\n']
+        assert not events.hub.has_subscribers('abcde12345')
+
+
+class PublishFrameTest(test.TransactionTestCase):
+
+    def setUp(self):
+        self.game_registration = game_models.GameRegistration.objects.create()
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        self.subscription = events.hub.subscribe(
+            self.game_registration.game_id)
+
+    def tearDown(self):
+        events.hub.unsubscribe(self.subscription)
+
+    def test_set_frame_score__published_after_commit(self):
+        for score in ('X', '7/'):
+            services.set_frame_score(
+                self.queryset, self.game_registration.game_id, score)
+        assert self.subscription.get(timeout=0).event_id == 1
+        event = self.subscription.get(timeout=0)
+        assert event.event_id == 2
+        assert event.data == {
+            'game_id': self.game_registration.game_id,
+            'frames': [
+                {'frame': 1, 'attempts': ['X'], 'frame_score': 20,
+                 'total_score_for_frame': 20, 'guaranteed_score': 10,
+                 'max_possible_score': 300},
+                {'frame': 2, 'attempts': ['7', '3'], 'frame_score': None,
+                 'total_score_for_frame': 20, 'guaranteed_score': 30,
+                 'max_possible_score': 280}]}
+
+    def test_set_frame_score__invalid_score_not_published(self):
+        services.set_frame_score(
+            self.queryset, self.game_registration.game_id, 'XX')
+        assert self.subscription._queue.empty()
@@ -0,0 +1,128 @@
+"""Unit tests for the cache of the game lookups."""
+import datetime
+from unittest import mock
+
+from django import test
+from django.core.cache import cache
+from django.utils import timezone
+
+from game import existence
+from game import models as game_models
+from game import retention
+from game import services
+
+EXISTENCE_CACHE = {'ENABLED': True, 'CACHE': 'default', 'TTL_SECONDS': 300,
+                   'NEGATIVE_TTL_SECONDS': 5}
+
+
+@test.override_settings(GAME_EXISTENCE_CACHE=EXISTENCE_CACHE)
+class ExistenceCacheTest(test.TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def test_get_frame_score__cached_game(self):
+        game_id = services.register_game('lanes-1').game_id
+        services.set_frame_score(self.queryset, game_id, '7-2')
+        game_object = existence.get(game_id)
+        assert game_object.game_id == game_id
+        assert game_object.center == 'lanes-1'
+        # Only the frames are read.
+        with self.assertNumQueries(1):
+            game = services.get_frame_score(self.queryset, game_id)
+        assert game.total_score == 9
+
+    def test_set_frame_score__cached_game(self):
+        game_id = services.register_game().game_id
+        services.set_frame_score(self.queryset, game_id, 'X')
+        services.set_frame_score(self.queryset, game_id, '7/')
+        services.set_frame_score(self.queryset, game_id, '7-2')
+        assert services.get_frame_score(
+            self.queryset, game_id).total_score == 46
+
+    def test_get_frame_score__unknown_game_cached_as_missing(self):
+        services.get_frame_score(self.queryset, 'abcde12345')
+        assert existence.get('abcde12345') == existence.MISSING
+        with self.assertNumQueries(0):
+            result = services.get_frame_score(self.queryset, 'abcde12345')
+        assert result.errors[0].error_code == 404
+
+    def test_register_game__invalidates_missing_entry(self):
+        with mock.patch.object(existence, 'invalidate',
+                               wraps=existence.invalidate) as invalidate:
+            game_object = services.register_game()
+        invalidate.assert_called_once_with(game_object.game_id)
+
+    def test_register_games__invalidates_missing_entries(self):
+        with mock.patch.object(existence, 'invalidate',
+                               wraps=existence.invalidate) as invalidate:
+            games = services.register_games(
+                [' '.join(['X'] * 9 + ['X-X-X']), ' '.join(['9-0'] * 10)])
+        invalidate.assert_called_once_with(
+            *[game.game_id for game in games.games])
+
+    def test_invalidate(self):
+        existence.set_missing('abcde12345')
+        existence.invalidate('abcde12345')
+        assert existence.get('abcde12345') is None
+
+    def test_purge_games__invalidates_cached_games(self):
+        game_ids = [services.register_game().game_id for _ in range(3)]
+        for game_id in game_ids:
+            services.get_frame_score(self.queryset, game_id)
+            assert existence.get(game_id) is not None
+        assert retention.purge_games(game_ids[:2]) == 2
+        assert existence.get(game_ids[2]) is not None
+        for game_id in game_ids[:2]:
+            assert existence.get(game_id) is None
+        result = services.get_frame_score(self.queryset, game_ids[0])
+        assert result.errors[0].error_code == 404
+
+    def test_purge_games__before(self):
+        old_game_id = services.register_game().game_id
+        game_models.GameRegistration.objects.filter(pk=old_game_id).update(
+            created_timestamp=timezone.now() - datetime.timedelta(days=30))
+        game_id = services.register_game().game_id
+        assert retention.purge_games(
+            before=timezone.now() - datetime.timedelta(days=1)) == 1
+        assert list(game_models.GameRegistration.objects.values_list(
+            'game_id', flat=True)) == [game_id]
+        assert retention.purge_games() == 0
+
+    def test_lazy_scoring__games_not_cached(self):
+        game_id = services.register_game().game_id
+        services.get_frame_score(self.queryset, game_id)
+        with test.override_settings(GAME_SCORING_MODE='lazy'):
+            assert existence.get(game_id) is None
+            services.set_frame_score(self.queryset, game_id, 'X')
+            services.get_frame_score(self.queryset, game_id)
+            assert existence.get(game_id) is None
+        assert existence.get(game_id) is None
+
+    def test_disabled(self):
+        with test.override_settings(GAME_EXISTENCE_CACHE={}):
+            services.get_frame_score(self.queryset, 'abcde12345')
+            assert existence.get('abcde12345') is None
+        assert existence.get('abcde12345') is None
+
+
+class CheckSharedCacheTest(test.SimpleTestCase):
+
+    def test_process_local_cache(self):
+        with test.override_settings(GAME_EXISTENCE_CACHE=EXISTENCE_CACHE):
+            [error] = existence.check_shared_cache(None)
+        assert error.id == 'game.E001'
+
+    def test_shared_cache(self):
+        with test.override_settings(
+                GAME_EXISTENCE_CACHE=EXISTENCE_CACHE,
+                CACHES={'default': {
+                    'BACKEND': (
+                        'django.core.cache.backends.memcached.'
+                        'MemcachedCache'),
+                    'LOCATION': '127.0.0.1:11211'}}):
+            assert existence.check_shared_cache(None) == []
+
+    def test_disabled(self):
+        assert existence.check_shared_cache(None) == []
@@ -0,0 +1,154 @@
+"""Unit tests for the idempotency keys of the scoring requests."""
+import datetime
+from unittest import mock
+
+from django import test as django_test
+from django import urls
+from django.core import management
+from django.utils import timezone
+from rest_framework import status
+from rest_framework import test
+
+from game import idempotency
+from game import models
+from game import tasks
+
+
+class SetScoreIdempotencyTest(test.APITestCase):
+
+    def setUp(self):
+        idempotency.cache.clear()
+        self.game_id = self.client.post(
+            urls.reverse('register-game')).json()['game_id']
+
+    def _set_score(self, score, key):
+        return self.client.post(
+            urls.reverse('play-game', args=(self.game_id, score)),
+            HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_set_score__replayed(self):
+        response = self._set_score('X', 'frame-1')
+        assert response.status_code == status.HTTP_200_OK
+        assert idempotency.REPLAYED_HEADER not in response
+        replay = self._set_score('X', 'frame-1')
+        assert replay.status_code == status.HTTP_200_OK
+        assert replay[idempotency.REPLAYED_HEADER] == 'true'
+        assert replay.json() == response.json()
+        assert models.ScorePerFrame.objects.filter(
+            game_id=self.game_id).count() == 1
+
+    def test_set_score__replayed_from_table(self):
+        response = self._set_score('X', 'frame-1')
+        idempotency.cache.clear()
+        with mock.patch('game.services.set_frame_score') as set_frame_score:
+            replay = self._set_score('X', 'frame-1')
+        assert not set_frame_score.called
+        assert replay.json() == response.json()
+
+    def test_set_score__replayed_from_cache_without_queries(self):
+        self._set_score('X', 'frame-1')
+        game_id, key = self.game_id, 'frame-1'
+        with self.assertNumQueries(0):
+            replay = idempotency.claim(game_id, key, 'X')
+        assert replay.status_code == status.HTTP_200_OK
+
+    def test_set_score__different_keys(self):
+        self._set_score('X', 'frame-1')
+        response = self._set_score('X', 'frame-2')
+        assert response.json()['frame'] == 2
+
+    def test_set_score__different_score(self):
+        self._set_score('X', 'frame-1')
+        response = self._set_score('7/', 'frame-1')
+        assert response.status_code == 422
+        assert response.json() == {'errors': [{
+            'error_code': 422,
+            'error_message':
+                'Idempotency-Key: frame-1 was used for score: X.'}]}
+
+    def test_set_score__in_progress(self):
+        models.IdempotencyRecord.objects.create(
+            game_id=self.game_id, idempotency_key='frame-1', score='X')
+        response = self._set_score('X', 'frame-1')
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert not models.ScorePerFrame.objects.filter(
+            game_id=self.game_id).exists()
+
+    def test_set_score__abandoned_claim_taken_over(self):
+        models.IdempotencyRecord.objects.create(
+            game_id=self.game_id, idempotency_key='frame-1', score='X',
+            created_timestamp=timezone.now() - datetime.timedelta(minutes=5))
+        response = self._set_score('X', 'frame-1')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['frame'] == 1
+
+    def test_set_score__invalid_key(self):
+        response = self._set_score('X', 'k' * 65)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_set_score__server_error_not_stored(self):
+        error = models.ErrorResult(
+            [models.Error(error_code=500, error_message='Failed.')])
+        with mock.patch('game.services.set_frame_score', return_value=error):
+            response = self._set_score('X', 'frame-1')
+        assert response.json()['errors'][0]['error_code'] == 500
+        assert not models.IdempotencyRecord.objects.exists()
+        response = self._set_score('X', 'frame-1')
+        assert response.json()['frame'] == 1
+
+
+class SetScoreIdempotencyTransactionTest(test.APITransactionTestCase):
+    """The lookup of a missing game rolls back the transaction of the test."""
+
+    def test_set_score__not_found_stored(self):
+        response = self.client.post(
+            urls.reverse('play-game', args=('missing', 'X')),
+            HTTP_IDEMPOTENCY_KEY='frame-1')
+        assert response.json()['errors'][0]['error_code'] == 404
+        assert models.IdempotencyRecord.objects.get().status_code == 200
+
+
+class PruneTest(django_test.TestCase):
+
+    def _record(self, key, age):
+        return models.IdempotencyRecord.objects.create(
+            game_id='abcdefghijklmnop', idempotency_key=key, score='X',
+            status_code=200, response='{}',
+            created_timestamp=self.now - datetime.timedelta(seconds=age))
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    @django_test.override_settings(
+        GAME_IDEMPOTENCY={'TTL_SECONDS': 100, 'MAX_RECORDS': 2})
+    def test_prune(self):
+        for key, age in (('expired', 200), ('oldest', 50), ('older', 40),
+                         ('newer', 30), ('newest', 20)):
+            self._record(key, age)
+        assert idempotency.prune(self.now) == 3
+        assert sorted(models.IdempotencyRecord.objects.values_list(
+            'idempotency_key', flat=True)) == ['newer', 'newest']
+
+    @django_test.override_settings(
+        GAME_IDEMPOTENCY={'PRUNE_INTERVAL': 1},
+        GAME_TASKS={'ENABLED': True})
+    def test_complete__pruned_by_task(self):
+        with mock.patch.object(tasks, 'get_runner') as get_runner, \
+                mock.patch.object(idempotency, 'prune') as prune:
+            idempotency.complete('abcdefghijklmnop', 'frame-1', 'X', 200, {})
+        assert not prune.called
+        get_runner.return_value.submit.assert_called_once_with(
+            'prune_idempotency_records', prune, key='idempotency')
+
+    @django_test.override_settings(GAME_IDEMPOTENCY={'PRUNE_INTERVAL': 1})
+    def test_complete__not_pruned_by_request(self):
+        with mock.patch.object(idempotency, 'prune') as prune:
+            idempotency.complete('abcdefghijklmnop', 'frame-1', 'X', 200, {})
+        assert not prune.called
+
+    def test_prune_idempotency_records_command(self):
+        self._record('expired', 2 * 86400)
+        self._record('recent', 20)
+        management.call_command('prune_idempotency_records', stdout=mock.Mock())
+        assert list(models.IdempotencyRecord.objects.values_list(
+            'idempotency_key', flat=True)) == ['recent']
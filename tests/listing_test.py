@@ -0,0 +1,92 @@
+"""Unit tests for the listing of the games."""
+import datetime
+
+from django import test
+from django.utils import timezone
+
+from game import listing
+from game import models as game_models
+from game import services
+
+
+class ListGamesTest(test.TestCase):
+    """Encapsulates all tests associated with listing the games."""
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        perfect_game, gutter_game = services.register_games(
+            ['X X X X X X X X X X-X-X',
+             '0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0']).games
+        in_progress = services.register_game()
+        for score in ['X', '7/', '7-2']:
+            services.set_frame_score(self.queryset, in_progress.game_id, score)
+        new_game = services.register_game()
+        day = timezone.make_aware(datetime.datetime(2018, 7, 17, 12))
+        self.game_ids = []
+        for game_id, created_timestamp in (
+                (perfect_game.game_id, day),
+                (gutter_game.game_id, day + datetime.timedelta(days=1)),
+                (in_progress.game_id, day + datetime.timedelta(days=1)),
+                (new_game.game_id, day + datetime.timedelta(days=2))):
+            game_models.GameRegistration.objects.filter(pk=game_id).update(
+                created_timestamp=created_timestamp)
+            self.game_ids.append(game_id)
+        # Newest first, and by game id for the games created together.
+        self.newest_first = [self.game_ids[3]] + sorted(
+            self.game_ids[1:3], reverse=True) + [self.game_ids[0]]
+
+    def _list_all(self, **kwargs):
+        game_ids, cursor = [], None
+        while True:
+            with self.assertNumQueries(2):
+                game_page = listing.list_games(
+                    self.queryset, cursor=cursor, limit=1, **kwargs)
+            game_ids.extend(game.game_id for game in game_page.games)
+            cursor = game_page.next_cursor
+            if cursor is None:
+                return game_ids
+
+    def test_list_games__keyset_pages(self):
+        assert self._list_all() == self.newest_first
+        game_page = listing.list_games(self.queryset)
+        assert [game.game_id for game in game_page.games] == self.newest_first
+        assert game_page.next_cursor is None
+
+    def test_list_games__current_scores(self):
+        game_page = listing.list_games(self.queryset)
+        games = {game.game_id: game for game in game_page.games}
+        assert [(games[game_id].completed, games[game_id].total_score,
+                 games[game_id].max_possible_score)
+                for game_id in self.game_ids] == [
+            (True, 300, 300), (True, 0, 0), (False, 46, 256),
+            (False, None, 300)]
+
+    def test_list_games__status(self):
+        assert self._list_all(status='completed') == [
+            game_id for game_id in self.newest_first
+            if game_id in self.game_ids[:2]]
+        assert self._list_all(status='in_progress') == [
+            game_id for game_id in self.newest_first
+            if game_id in self.game_ids[2:]]
+
+    def test_list_games__date_range(self):
+        assert self._list_all(start=datetime.date(2018, 7, 18)) == (
+            self.newest_first[:3])
+        assert self._list_all(start=datetime.date(2018, 7, 18),
+                              end=datetime.date(2018, 7, 18)) == (
+            self.newest_first[1:3])
+        assert listing.list_games(
+            self.queryset, end=datetime.date(2018, 7, 16)).games == []
+
+    def test_list_games__invalid_parameters(self):
+        with self.assertNumQueries(0):
+            game_page = listing.list_games(
+                self.queryset, status='done', cursor='abc', limit=0)
+        assert game_page.errors == [
+            game_models.Error(
+                error_code=400, error_message='Status: done is invalid.'),
+            game_models.Error(
+                error_code=400,
+                error_message='Between 1 and 100 games are listed per page.'),
+            game_models.Error(
+                error_code=400, error_message='Cursor: abc is invalid.')]
@@ -0,0 +1,80 @@
+"""Unit tests for the striped locks serializing the writes of a game."""
+import threading
+
+from django import test
+
+from game import locks
+from game import models as game_models
+from game import services
+
+
+class StripedLocksTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.locks = locks.StripedLocks(4)
+
+    def test_hold__same_key_waits(self):
+        events = []
+        with self.locks.hold('abcde12345'):
+            thread = threading.Thread(target=self._hold, args=(
+                'abcde12345', events))
+            thread.start()
+            thread.join(0.05)
+            events.append('released')
+        thread.join()
+        assert events == ['released', 'acquired']
+
+    def test_hold__other_stripe_parallel(self):
+        events = []
+        with self.locks.hold('abcde12345'):
+            # crc32 puts both keys in distinct stripes of 4.
+            self._hold('abcde12346', events)
+        assert events == ['acquired']
+
+    def test_hold__timeout(self):
+        with self.locks.hold('abcde12345'):
+            with self.assertRaises(locks.LockTimeout):
+                with self.locks.hold('abcde12345', timeout=0.01):
+                    pass
+        with self.locks.hold('abcde12345', timeout=0.01):
+            pass
+
+    def _hold(self, key, events):
+        with self.locks.hold(key, timeout=5):
+            events.append('acquired')
+
+
+@test.override_settings(GAME_WRITE_LOCKS={'ENABLED': True,
+                                          'TIMEOUT_SECONDS': 0.01})
+class SetFrameScoreTest(test.TestCase):
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        self.game_id = services.register_game().game_id
+
+    def test_set_frame_score__lock_timeout(self):
+        with locks.hold_game(self.game_id):
+            result = services.set_frame_score(self.queryset, self.game_id, 'X')
+        assert result.errors[0].error_code == 503
+        assert not game_models.ScorePerFrame.objects.filter(
+            game=self.game_id).exists()
+        frame = services.set_frame_score(self.queryset, self.game_id, 'X')
+        assert frame.frame == 1
+
+
+@test.override_settings(GAME_WRITE_LOCKS={'ENABLED': True})
+class ConcurrentSetFrameScoreTest(test.TransactionTestCase):
+
+    def test_set_frame_score__concurrent_writes_serialized(self):
+        queryset = game_models.ScorePerFrame.objects.select_related('game')
+        game_id = services.register_game().game_id
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            services.set_frame_score(queryset, game_id, '3-4')))
+            for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(result.frame for result in results) == [1, 2, 3, 4]
+        assert services.get_frame_score(queryset, game_id).total_score == 28
@@ -0,0 +1,111 @@
+"""Unit tests for the Prometheus metrics."""
+import threading
+
+from django import test as django_test
+from django import urls
+from rest_framework import status
+from rest_framework import test
+
+from game import metrics
+
+
+class HistogramTest(django_test.SimpleTestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+        self.histogram = self.registry.register(metrics.Histogram(
+            'duration_seconds', 'Duration.', 'function',
+            buckets=(0.1, 1.0), registry=None))
+
+    def test_render(self):
+        self.histogram.observe(0.05, 'play')
+        self.histogram.observe(0.1, 'play')
+        self.histogram.observe(0.5, 'play')
+        self.histogram.observe(2, 'play')
+        assert self.registry.render() == (
+            '# HELP duration_seconds Duration.\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{function="play",le="0.1"} 2\n'
+            'duration_seconds_bucket{function="play",le="1.0"} 3\n'
+            'duration_seconds_bucket{function="play",le="+Inf"} 4\n'
+            'duration_seconds_sum{function="play"} 2.65\n'
+            'duration_seconds_count{function="play"} 4\n')
+
+    def test_observe__merged_across_threads(self):
+        def observe():
+            for _ in range(1000):
+                self.histogram.observe(0.5, 'play')
+
+        threads = [threading.Thread(target=observe) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Merged once the threads are gone.
+        assert not self.histogram._shards
+        assert ('duration_seconds_count{function="play"} 4000' in
+                self.histogram.samples())
+        self.histogram.observe(0.5, 'play')
+        assert len(self.histogram._shards) == 1
+        assert ('duration_seconds_count{function="play"} 4001' in
+                self.histogram.samples())
+
+    def test_timed(self):
+        @metrics.timed(self.histogram, 'add')
+        def add(a, b):
+            return a + b
+
+        assert add(1, 2) == 3
+        assert ('duration_seconds_bucket{function="add",le="0.1"} 1' in
+                self.histogram.samples())
+
+
+class CounterTest(django_test.SimpleTestCase):
+
+    def test_render(self):
+        registry = metrics.Registry()
+        counter = registry.register(metrics.Counter(
+            'errors_total', 'Errors.', 'error_code', registry=None))
+        counter.inc('404')
+        counter.inc('404')
+        counter.inc('400')
+        registry.register(metrics.CallbackMetric(
+            'subscribers', 'Subscribers.', 'gauge', None, lambda: 3,
+            registry=None))
+        assert counter.value('404') == 2
+        assert registry.render() == (
+            '# HELP errors_total Errors.\n'
+            '# TYPE errors_total counter\n'
+            'errors_total{error_code="400"} 1\n'
+            'errors_total{error_code="404"} 2\n'
+            '# HELP subscribers Subscribers.\n'
+            '# TYPE subscribers gauge\n'
+            'subscribers 3\n')
+
+    def test_register__duplicate_name(self):
+        registry = metrics.Registry()
+        registry.register(metrics.Counter('total', 'Total.', registry=None))
+        with self.assertRaises(ValueError):
+            registry.register(metrics.Counter('total', 'Total.', registry=None))
+
+
+class MetricsViewSetTest(test.APITestCase):
+
+    def test_get_metrics(self):
+        not_found = metrics.ERRORS.value('404')
+        game_id = self.client.post(
+            urls.reverse('register-game')).json()['game_id']
+        self.client.post(urls.reverse('play-game', args=(game_id, 'X')))
+        self.client.get(urls.reverse('get-score', args=('missing',)))
+        response = self.client.get(urls.reverse('get-metrics'))
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == metrics.CONTENT_TYPE
+        assert metrics.ERRORS.value('404') == not_found + 1
+        body = response.content.decode()
+        for function in ('register_game', 'set_frame_score', 'get_frame_score',
+                         'calculate_frame_score', 'serialization'):
+            assert ('game_function_duration_seconds_count{{function="{}"}}'
+                    .format(function)) in body
+        assert 'game_errors_total{error_code="404"}' in body
+        assert '# TYPE game_rejected_requests_total counter' in body
+        assert 'game_event_subscribers_dropped_total ' in body
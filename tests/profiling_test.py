@@ -0,0 +1,105 @@
+"""Unit tests for per-request profiling."""
+import marshal
+from unittest import mock
+
+from django import test as django_test
+from django import urls
+from rest_framework import status
+from rest_framework import test
+
+from game import profiling
+
+
+@django_test.override_settings(
+    GAME_PROFILING={'TOKEN': 'secret', 'TOP_N': 5, 'BUFFER_SIZE': 2})
+class ProfilingTest(test.APITestCase):
+
+    def setUp(self):
+        url = urls.reverse('register-game')
+        self.game_id = self.client.post(url).json()['game_id']
+        self.score_url = urls.reverse('get-score', args=(self.game_id,))
+
+    def test_request__not_profiled_without_token(self):
+        response = self.client.get(self.score_url)
+        assert 'X-Profile-Id' not in response
+        response = self.client.get(self.score_url, HTTP_X_PROFILE='wrong')
+        assert 'X-Profile-Id' not in response
+
+    def test_request__profiled_with_header(self):
+        response = self.client.get(self.score_url, HTTP_X_PROFILE='secret')
+        profile_id = response['X-Profile-Id']
+        response = self.client.get(
+            urls.reverse('get-profile', args=(profile_id,)),
+            HTTP_X_PROFILE='secret')
+        assert response.status_code == status.HTTP_200_OK
+        profile = response.json()
+        assert profile['path'] == self.score_url
+        assert profile['profiler'] in ('cprofile', 'pyinstrument')
+        assert profile['query_count'] == len(profile['queries']) > 0
+        if profile['profiler'] == 'cprofile':
+            assert len(profile['functions']) == 5
+            response = self.client.get(
+                urls.reverse('download-profile', args=(profile_id,)),
+                {'profile': 'secret'})
+            assert marshal.loads(b''.join(response))
+
+    def test_list_profiles__bounded(self):
+        profile_ids = [
+            self.client.get(
+                self.score_url, {'profile': 'secret'})['X-Profile-Id']
+            for _ in range(3)]
+        response = self.client.get(
+            urls.reverse('list-profiles'), HTTP_X_PROFILE='secret')
+        assert [profile['profile_id'] for profile in
+                response.json()['profiles']] == [
+            int(profile_id) for profile_id in reversed(profile_ids[1:])]
+
+    def test_list_profiles__forbidden(self):
+        response = self.client.get(urls.reverse('list-profiles'))
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    @django_test.override_settings(GAME_PROFILING={})
+    def test_list_profiles__disabled(self):
+        response = self.client.get(urls.reverse('list-profiles'))
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_get_profile__not_found(self):
+        response = self.client.get(
+            urls.reverse('get-profile', args=(0,)), HTTP_X_PROFILE='secret')
+        assert response.json() == {'errors': [{
+            'error_code': 404,
+            'error_message': 'No profile was found for the id: 0.'}]}
+
+
+class ProfileBufferTest(django_test.SimpleTestCase):
+
+    def test_get__evicted(self):
+        buffer = profiling.ProfileBuffer()
+        for _ in range(profiling.DEFAULT_BUFFER_SIZE + 1):
+            buffer.add(profiling.Profile(
+                buffer.next_id(), 'GET', '/', 200, 0, 'cprofile', [], [], b''))
+        assert buffer.get(1) is None
+        assert buffer.get(2) is not None
+
+
+def _frame(function, time, self_time, *children):
+    return mock.Mock(file_path='game/services.py', line_no=1,
+                     function=function, time=time, total_self_time=self_time,
+                     children=list(children))
+
+
+class TopSampledFunctionsTest(django_test.SimpleTestCase):
+
+    def test_top_sampled_functions(self):
+        # A recursive function counts the time of its outermost frame.
+        session = mock.Mock(**{'root_frame.return_value': _frame(
+            'get_scorecard', 2.0, 0.25,
+            _frame('score', 1.0, 0.25, _frame('score', 0.5, 0.5)),
+            _frame('query', 0.5, 0.5))})
+        assert [(function['function'], function['calls'],
+                 function['total_time'], function['cumulative_time'])
+                for function in profiling._top_sampled_functions(
+                    session, 2)] == [
+            ('game/services.py:1(get_scorecard)', None, 0.25, 2.0),
+            ('game/services.py:1(score)', None, 0.75, 1.0)]
+        assert profiling._top_sampled_functions(None, 2) == []
@@ -0,0 +1,138 @@
+"""Unit tests for the bounds of the final score."""
+import random
+
+from django import test
+
+from game import scoring
+from game import services
+
+
+def _play(scores):
+    state = scoring.INITIAL_STATE
+    states = []
+    for frame, score in enumerate(scores, 1):
+        state = scoring.next_state(
+            state, frame, *services._parse_score(score, frame))
+        states.append(state)
+    return states
+
+
+def _final_score(rolls):
+    """Scores a complete game from its rolls, frame by frame."""
+    total, roll = 0, 0
+    for frame in range(1, 11):
+        if rolls[roll] == 10:
+            total += 10 + rolls[roll + 1] + rolls[roll + 2]
+            roll += 1
+        elif rolls[roll] + rolls[roll + 1] == 10:
+            total += 10 + rolls[roll + 2]
+            roll += 2
+        else:
+            total += rolls[roll] + rolls[roll + 1]
+            roll += 2
+    return total
+
+
+class NextStateTest(test.SimpleTestCase):
+
+    def test_next_state__perfect_game(self):
+        states = _play(['X'] * 9 + ['X-X-X'])
+        assert states[0] == scoring.FrameState('2', 10, 300)
+        assert states[1] == scoring.FrameState('12', 30, 300)
+        assert states[-1] == scoring.FrameState('', 300, 300)
+
+    def test_next_state__gutter_game(self):
+        states = _play(['0-0'] * 10)
+        assert states[0] == scoring.FrameState('', 0, 270)
+        assert states[-1] == scoring.FrameState('', 0, 0)
+
+    def test_next_state__spare_then_strike(self):
+        states = _play(['X', '7/', '7-2'])
+        assert states == [
+            scoring.FrameState('2', 10, 300),
+            scoring.FrameState('1', 30, 280),
+            scoring.FrameState('', 46, 256)]
+
+    def test_next_state__last_frame(self):
+        for last_frame, final_score in (('X-7/', 20), ('7/X', 20),
+                                        ('7/5', 15), ('X-X-5', 25),
+                                        ('7-2', 9)):
+            states = _play(['0-0'] * 9 + [last_frame])
+            assert states[-1] == scoring.FrameState(
+                '', final_score, final_score)
+
+    def test_next_state__bounds_of_random_games(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            scores, rolls = _random_game(rng)
+            final_score = _final_score(rolls + [0, 0])
+            states = _play(scores)
+            for state in states:
+                assert (state.guaranteed_score <= final_score <=
+                        state.max_possible_score)
+            assert states[-1].guaranteed_score == final_score
+            assert states[-1].max_possible_score == final_score
+
+
+class ScoreFramesTest(test.SimpleTestCase):
+
+    def test_score_frames__perfect_game(self):
+        frames = [('X', 0, 0)] * 9 + [('X', 'X', 'X')]
+        assert [(frame_score, total_score) for frame_score, total_score, _
+                in scoring.score_frames(frames)] == [
+            (30, total_score) for total_score in range(30, 301, 30)]
+
+    def test_score_frames__random_games(self):
+        rng = random.Random(11)
+        for _ in range(200):
+            scores, rolls = _random_game(rng)
+            frames = [services._parse_score(score, frame)
+                      for frame, score in enumerate(scores, 1)]
+            scored = scoring.score_frames(frames)
+            assert scored[-1][1] == _final_score(rolls + [0, 0])
+            assert sum(frame_score for frame_score, _, _ in scored) == (
+                scored[-1][1])
+            assert [state for _, _, state in scored] == _play(scores)
+
+    def test_score_frames__game_in_progress(self):
+        frames = [services._parse_score(score, frame)
+                  for frame, score in enumerate(['X', '7/', 'X', 'X'], 1)]
+        assert [(frame_score, total_score) for frame_score, total_score, _
+                in scoring.score_frames(frames)] == [
+            (20, 20), (20, 40), (None, 40), (None, 40)]
+        assert scoring.score_frames(frames[:1])[0][:2] == (None, None)
+
+
+def _random_game(rng):
+    """Returns the score strings and the rolls of a random complete game."""
+    scores, rolls = [], []
+    for frame in range(1, 11):
+        first = rng.choice([10, rng.randint(0, 9)])
+        if first == 10 and frame < 10:
+            scores.append('X')
+            rolls.append(10)
+            continue
+        second = rng.randint(0, 10 - first if first < 10 else 9)
+        frame_rolls = [first, second]
+        if frame == 10 and (first == 10 or first + second == 10):
+            frame_rolls.append(rng.randint(0, 9))
+        rolls.extend(frame_rolls)
+        scores.append(_score_string(frame_rolls))
+    return scores, rolls
+
+
+def _score_string(rolls):
+    """Formats the rolls of a frame with the grammar of is_valid_score."""
+    if rolls[0] == 10:
+        if len(rolls) == 1:
+            return 'X'
+        if rolls[1] == 10:
+            return 'X-X-{}'.format(rolls[2])
+        if rolls[1] + rolls[2] == 10:
+            return 'X-{}/'.format(rolls[1])
+        return 'X-{}-{}'.format(rolls[1], rolls[2])
+    if rolls[0] + rolls[1] == 10:
+        if len(rolls) == 2:
+            return '{}/'.format(rolls[0])
+        return '{}/{}'.format(rolls[0], 'X' if rolls[2] == 10 else rolls[2])
+    return '{}-{}'.format(rolls[0], rolls[1])
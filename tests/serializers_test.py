@@ -98,11 +98,14 @@ class ScorePerFrameSerializerTest(test.TestCase):
 class ScoreSerializerTest(test.TestCase):
 
     def test_calculate_score_for_game__open_frame(self):
-        game = game_models.Game(game_id='abcde12345', total_score=6)
+        game = game_models.Game(game_id='abcde12345', total_score=6,
+                                guaranteed_score=6, max_possible_score=276)
         serializer_instance = serializers.ScoreSerializer(game)
         assert serializer_instance.data == {
             'total_score': 6,
-            'game_id': 'abcde12345'
+            'game_id': 'abcde12345',
+            'guaranteed_score': 6,
+            'max_possible_score': 276
         }
 
     def test_calculate_score_for_game__None(self):
@@ -110,5 +113,61 @@ class ScoreSerializerTest(test.TestCase):
         serializer_instance = serializers.ScoreSerializer(game)
         assert serializer_instance.data == {
             'total_score': None,
-            'game_id': None
+            'game_id': None,
+            'guaranteed_score': None,
+            'max_possible_score': None
         }
+
+    def test_calculate_score_for_game__error_result(self):
+        error_result = game_models.ErrorResult([
+            game_models.Error(error_code=404, error_message='Game not found')])
+        serializer_instance = serializers.ScoreSerializer(error_result)
+        assert serializer_instance.data == {
+            'errors': [{'error_code': 404, 'error_message': 'Game not found'}]}
+
+
+class ScorecardSerializerTest(test.TestCase):
+
+    def test_scorecard__open_frame(self):
+        frame = game_models.ScorePerFrame(
+            frame=1, first_attempt_score='2', second_attempt_score='4',
+            third_attempt_score='0', frame_score=6, total_score_for_frame=6,
+            guaranteed_score=6, max_possible_score=276)
+        scorecard = game_models.Scorecard('abcde12345', [frame])
+        serializer_instance = serializers.ScorecardSerializer(scorecard)
+        assert serializer_instance.data == {
+            'game_id': 'abcde12345',
+            'frames': [{'frame': 1, 'attempts': ['2', '4'], 'frame_score': 6,
+                        'total_score_for_frame': 6, 'guaranteed_score': 6,
+                        'max_possible_score': 276}]
+        }
+
+    def test_scorecard__error(self):
+        scorecard = game_models.Scorecard('abcde12345')
+        scorecard.add_error(
+            game_models.Error(error_code=404, error_message='Game not found'))
+        serializer_instance = serializers.ScorecardSerializer(scorecard)
+        assert serializer_instance.data == {
+            'errors': [{'error_code': 404, 'error_message': 'Game not found'}]}
+
+
+class ErrorResultTest(test.TestCase):
+
+    def test_error_result__slots(self):
+        error_result = game_models.ErrorResult()
+        assert not hasattr(error_result, '__dict__')
+        error_result.add_error(
+            game_models.Error(error_code=400, error_message='Invalid'))
+        assert error_result.errors == [
+            game_models.Error(error_code=400, error_message='Invalid')]
+        # The errors are not shared between instances.
+        assert game_models.ErrorResult().errors == []
+
+    def test_error_result__serialized_by_model_serializers(self):
+        error_result = game_models.ErrorResult([
+            game_models.Error(error_code=404, error_message='Game not found')])
+        for serializer in (serializers.GameRegistrationSerializer,
+                           serializers.ScorePerFrameSerializer,
+                           serializers.ScorecardSerializer):
+            assert serializer(error_result).data == {'errors': [
+                {'error_code': 404, 'error_message': 'Game not found'}]}
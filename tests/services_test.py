@@ -5,11 +5,13 @@ from pytest import mark
 
 from django import db as django_db
 from django import test
+from django.test import utils as test_utils
 
 from django_mock_queries import query as mock_query
 
 from game import models as game_models
 from game import services
+from game import statistics as game_statistics
 from game import exceptions
 
 
@@ -25,13 +27,7 @@ class GamerRegistrationMockTest(test.TestCase):
     @mark.django_db(transaction=False)
     def test_register_name__error(self):
         """Tests if the game registration fails."""
-        error_list = []
-
-        def add_error(err):
-            error_list.append(err)
-
         expected_mock = mock.Mock()
-        expected_mock.add_error = mock.MagicMock(side_effect=add_error)
         save_method = mock.MagicMock(
             side_effect=django_db.DatabaseError('test'))
         expected_mock.save = save_method
@@ -39,12 +35,10 @@ class GamerRegistrationMockTest(test.TestCase):
                 'game.models.GameRegistration',
                 side_effect=lambda: expected_mock):
             game_object = services.register_game()
-            assert game_object == expected_mock
-            assert game_object.save.call_count == 1
-            assert game_object.add_error.call_count == 1
-            assert error_list == [game_models.Error(
+            assert expected_mock.save.call_count == 1
+            assert game_object == game_models.ErrorResult([game_models.Error(
                 error_code=500,
-                error_message='Unable to register the game.')]
+                error_message='Unable to register the game.')])
 
     def test_register_game__transactional_support(self):
         game_object = services.register_game()
@@ -66,10 +60,7 @@ class SetScoreFrameScoreTest(test.TestCase):
             game_models.Error(
                 error_code=404,
                 error_message='No game was found for the game id: abcde12345.')]
-        assert score_object.frame_score is None
-        assert score_object.first_attempt_score is None
-        assert score_object.second_attempt_score is None
-        assert score_object.third_attempt_score is None
+        assert isinstance(score_object, game_models.ErrorResult)
 
     def test_set_frame_score__invalid_score_format(self):
         score_object = services.set_frame_score(
@@ -78,10 +69,7 @@ class SetScoreFrameScoreTest(test.TestCase):
             game_models.Error(
                 error_code=400,
                 error_message='Score format: XX is invalid.')]
-        assert score_object.frame_score is None
-        assert score_object.first_attempt_score is None
-        assert score_object.second_attempt_score is None
-        assert score_object.third_attempt_score is None
+        assert isinstance(score_object, game_models.ErrorResult)
 
     def test_set_frame_score__create_first_frame_strike(self):
         score_object = services.set_frame_score(
@@ -148,10 +136,7 @@ class SetScoreFrameScoreTest(test.TestCase):
                         'Unable to save score: \'2-3\' for '
                         'game: \'{game}\'.'.format(
                             game=self.game_registration.game_id)))]
-            assert score_object.frame_score is None
-            assert score_object.first_attempt_score is None
-            assert score_object.second_attempt_score is None
-            assert score_object.third_attempt_score is None
+            assert isinstance(score_object, game_models.ErrorResult)
 
     def test_set_frame_score__game_has_been_played(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/3']
@@ -165,10 +150,7 @@ class SetScoreFrameScoreTest(test.TestCase):
                 error_code=400,
                 error_message='Game:\'{}\' has already been played.'.format(
                     self.game_registration.game_id))]
-        assert score_object.frame_score is None
-        assert score_object.first_attempt_score is None
-        assert score_object.second_attempt_score is None
-        assert score_object.third_attempt_score is None
+        assert isinstance(score_object, game_models.ErrorResult)
 
     def test_set_frame_score__last_attempt_all_strikes(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/']
@@ -285,6 +267,29 @@ class SetScoreFrameScoreTest(test.TestCase):
                 'total_score_for_frame', flat=True)]
         assert total_scores == [20, 37, 46, 66, 96, 118, 133, 138, 158, 178]
 
+    def test_set_frame_score__retroactive_updates_coalesced(self):
+        """Every frame of a perfect game scores its two previous frames.
+
+        Saving each of them separately took 18 full-row UPDATE statements per
+        game; they are now written by one UPDATE per frame, from the third one
+        scoring the first strike.
+        """
+        table = game_models.ScorePerFrame._meta.db_table
+        with test_utils.CaptureQueriesContext(django_db.connection) as queries:
+            for score in ['X'] * 9 + ['X-X-X']:
+                services.set_frame_score(
+                    self.queryset, self.game_registration.game_id, score)
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE "{}"'.format(table))]
+        assert len(updates) == 8
+        for update in updates:
+            assert '"frame_score"' in update
+            assert '"total_score_for_frame"' in update
+            assert '"first_attempt_score"' not in update
+        assert list(game_models.ScorePerFrame.objects.filter(
+            game=self.game_registration).order_by('frame').values_list(
+            'total_score_for_frame', flat=True)) == list(range(30, 301, 30))
+
 
 class ParseScoreTest(test.TestCase):
 
@@ -358,12 +363,9 @@ class FrameScoreTest(test.TestCase):
 
     def test_game_id_not_found(self):
         score_object = services.get_frame_score(self.queryset, 'abcde12345')
-        game_object = game_models.Game('abcde12345')
-        game_object.errors = [
-            game_models.Error(
-                error_code=404,
-                error_message='No game was found for the game id: abcde12345.')]
-        assert score_object == game_object
+        assert score_object == game_models.ErrorResult([game_models.Error(
+            error_code=404,
+            error_message='No game was found for the game id: abcde12345.')])
 
     def test_calculate_score_for_active_game(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X']
@@ -373,7 +375,7 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 96)
+            self.game_registration.game_id, 96, 126, 246)
 
     def test_calculate_score_for_completed_game(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/3']
@@ -383,7 +385,7 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 168)
+            self.game_registration.game_id, 168, 168, 168)
 
     def test_calculate_score_for_completed_game_2(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', 'X-X-9']
@@ -393,7 +395,7 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 187)
+            self.game_registration.game_id, 187, 187, 187)
 
     def test_calculate_score_for_completed_game_3(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/X']
@@ -403,17 +405,32 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 175)
+            self.game_registration.game_id, 175, 175, 175)
 
     def test_calculate_score_for_completed_game_4(self):
-        scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', 'X-4-9']
+        scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/']
         for score in scores:
             services.set_frame_score(
                 self.queryset, self.game_registration.game_id, score)
+        # 4 and 9 pins are more than the 10 standing after the strike.
+        assert services.set_frame_score(
+            self.queryset, self.game_registration.game_id,
+            'X-4-9') == game_models.ErrorResult([game_models.Error(
+                error_code=400,
+                error_message='Score format: X-4-9 is invalid.')])
+        services.set_frame_score(
+            self.queryset, self.game_registration.game_id, 'X-4-5')
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 181)
+            self.game_registration.game_id, 177, 177, 177)
+
+    def test_set_frame_score__more_pins_than_standing(self):
+        score_object = services.set_frame_score(
+            self.queryset, self.game_registration.game_id, '9-9')
+        assert score_object == game_models.ErrorResult([game_models.Error(
+            error_code=400, error_message='Score format: 9-9 is invalid.')])
+        assert not game_models.ScorePerFrame.objects.exists()
 
     def test_calculate_score_for_completed_game_5(self):
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', 'X-4/']
@@ -423,7 +440,19 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 178)
+            self.game_registration.game_id, 178, 178, 178)
+
+    def test_calculate_score_for_completed_game_6(self):
+        """The spare scores the next roll, not the frame after it."""
+        scores = ['7-1', 'X', '3-2', '6/', '6-2', '6-1', '5-2', '1-5', '0-5',
+                  '8-1']
+        for score in scores:
+            services.set_frame_score(
+                self.queryset, self.game_registration.game_id, score)
+        game_object = services.get_frame_score(
+            self.queryset, self.game_registration.game_id)
+        assert (game_object.total_score, game_object.guaranteed_score,
+                game_object.max_possible_score) == (86, 86, 86)
 
     def test_calculate_score_for_all_strikes_open_frame(self):
         scores = ['X', 'X', '7-2', 'X', 'X', 'X', 'X', 'X', 'X', 'X-X-X']
@@ -433,7 +462,7 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 265)
+            self.game_registration.game_id, 265, 265, 265)
 
     def test_calculate_score_for_all_strikes_spare(self):
         scores = ['X', 'X', '7/', 'X', 'X', 'X', 'X', 'X', 'X', 'X-X-X']
@@ -443,7 +472,7 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 277)
+            self.game_registration.game_id, 277, 277, 277)
 
     def test_calculate_score_for_all_strikes(self):
         scores = ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X-X-X']
@@ -453,9 +482,301 @@ class FrameScoreTest(test.TestCase):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
         assert game_object == game_models.Game(
-            self.game_registration.game_id, 300)
+            self.game_registration.game_id, 300, 300, 300)
 
     def test_calculate_score_for_new_game(self):
         game_object = services.get_frame_score(
             self.queryset, self.game_registration.game_id)
-        assert game_object == game_models.Game(self.game_registration.game_id)
+        assert game_object == game_models.Game(
+            self.game_registration.game_id, None, 0, 300)
+
+    def test_calculate_score__frames_read(self):
+        """Scoring a frame does not read more of the game as it goes on."""
+        frames_read = []
+        for _ in range(9):
+            with mock.patch.object(
+                    game_models.ScorePerFrame, 'from_db',
+                    side_effect=game_models.ScorePerFrame.from_db) as from_db:
+                services.set_frame_score(
+                    self.queryset, self.game_registration.game_id, 'X')
+            frames_read.append(from_db.call_count)
+        # The previous frame, the two strikes it owes bonus rolls to, and the
+        # frame before them.
+        assert frames_read == [0, 1, 2, 3, 3, 3, 3, 3, 3]
+
+
+class ScorecardTest(test.TestCase):
+    """Encapsulates all tests associated with the scorecard."""
+
+    def setUp(self):
+        self.game_registration = game_models.GameRegistration.objects.create()
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', 'X-4/']
+        for score in scores:
+            services.set_frame_score(
+                self.queryset, self.game_registration.game_id, score)
+
+    def test_scorecard__game_id_not_found(self):
+        scorecard = services.get_scorecard(self.queryset, 'abcde12345')
+        assert scorecard == game_models.ErrorResult([game_models.Error(
+            error_code=404,
+            error_message='No game was found for the game id: abcde12345.')])
+
+    def test_scorecard__all_frames(self):
+        with self.assertNumQueries(2):
+            scorecard = services.get_scorecard(
+                self.queryset, self.game_registration.game_id)
+        assert scorecard.errors == []
+        assert [frame.frame for frame in scorecard.frames] == list(
+            range(1, 11))
+        assert [frame.attempts for frame in scorecard.frames] == [
+            ['X'], ['7', '3'], ['7', '2'], ['9', '1'], ['X'], ['X'], ['X'],
+            ['2', '3'], ['6', '4'], ['X', '4', '6']]
+        assert [frame.total_score_for_frame for frame in scorecard.frames] == [
+            20, 37, 46, 66, 96, 118, 133, 138, 158, 178]
+
+    def test_scorecard__latest_frame_version(self):
+        game_models.ScorePerFrame.objects.filter(
+            game=self.game_registration, frame=10).update(frame_version=2)
+        game_models.ScorePerFrame(
+            game=self.game_registration, frame=10, frame_version=1,
+            first_attempt_score='1', second_attempt_score='1',
+            third_attempt_score='0', frame_score=2,
+            total_score_for_frame=160).save(recursive_save=False)
+        scorecard = services.get_scorecard(
+            self.queryset, self.game_registration.game_id)
+        assert len(scorecard.frames) == 10
+        assert scorecard.frames[-1].frame_version == 2
+        assert scorecard.frames[-1].total_score_for_frame == 178
+
+    def test_scorecard__since_frame(self):
+        scorecard = services.get_scorecard(
+            self.queryset, self.game_registration.game_id, since_frame=7)
+        assert [frame.frame for frame in scorecard.frames] == [6, 7, 8, 9, 10]
+
+
+class FrameScoresTest(test.TestCase):
+    """Encapsulates all tests associated with fetching several scores."""
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        self.game_ids = []
+        for scores in (['X', '7/', '7-2'], ['X', 'X'], []):
+            game_registration = game_models.GameRegistration.objects.create()
+            for score in scores:
+                services.set_frame_score(
+                    self.queryset, game_registration.game_id, score)
+            self.game_ids.append(game_registration.game_id)
+
+    def test_get_frame_scores__single_query(self):
+        game_ids = self.game_ids + ['abcde12345', self.game_ids[0]]
+        with self.assertNumQueries(1):
+            game_scores = services.get_frame_scores(self.queryset, game_ids)
+        not_found = game_models.ErrorResult([game_models.Error(
+            error_code=404,
+            error_message='No game was found for the game id: abcde12345.')])
+        assert game_scores.errors == []
+        assert game_scores.games == [
+            game_models.Game(self.game_ids[0], 46, 46, 256),
+            game_models.Game(self.game_ids[1], None, 30, 300),
+            game_models.Game(self.game_ids[2], None, 0, 300),
+            not_found]
+
+    def test_get_frame_scores__final_score_bounds(self):
+        with self.assertNumQueries(1):
+            game_scores = services.get_frame_scores(
+                self.queryset, self.game_ids)
+        assert [(game.guaranteed_score, game.max_possible_score)
+                for game in game_scores.games] == [
+            (46, 256), (30, 300), (0, 300)]
+
+    def test_get_frame_scores__no_game_ids(self):
+        game_scores = services.get_frame_scores(self.queryset, [])
+        assert game_scores.games == []
+        assert game_scores.errors == [
+            game_models.Error(
+                error_code=400,
+                error_message='Between 1 and 100 game ids are required.')]
+
+    def test_get_frame_scores__too_many_game_ids(self):
+        game_ids = ['game{:012d}'.format(i) for i in range(101)]
+        with self.assertNumQueries(0):
+            game_scores = services.get_frame_scores(self.queryset, game_ids)
+        assert game_scores.errors[0].error_code == 400
+
+
+class LazyScoringTest(test.TestCase):
+    """The lazy scoring mode scores the frames exactly like the eager one."""
+
+    GAMES = (
+        ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/3'],
+        ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X-X-X'],
+        ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', 'X-4/'],
+        ['3-4', 'X', '5/', '2-2', 'X', 'X', '9/', '0-0', '8/', 'X-X-1'],
+        ['0-0', 'X', '0-0', '5/', '3-4', 'X', 'X', '1-1', 'X', '9-0'],
+        ['X', 'X', '3-4'],
+    )
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def _play(self, scores, center='', lazy=False, read_every=None):
+        scoring_mode = (services.SCORING_MODE_LAZY if lazy
+                        else services.SCORING_MODE_EAGER)
+        game_id = services.register_game(center).game_id
+        with test.override_settings(GAME_SCORING_MODE=scoring_mode):
+            for frame, score in enumerate(scores, 1):
+                services.set_frame_score(self.queryset, game_id, score)
+                if read_every and frame % read_every == 0:
+                    services.get_frame_score(self.queryset, game_id)
+        return game_id
+
+    def _frames(self, game_id):
+        return list(game_models.ScorePerFrame.objects.filter(
+            game=game_id).order_by('frame').values_list(
+            'frame', *services.MATERIALIZED_FIELDS))
+
+    def test_lazy_scoring__frames_appended_without_scores(self):
+        game_id = self._play(self.GAMES[0][:3], lazy=True)
+        assert game_models.GameRegistration.objects.get(
+            pk=game_id).scores_dirty
+        assert [frame[1:3] for frame in self._frames(game_id)] == [
+            (None, None)] * 3
+
+    def test_lazy_scoring__same_scores_as_eager(self):
+        for scores in self.GAMES:
+            for read_every in (None, 1, 4):
+                eager_game_id = self._play(scores)
+                lazy_game_id = self._play(
+                    scores, lazy=True, read_every=read_every)
+                assert services.get_frame_score(
+                    self.queryset, lazy_game_id).total_score == (
+                    services.get_frame_score(
+                        self.queryset, eager_game_id).total_score)
+                assert self._frames(lazy_game_id) == self._frames(
+                    eager_game_id)
+                assert not game_models.GameRegistration.objects.get(
+                    pk=lazy_game_id).scores_dirty
+
+    def test_lazy_scoring__materialized_by_reads(self):
+        eager_game_id = self._play(self.GAMES[0])
+        game_ids = [self._play(self.GAMES[0], lazy=True) for _ in range(2)]
+        scorecard = services.get_scorecard(self.queryset, game_ids[0])
+        assert [frame.total_score_for_frame for frame in scorecard.frames] == [
+            total for _, _, total, _, _, _ in self._frames(eager_game_id)]
+        game_scores = services.get_frame_scores(self.queryset, game_ids)
+        assert [game.total_score for game in game_scores.games] == [168, 168]
+
+    def test_lazy_scoring__eager_write_on_dirty_game(self):
+        eager_game_id = self._play(self.GAMES[1])
+        game_id = services.register_game().game_id
+        with test.override_settings(GAME_SCORING_MODE='lazy'):
+            for score in self.GAMES[1][:5]:
+                services.set_frame_score(self.queryset, game_id, score)
+        for score in self.GAMES[1][5:]:
+            services.set_frame_score(self.queryset, game_id, score)
+        assert self._frames(game_id) == self._frames(eager_game_id)
+
+    def test_materialize_dirty_games(self):
+        game_ids = [self._play(scores, lazy=True) for scores in self.GAMES]
+        assert services.materialize_dirty_games(batch_size=4) == len(
+            self.GAMES)
+        assert not game_models.GameRegistration.objects.filter(
+            scores_dirty=True).exists()
+        eager_game_ids = [self._play(scores) for scores in self.GAMES]
+        for game_id, eager_game_id in zip(game_ids, eager_game_ids):
+            assert self._frames(game_id) == self._frames(eager_game_id)
+        assert services.materialize_dirty_games() == 0
+
+    def test_materialize_dirty_games__statistics(self):
+        for scores in self.GAMES:
+            self._play(scores, center='eager')
+            self._play(scores, center='lazy', lazy=True)
+        services.materialize_dirty_games()
+        eager, lazy = [
+            (row.frames, row.strikes, row.spares, row.completed_games,
+             row.total_score)
+            for row in game_statistics.get_statistics().days]
+        assert eager == lazy
+
+
+class RegisterGamesTest(test.TestCase):
+    """Complete games are scored in memory like frame by frame."""
+
+    GAMES = (
+        'X 7/ 7-2 9/ X X X 2-3 6/ 7/3',
+        'X X X X X X X X X X-X-X',
+        'X 7/ 7-2 9/ X X X 2-3 6/ X-4/',
+        '3-4 X 5/ 2-2 X X 9/ 0-0 8/ X-X-1',
+        '0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0',
+        '7-1 X 3-2 6/ 6-2 6-1 5-2 1-5 0-5 8-1',
+    )
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def _frames(self, game_id):
+        return list(game_models.ScorePerFrame.objects.filter(
+            game=game_id).order_by('frame').values_list(
+            'frame', 'first_attempt_score', 'second_attempt_score',
+            'third_attempt_score', 'frame_version',
+            *services.MATERIALIZED_FIELDS))
+
+    def _statistics(self, center):
+        [day] = game_statistics.get_statistics(center).days
+        return (day.frames, day.strikes, day.spares, day.open_frames,
+                day.tenth_frames, day.tenth_frame_conversions,
+                day.completed_games, day.total_score)
+
+    def test_register_games__same_as_frame_by_frame(self):
+        game_batch = services.register_games(list(self.GAMES), 'batch')
+        assert game_batch.errors == []
+        for game, scorecard in zip(self.GAMES, game_batch.games):
+            game_id = services.register_game('frames').game_id
+            for score in game.split():
+                services.set_frame_score(self.queryset, game_id, score)
+            assert self._frames(scorecard.game_id) == self._frames(game_id)
+            assert [frame.total_score_for_frame
+                    for frame in scorecard.frames] == [
+                total_score for _, _, _, _, _, _, total_score, _, _, _
+                in self._frames(game_id)]
+        assert self._statistics('batch') == self._statistics('frames')
+
+    def test_register_games__one_query_per_table(self):
+        services.register_games([self.GAMES[0]])
+        # The games, their frames, and the statistics of the existing day.
+        with self.assertNumQueries(3):
+            game_batch = services.register_games(list(self.GAMES))
+        assert len(game_batch.games) == len(self.GAMES)
+        assert game_models.ScorePerFrame.objects.count() == 10 * (
+            len(self.GAMES) + 1)
+
+    def test_register_games__invalid_games(self):
+        game_batch = services.register_games(
+            [self.GAMES[0], 'X X X', 'X 7/ 7-2 9/ X X X 2-3 6/ 7/',
+             'X 3-8 7-2 9/ X X X 2-3 6/ 7/3', 'X-X-X ' * 10])
+        assert game_batch.errors == [
+            game_models.Error(
+                error_code=400,
+                error_message=(
+                    'Game 2: A game has 10 frames separated by spaces.')),
+            game_models.Error(
+                error_code=400,
+                error_message=('Game 3: spare 7/ has incorrect number of '
+                               'tries for frame: 10.')),
+            game_models.Error(
+                error_code=400,
+                error_message=('Game 4: Score format: 3-8 is invalid for '
+                               'frame: 2.')),
+            game_models.Error(
+                error_code=400,
+                error_message=('Game 5: strike X-X-X has incorrect number '
+                               'of tries for frame: 1.'))]
+        assert not game_models.GameRegistration.objects.exists()
+
+    def test_register_games__number_of_games(self):
+        for games in ([], [self.GAMES[0]] * 101, self.GAMES[0]):
+            assert services.register_games(games).errors == [
+                game_models.Error(
+                    error_code=400,
+                    error_message='Between 1 and 100 games are required.')]
@@ -0,0 +1,33 @@
+"""Unit tests for the API-only settings profile."""
+from rest_framework import status
+from rest_framework import test
+
+from django import urls
+
+from bowling_game import settings_api
+# DRF resolves the default renderers and parsers of a view when its class is
+# defined; import the views before the API settings are applied so that they
+# do not leak into other tests.
+from game import viewset  # NOQA: F401
+
+
+@test.override_settings(MIDDLEWARE=settings_api.MIDDLEWARE,
+                        REST_FRAMEWORK=settings_api.REST_FRAMEWORK)
+class ApiSettingsTest(test.APITestCase):
+
+    def test_installed_apps__contrib_apps_removed(self):
+        assert settings_api.INSTALLED_APPS == [
+            'rest_framework', 'game.apps.GameConfig']
+
+    def test_play_game(self):
+        response = self.client.post(urls.reverse('register-game'))
+        assert response.status_code == status.HTTP_201_CREATED
+        game_id = response.json()['game_id']
+        for score in ('X', '7/', '7-2'):
+            self.client.post(urls.reverse('play-game', args=(game_id, score)))
+        response = self.client.get(urls.reverse('get-score', args=(game_id,)))
+        assert response.json() == {
+            'game_id': game_id, 'total_score': 46, 'guaranteed_score': 46,
+            'max_possible_score': 256}
+        assert 'Cookie' not in response.get('Vary', '')
+        assert not response.cookies
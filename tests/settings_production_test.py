@@ -0,0 +1,26 @@
+"""Unit tests for the production settings profile."""
+import os
+
+from django import test
+
+from bowling_game import settings
+from bowling_game import settings_production
+
+
+class ProductionSettingsTest(test.SimpleTestCase):
+
+    def test_databases__default_settings_intact(self):
+        assert settings_production.DATABASES['default']['CONN_MAX_AGE'] == 600
+        assert settings_production.DATABASES['default']['OPTIONS'] == {
+            'timeout': 30}
+        assert settings.DATABASES['default'].get('CONN_MAX_AGE', 0) == 0
+        assert settings.DATABASES['default']['OPTIONS'] == {'timeout': 300}
+
+    def test_runtime_files__outside_of_source_tree(self):
+        for path in (settings.GAME_WRITE_BEHIND['JOURNAL_PATH'],
+                     settings.GAME_WRITE_BEHIND['DEAD_LETTER_PATH']):
+            assert not path.startswith(settings.BASE_DIR + os.sep)
+
+    def test_existence_cache__disabled(self):
+        # The default cache is local to the process.
+        assert not settings_production.GAME_EXISTENCE_CACHE['ENABLED']
@@ -0,0 +1,35 @@
+"""Unit tests for signal receivers."""
+from unittest import mock
+
+from django import db as django_db
+from django import test
+
+from game import signals
+
+
+class ConfigureSqliteConnectionTest(test.TestCase):
+
+    def _pragma(self, name):
+        with django_db.connection.cursor() as cursor:
+            cursor.execute('PRAGMA {}'.format(name))
+            return cursor.fetchone()[0]
+
+    @test.override_settings(
+        GAME_SQLITE_PRAGMAS=(('cache_size', -4096), ('busy_timeout', 1234)))
+    def test_configure_sqlite_connection__pragmas_applied(self):
+        signals.configure_sqlite_connection(
+            sender=None, connection=django_db.connection)
+        assert self._pragma('cache_size') == -4096
+        assert self._pragma('busy_timeout') == 1234
+
+    @test.override_settings(GAME_SQLITE_PRAGMAS=())
+    def test_configure_sqlite_connection__no_pragmas(self):
+        connection = mock.Mock(vendor='sqlite')
+        signals.configure_sqlite_connection(sender=None, connection=connection)
+        assert connection.cursor.call_count == 0
+
+    @test.override_settings(GAME_SQLITE_PRAGMAS=(('cache_size', -4096),))
+    def test_configure_sqlite_connection__other_vendor(self):
+        connection = mock.Mock(vendor='postgresql')
+        signals.configure_sqlite_connection(sender=None, connection=connection)
+        assert connection.cursor.call_count == 0
@@ -0,0 +1,157 @@
+"""Unit tests for the coalescing of concurrent computations."""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django import test
+
+from game import models as game_models
+from game import queued_frames
+from game import services
+from game import singleflight
+from game import writebehind
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'Timed out.'
+        time.sleep(0.001)
+
+
+class GroupTest(test.SimpleTestCase):
+
+    def _call_concurrently(self, group, key, function, callers):
+        """Calls group.do() from the callers once the first one is in flight.
+        """
+        outcomes = []
+
+        def call():
+            try:
+                outcomes.append(group.do(key, function))
+            except Exception as exception:
+                outcomes.append(exception)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        threads[0].start()
+        _wait_until(lambda: group.in_flight() == 1)
+        for thread in threads[1:]:
+            thread.start()
+        return threads, outcomes
+
+    def test_do__concurrent_callers_share_result(self):
+        group = singleflight.Group('test_share')
+        release = threading.Event()
+        function = mock.Mock(side_effect=lambda: release.wait() and object())
+        threads, outcomes = self._call_concurrently(group, 'key', function, 8)
+        _wait_until(lambda: singleflight.COALESCED.value('test_share') == 7)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert function.call_count == 1
+        assert len(outcomes) == 8
+        assert all(outcome is outcomes[0] for outcome in outcomes)
+        assert group.in_flight() == 0
+
+    def test_do__concurrent_callers_share_exception(self):
+        group = singleflight.Group('test_exception')
+        release = threading.Event()
+
+        def fail():
+            release.wait()
+            raise ValueError('Unable to score.')
+
+        threads, outcomes = self._call_concurrently(group, 'key', fail, 3)
+        _wait_until(lambda: singleflight.COALESCED.value('test_exception') == 2)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(outcomes) == 3
+        assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+        # The failed computation is not kept.
+        assert group.do('key', lambda: 1) == 1
+
+    def test_do__distinct_keys_not_shared(self):
+        group = singleflight.Group('test_keys')
+        release = threading.Event()
+        threads, outcomes = self._call_concurrently(
+            group, 'key', lambda: release.wait() and 'first', 1)
+        assert group.do('other-key', lambda: 'second') == 'second'
+        release.set()
+        threads[0].join()
+        assert outcomes == ['first']
+        assert singleflight.COALESCED.value('test_keys') == 0
+
+    def test_versions(self):
+        versions = singleflight.Versions(stripes=4)
+        version = versions.get('abcde12345')
+        versions.bump('abcde12345', 'fghij67890')
+        assert versions.get('abcde12345') > version
+
+
+@test.override_settings(GAME_SINGLE_FLIGHT={'ENABLED': True})
+class GetFrameScoreTest(test.TransactionTestCase):
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def test_get_frame_score__concurrent_reads_coalesced(self):
+        game_id = services.register_game().game_id
+        coalesced = singleflight.COALESCED.value('get_frame_score')
+        release = threading.Event()
+        game = game_models.Game(game_id, 0, 0, 300)
+
+        def get_frame_score(queryset, game_id):
+            release.wait()
+            return game
+
+        results = []
+        with mock.patch.object(services, '_get_frame_score',
+                               side_effect=get_frame_score) as compute:
+            threads = [threading.Thread(target=lambda: results.append(
+                services.get_frame_score(self.queryset, game_id)))
+                for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            _wait_until(lambda: singleflight.COALESCED.value(
+                'get_frame_score') == coalesced + 4)
+            release.set()
+            for thread in threads:
+                thread.join()
+        assert compute.call_count == 1
+        assert results == [game] * 5
+
+    def test_set_frame_score__bumps_version_on_commit(self):
+        game_id = services.register_game().game_id
+        version = singleflight.versions.get(game_id)
+        services.set_frame_score(self.queryset, game_id, 'X')
+        assert singleflight.versions.get(game_id) == version + 1
+        assert services.get_frame_score(
+            self.queryset, game_id).guaranteed_score == 10
+
+    def test_set_frame_score__write_behind_bumps_version_when_queued(self):
+        game_id = services.register_game().game_id
+        version = singleflight.versions.get(game_id)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.addCleanup(writebehind.shutdown)
+        release = threading.Event()
+        commit_frames = queued_frames.commit_frames
+
+        def commit(records):
+            release.wait()
+            commit_frames(records)
+
+        with test.override_settings(GAME_WRITE_BEHIND={
+                'ENABLED': True, 'LINGER_SECONDS': 0,
+                'JOURNAL_PATH': os.path.join(directory, 'frames.journal')}), \
+                mock.patch.object(queued_frames, 'commit_frames', commit):
+            services.set_frame_score(self.queryset, game_id, 'X')
+            # Acknowledged, and not committed yet.
+            assert singleflight.versions.get(game_id) > version
+            release.set()
+            assert services.get_frame_score(
+                self.queryset, game_id).guaranteed_score == 10
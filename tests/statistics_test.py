@@ -0,0 +1,77 @@
+"""Unit tests for the daily statistics of the centers."""
+import datetime
+
+from django import test
+from django.utils import timezone
+
+from game import models as game_models
+from game import retention
+from game import services
+from game import statistics
+
+
+class StatisticsTest(test.TestCase):
+    """Encapsulates all tests associated with the center statistics."""
+
+    def setUp(self):
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        games = (
+            ('lanes-1', ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/',
+                         '7/3']),
+            ('lanes-1', ['X', 'X', 'X', 'X', 'X', 'X', 'X', 'X', 'X',
+                         'X-X-X']),
+            ('lanes-1', ['1-2', '3/']),
+            ('lanes-2', ['9-0']),
+        )
+        for center, scores in games:
+            game_registration = services.register_game(center)
+            for score in scores:
+                services.set_frame_score(
+                    self.queryset, game_registration.game_id, score)
+
+    def _counters(self):
+        return [
+            (row.center, row.frames, row.strikes, row.spares, row.open_frames,
+             row.tenth_frames, row.tenth_frame_conversions,
+             row.completed_games, row.total_score)
+            for row in statistics.get_statistics().days]
+
+    def test_register_game__invalid_center(self):
+        game_object = services.register_game('lanes 1')
+        assert game_object.errors == [
+            game_models.Error(
+                error_code=400, error_message='Center: lanes 1 is invalid.')]
+
+    def test_set_frame_score__statistics_incremented(self):
+        assert self._counters() == [
+            ('lanes-1', 22, 14, 5, 3, 2, 2, 2, 468),
+            ('lanes-2', 1, 0, 0, 1, 0, 0, 0, 0)]
+        days = statistics.get_statistics(center='lanes-1').days
+        assert len(days) == 1
+        assert days[0].strike_rate == 14.0 / 22
+        assert days[0].average_score == 234.0
+        assert days[0].tenth_frame_conversion_rate == 1.0
+
+    def test_get_statistics__date_range(self):
+        today = timezone.localdate()
+        assert len(statistics.get_statistics(start=today, end=today).days) == 2
+        assert statistics.get_statistics(
+            end=today - datetime.timedelta(days=1)).days == []
+
+    def test_rebuild_statistics__same_as_incremental(self):
+        expected = self._counters()
+        game_models.DailyStatistics.objects.update(frames=0, strikes=0)
+        assert statistics.rebuild_statistics(batch_size=1) == 2
+        assert self._counters() == expected
+
+    def test_rebuild_statistics__keeps_purged_games(self):
+        expected = self._counters()
+        game_ids = list(game_models.GameRegistration.objects.filter(
+            center='lanes-1').values_list('game_id', flat=True))
+        assert retention.purge_games(game_ids[:2]) == 2
+        assert self._counters() == expected
+        assert statistics.rebuild_statistics() == 2
+        assert self._counters() == expected
+        assert retention.purge_games(game_ids[2:]) == 1
+        assert statistics.rebuild_statistics() == 2
+        assert self._counters() == expected
@@ -0,0 +1,117 @@
+"""Unit tests for the background task runner."""
+import threading
+import time
+from unittest import mock
+
+from django import test
+
+from game import events
+from game import models as game_models
+from game import services
+from game import tasks
+
+
+class TaskRunnerTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.runner = tasks.TaskRunner(
+            workers=2, max_queue_size=2, max_attempts=3, retry_seconds=0)
+        self.calls = []
+
+    def tearDown(self):
+        self.runner.stop(timeout=5)
+
+    def test_submit__runs_tasks_of_a_key_in_order(self):
+        self.runner.start()
+        for frame in range(1, 21):
+            self.runner.submit('publish_frame', self.calls.append, frame,
+                               key='abcde12345')
+        assert self.runner.stop(timeout=5)
+        assert self.calls == list(range(1, 21))
+
+    def test_submit__retries_failed_task(self):
+        function = mock.Mock(side_effect=[ValueError('Database is locked.'),
+                                          None])
+        self.runner.start()
+        retried = tasks.TASKS.value('retried')
+        self.runner.submit('record_statistics', function, 'lanes-1')
+        self.runner.stop(timeout=5)
+        assert function.call_args_list == [mock.call('lanes-1')] * 2
+        assert tasks.TASKS.value('retried') == retried + 1
+
+    def test_submit__gives_up_after_max_attempts(self):
+        function = mock.Mock(side_effect=ValueError('Database is locked.'))
+        self.runner.start()
+        failed = tasks.TASKS.value('failed')
+        self.runner.submit('record_statistics', function)
+        self.runner.stop(timeout=5)
+        assert function.call_count == 3
+        assert tasks.TASKS.value('failed') == failed + 1
+
+    def test_submit__full_queue_waits_for_room(self):
+        release = threading.Event()
+        self.runner = tasks.TaskRunner(
+            workers=1, max_queue_size=1, max_attempts=1, retry_seconds=0)
+        self.runner.start()
+        self.runner.submit('block', release.wait)
+        # Queued once the worker took the first task.
+        while len(self.runner):
+            time.sleep(0.001)
+        self.runner.submit('queued', self.calls.append, 'queued')
+        queue_full = tasks.QUEUE_FULL.value('waiting')
+        submitter = threading.Thread(target=self.runner.submit, args=(
+            'waiting', self.calls.append, 'waiting'))
+        submitter.start()
+        submitter.join(timeout=0.05)
+        assert submitter.is_alive()
+        release.set()
+        submitter.join(timeout=5)
+        assert self.runner.stop(timeout=5)
+        assert self.calls == ['queued', 'waiting']
+        assert tasks.QUEUE_FULL.value('waiting') == queue_full + 1
+
+    def test_submit__runs_in_caller_once_stopped(self):
+        self.runner.start()
+        self.runner.stop(timeout=5)
+        self.runner.submit('publish_frame', self.calls.append, 1)
+        assert self.calls == [1]
+
+    def test_stop__drops_tasks_left_after_timeout(self):
+        release = threading.Event()
+        self.runner = tasks.TaskRunner(
+            workers=1, max_queue_size=10, max_attempts=1, retry_seconds=0)
+        self.runner.start()
+        self.runner.submit('block', release.wait)
+        self.runner.submit('queued', self.calls.append, 'queued')
+        dropped = tasks.TASKS.value('dropped')
+        assert not self.runner.stop(timeout=0.05)
+        assert tasks.TASKS.value('dropped') == dropped + 1
+        release.set()
+
+
+@test.override_settings(GAME_TASKS={'ENABLED': True, 'WORKERS': 2})
+class PostCommitTasksTest(test.TransactionTestCase):
+
+    def setUp(self):
+        self.game_id = services.register_game('lanes-1').game_id
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+        self.subscription = events.hub.subscribe(self.game_id)
+        self.addCleanup(events.hub.unsubscribe, self.subscription)
+        self.addCleanup(tasks.shutdown)
+
+    def test_set_frame_score__statistics_and_events_in_background(self):
+        for score in ('X', '7/', '3-4'):
+            services.set_frame_score(self.queryset, self.game_id, score)
+            # Writing a table a worker reads fails in the in-memory test
+            # database instead of waiting, so the tasks are run first.
+            tasks.shutdown(timeout=5)
+        statistics = game_models.DailyStatistics.objects.get(center='lanes-1')
+        assert (statistics.frames, statistics.strikes, statistics.spares,
+                statistics.open_frames) == (3, 1, 1, 1)
+        assert [self.subscription.get(timeout=0).event_id
+                for _ in range(3)] == [1, 2, 3]
+
+    def test_set_frame_score__invalid_score_queues_no_task(self):
+        services.set_frame_score(self.queryset, self.game_id, 'XX')
+        assert tasks._runner is None
+        assert not game_models.DailyStatistics.objects.exists()
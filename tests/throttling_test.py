@@ -0,0 +1,97 @@
+"""Unit tests for rate limiting and load shedding."""
+from unittest import mock
+
+from django import test as django_test
+from django import urls
+from rest_framework import status
+from rest_framework import test
+
+from game import throttling
+
+
+class TokenBucketStoreTest(django_test.SimpleTestCase):
+
+    def test_consume__burst_then_rate(self):
+        store = throttling.TokenBucketStore(rate=2, burst=2)
+        assert store.consume('lane-1', now=0) == 0
+        assert store.consume('lane-1', now=0) == 0
+        assert store.consume('lane-1', now=0) == 0.5
+        assert store.consume('lane-1', now=0.5) == 0
+        # Other keys have their own bucket.
+        assert store.consume('lane-2', now=0.5) == 0
+
+    def test_consume__least_recently_used_key_evicted(self):
+        store = throttling.TokenBucketStore(rate=1, burst=1, max_keys=2)
+        store.consume('lane-1', now=0)
+        store.consume('lane-2', now=0)
+        store.consume('lane-1', now=0)
+        store.consume('lane-3', now=0)
+        assert len(store) == 2
+        assert list(store._buckets) == ['lane-1', 'lane-3']
+
+
+class ThrottlingViewSetTest(test.APITestCase):
+
+    def setUp(self):
+        url = urls.reverse('register-game')
+        self.game_id = self.client.post(url).json()['game_id']
+
+    @django_test.override_settings(
+        GAME_RATE_LIMITS={'game': {'RATE': 0.01, 'BURST': 1}})
+    def test_set_score__game_rate_exceeded(self):
+        rejected = throttling.rejected_counts().get('game', 0)
+        url = urls.reverse('play-game', args=(self.game_id, 'X'))
+        assert self.client.post(url).status_code == status.HTTP_200_OK
+        response = self.client.post(url)
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert response['Retry-After'] == '100'
+        assert response.json()['errors'][0]['error_code'] == 429
+        # Reads are not throttled.
+        response = self.client.get(
+            urls.reverse('get-score', args=(self.game_id,)))
+        assert response.status_code == status.HTTP_200_OK
+        response = self.client.get(urls.reverse('get-throttling'))
+        assert response.json()['rejected']['game'] == rejected + 1
+
+    @django_test.override_settings(
+        GAME_RATE_LIMITS={'client': {'RATE': 0.01, 'BURST': 1}})
+    def test_set_score__spoofed_forwarded_for(self):
+        url = urls.reverse('play-game', args=(self.game_id, 'X'))
+        response = self.client.post(url, HTTP_X_FORWARDED_FOR='10.0.0.1')
+        assert response.status_code == status.HTTP_200_OK
+        # A new X-Forwarded-For does not make a new client.
+        response = self.client.post(url, HTTP_X_FORWARDED_FOR='10.0.0.2')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @django_test.override_settings(
+        GAME_RATE_LIMITS={'client': {'RATE': 0.01, 'BURST': 1}},
+        REST_FRAMEWORK={'NUM_PROXIES': 1})
+    def test_set_score__clients_behind_proxy(self):
+        url = urls.reverse('play-game', args=(self.game_id, 'X'))
+        for client in ('10.0.0.1', '10.0.0.2'):
+            response = self.client.post(
+                url, HTTP_X_FORWARDED_FOR='1.2.3.4, ' + client)
+            assert response.status_code == status.HTTP_200_OK
+        response = self.client.post(
+            url, HTTP_X_FORWARDED_FOR='5.6.7.8, 10.0.0.1')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    @django_test.override_settings(GAME_MAX_PENDING_WRITES=0)
+    def test_set_score__too_many_pending_writes(self):
+        response = self.client.post(
+            urls.reverse('play-game', args=(self.game_id, 'X')))
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response['Retry-After'] == '1'
+        assert response.json()['errors'][0]['error_code'] == 503
+
+
+class WriteConcurrencyMiddlewareTest(django_test.SimpleTestCase):
+
+    @django_test.override_settings(GAME_MAX_PENDING_WRITES=1)
+    def test_pending_writes_released(self):
+        middleware = throttling.WriteConcurrencyMiddleware(
+            mock.Mock(return_value='response'))
+        request = mock.Mock(method='POST')
+        assert middleware(request) == 'response'
+        assert middleware(request) == 'response'
+        assert middleware.pending_writes == 0
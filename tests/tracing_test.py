@@ -0,0 +1,102 @@
+"""Unit tests for the tracing of the service layer."""
+import json
+import os
+import tempfile
+
+from django import test as django_test
+from django import urls
+from rest_framework import test
+
+from game import models
+from game import tracing
+
+IN_MEMORY = {'EXPORTER': 'game.tracing.InMemoryExporter', 'SAMPLE_RATE': 1}
+
+
+class TraceTest(django_test.TestCase):
+
+    @django_test.override_settings(GAME_TRACING=IN_MEMORY)
+    def test_trace__nested_spans(self):
+        with tracing.trace('root', game_id='abc') as root_span:
+            with tracing.span('child', frame=1) as child_span:
+                models.GameRegistration.objects.count()
+            root_span.set_attribute('frame', 2)
+        spans = tracing.get_exporter().spans[-2:]
+        assert [span['name'] for span in spans] == ['child', 'root']
+        child, root = spans
+        assert child['trace_id'] == root['trace_id']
+        assert child['parent_id'] == root['span_id'] == root_span.span_id
+        assert child['span_id'] == child_span.span_id
+        assert root['parent_id'] is None
+        assert child['attributes'] == {'frame': 1, 'query_count': 1}
+        assert root['attributes'] == {
+            'game_id': 'abc', 'frame': 2, 'query_count': 1}
+
+    @django_test.override_settings(
+        GAME_TRACING=dict(IN_MEMORY, SAMPLE_RATE=0))
+    def test_trace__not_sampled(self):
+        exporter = tracing.get_exporter()
+        with tracing.trace('root') as root_span:
+            # Nested traces belong to the unsampled trace.
+            with tracing.trace('nested') as nested_span:
+                with tracing.span('child') as child_span:
+                    pass
+        assert root_span is nested_span is child_span is tracing._NOOP_SPAN
+        assert exporter.spans == []
+
+    def test_span__outside_trace(self):
+        assert tracing.span('child') is tracing._NOOP_SPAN
+        with tracing.trace('root') as root_span:
+            assert root_span is tracing._NOOP_SPAN
+
+    def test_json_file_exporter(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'traces.jsonl')
+        options = {'EXPORTER': 'game.tracing.JsonFileExporter',
+                   'SAMPLE_RATE': 1, 'PATH': path}
+        with self.settings(GAME_TRACING=options):
+            with tracing.trace('root'):
+                pass
+            with tracing.trace('root'):
+                pass
+        with open(path) as trace_file:
+            spans = [json.loads(line) for line in trace_file]
+        os.remove(path)
+        os.rmdir(directory)
+        assert [span['name'] for span in spans] == ['root', 'root']
+        assert spans[0]['trace_id'] != spans[1]['trace_id']
+
+    def test_json_file_exporter__default_path(self):
+        exporter = tracing.JsonFileExporter({})
+        assert exporter.path == tracing.DEFAULT_PATH
+        assert os.path.dirname(exporter.path) == tempfile.gettempdir()
+
+
+class SetScoreTraceTest(test.APITestCase):
+
+    @django_test.override_settings(GAME_TRACING=IN_MEMORY)
+    def test_set_score(self):
+        game_id = self.client.post(
+            urls.reverse('register-game')).json()['game_id']
+        for score in ('X', '7/', '7-2'):
+            self.client.post(urls.reverse('play-game', args=(game_id, score)))
+        spans = tracing.get_exporter().spans
+        trace_id = spans[-1]['trace_id']
+        spans = [span for span in spans if span['trace_id'] == trace_id]
+        names = [span['name'] for span in spans]
+        for name in ('transaction', 'game_lookup', 'frames_lookup',
+                     'max_frame_aggregate', 'version_lookup', 'create_frame',
+                     'previous_frames', 'save', 'retroactive_update',
+                     'serialization'):
+            assert name in names
+        # The spare of the second frame is scored retroactively.
+        retroactive = [span for span in spans
+                       if span['name'] == 'retroactive_update']
+        assert [span['attributes']['frames'] for span in retroactive] == [[2]]
+        assert retroactive[0]['attributes']['query_count'] == 1
+        root = spans[-1]
+        assert root['name'] == 'set_score'
+        assert root['attributes']['game_id'] == game_id
+        assert root['attributes']['query_count'] == sum(
+            span['attributes']['query_count'] for span in spans
+            if span['parent_id'] == root['span_id'])
@@ -5,9 +5,11 @@ import pytest
 from rest_framework import status
 from rest_framework import test
 
+from django import db
 from django import urls
 
 import collections
+from unittest import mock
 
 
 class ViewSetTest(test.APITestCase):
@@ -73,13 +75,20 @@ class ViewSetTest(test.APITestCase):
         score_url = urls.reverse('get-score', args=(self.game_id,))
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X']
         play_game_responses = {
-            0: {'game_id': self.game_id, 'total_score': None},
-            1: {'game_id': self.game_id, 'total_score': 20},
-            2: {'game_id': self.game_id, 'total_score': 46},
-            3: {'game_id': self.game_id, 'total_score': 46},
-            4: {'game_id': self.game_id, 'total_score': 66},
-            5: {'game_id': self.game_id, 'total_score': 66},
-            6: {'game_id': self.game_id, 'total_score': 96}
+            0: {'game_id': self.game_id, 'total_score': None,
+                'guaranteed_score': 10, 'max_possible_score': 300},
+            1: {'game_id': self.game_id, 'total_score': 20,
+                'guaranteed_score': 30, 'max_possible_score': 280},
+            2: {'game_id': self.game_id, 'total_score': 46,
+                'guaranteed_score': 46, 'max_possible_score': 256},
+            3: {'game_id': self.game_id, 'total_score': 46,
+                'guaranteed_score': 56, 'max_possible_score': 246},
+            4: {'game_id': self.game_id, 'total_score': 66,
+                'guaranteed_score': 76, 'max_possible_score': 246},
+            5: {'game_id': self.game_id, 'total_score': 66,
+                'guaranteed_score': 96, 'max_possible_score': 246},
+            6: {'game_id': self.game_id, 'total_score': 96,
+                'guaranteed_score': 126, 'max_possible_score': 246}
         }
         for index, score in enumerate(scores):
             game_url = urls.reverse('play-game', args=(self.game_id, score))
@@ -91,19 +100,212 @@ class ViewSetTest(test.APITestCase):
         score_url = urls.reverse('get-score', args=(self.game_id,))
         scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '4/', '2-3', 'X-X-X']
         play_game_responses = {
-            0: {'game_id': self.game_id, 'total_score': None},
-            1: {'game_id': self.game_id, 'total_score': 20},
-            2: {'game_id': self.game_id, 'total_score': 46},
-            3: {'game_id': self.game_id, 'total_score': 46},
-            4: {'game_id': self.game_id, 'total_score': 66},
-            5: {'game_id': self.game_id, 'total_score': 66},
-            6: {'game_id': self.game_id, 'total_score': 96},
-            7: {'game_id': self.game_id, 'total_score': 140},
-            8: {'game_id': self.game_id, 'total_score': 157},
-            9: {'game_id': self.game_id, 'total_score': 187},
+            0: {'game_id': self.game_id, 'total_score': None,
+                'guaranteed_score': 10, 'max_possible_score': 300},
+            1: {'game_id': self.game_id, 'total_score': 20,
+                'guaranteed_score': 30, 'max_possible_score': 280},
+            2: {'game_id': self.game_id, 'total_score': 46,
+                'guaranteed_score': 46, 'max_possible_score': 256},
+            3: {'game_id': self.game_id, 'total_score': 46,
+                'guaranteed_score': 56, 'max_possible_score': 246},
+            4: {'game_id': self.game_id, 'total_score': 66,
+                'guaranteed_score': 76, 'max_possible_score': 246},
+            5: {'game_id': self.game_id, 'total_score': 66,
+                'guaranteed_score': 96, 'max_possible_score': 246},
+            6: {'game_id': self.game_id, 'total_score': 96,
+                'guaranteed_score': 126, 'max_possible_score': 246},
+            7: {'game_id': self.game_id, 'total_score': 140,
+                'guaranteed_score': 150, 'max_possible_score': 220},
+            8: {'game_id': self.game_id, 'total_score': 157,
+                'guaranteed_score': 157, 'max_possible_score': 187},
+            9: {'game_id': self.game_id, 'total_score': 187,
+                'guaranteed_score': 187, 'max_possible_score': 187},
         }
         for index, score in enumerate(scores):
             game_url = urls.reverse('play-game', args=(self.game_id, score))
             self.client.post(game_url)
             game_response = self.client.get(score_url)
             assert game_response.json() == play_game_responses[index]
+
+    def test_get_scorecard(self):
+        for score in ['X', '7/', '7-2']:
+            self.client.post(
+                urls.reverse('play-game', args=(self.game_id, score)))
+        scorecard_url = urls.reverse('get-scorecard', args=(self.game_id,))
+        response = self.client.get(scorecard_url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            'game_id': self.game_id,
+            'frames': [
+                {'frame': 1, 'attempts': ['X'], 'frame_score': 20,
+                 'total_score_for_frame': 20, 'guaranteed_score': 10,
+                 'max_possible_score': 300},
+                {'frame': 2, 'attempts': ['7', '3'], 'frame_score': 17,
+                 'total_score_for_frame': 37, 'guaranteed_score': 30,
+                 'max_possible_score': 280},
+                {'frame': 3, 'attempts': ['7', '2'], 'frame_score': 9,
+                 'total_score_for_frame': 46, 'guaranteed_score': 46,
+                 'max_possible_score': 256}]}
+        response = self.client.get(scorecard_url, {'since_frame': 3})
+        assert [frame['frame'] for frame in response.json()['frames']] == [
+            2, 3]
+
+    def test_get_scorecard__invalid_since_frame(self):
+        response = self.client.get(
+            urls.reverse('get-scorecard', args=(self.game_id,)),
+            {'since_frame': 'abc'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {
+            'errors': [{'error_code': 400,
+                        'error_message': 'since_frame: abc is invalid.'}]}
+
+    def test_stream_score__completed_game(self):
+        for score in ['X'] * 9 + ['X-X-X']:
+            self.client.post(
+                urls.reverse('play-game', args=(self.game_id, score)))
+        response = self.client.get(
+            urls.reverse('score-events', args=(self.game_id,)),
+            HTTP_ACCEPT='text/event-stream', HTTP_LAST_EVENT_ID='9')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/event-stream'
+        body = b''.join(response.streaming_content).decode()
+        assert body.startswith('id: 10\nevent: frame\ndata: ')
+        assert '"total_score_for_frame":300' in body
+
+    def test_stream_score__game_not_found(self):
+        response = self.client.get(
+            urls.reverse('score-events', args=('abcde12345',)),
+            HTTP_ACCEPT='text/event-stream')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_get_scores(self):
+        for score in ['X', '7/', '7-2']:
+            self.client.post(
+                urls.reverse('play-game', args=(self.game_id, score)))
+        response = self.client.get(
+            urls.reverse('get-scores'),
+            {'game_ids': '{},abcde12345'.format(self.game_id)})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {'games': [
+            {'game_id': self.game_id, 'total_score': 46,
+             'guaranteed_score': 46, 'max_possible_score': 256},
+            {'errors': [{
+                'error_code': 404,
+                'error_message': (
+                    'No game was found for the game id: abcde12345.')}]}]}
+
+    def test_get_scores__missing_game_ids(self):
+        response = self.client.get(urls.reverse('get-scores'))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_list_games(self):
+        for score in ['X', '7/', '7-2']:
+            self.client.post(
+                urls.reverse('play-game', args=(self.game_id, score)))
+        game_id = self.client.post(
+            urls.reverse('register-game')).json()['game_id']
+        response = self.client.get(urls.reverse('list-games'), {'limit': 1})
+        assert response.status_code == status.HTTP_200_OK
+        [game] = response.json()['games']
+        response = self.client.get(
+            urls.reverse('list-games'),
+            {'limit': 1, 'cursor': response.json()['next_cursor']})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['next_cursor'] is None
+        games = [game] + response.json()['games']
+        assert sorted(game['game_id'] for game in games) == sorted(
+            [self.game_id, game_id])
+        [game] = [game for game in games if game['game_id'] == self.game_id]
+        assert (game['completed'], game['total_score'],
+                game['max_possible_score']) == (False, 46, 256)
+
+    def test_list_games__invalid_parameters(self):
+        response = self.client.get(
+            urls.reverse('list-games'),
+            {'limit': 'all', 'start': '2018-13-01'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'errors': [
+            {'error_code': 400,
+             'error_message': 'start: 2018-13-01 is invalid.'},
+            {'error_code': 400, 'error_message': 'limit: all is invalid.'}]}
+        response = self.client.get(
+            urls.reverse('list-games'), {'status': 'done'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_get_statistics(self):
+        response = self.client.post(
+            urls.reverse('register-game'), {'center': 'lanes-1'})
+        game_id = response.json()['game_id']
+        for score in ['X', '7/', '7-2']:
+            self.client.post(urls.reverse('play-game', args=(game_id, score)))
+        response = self.client.get(
+            urls.reverse('get-statistics'), {'center': 'lanes-1'})
+        assert response.status_code == status.HTTP_200_OK
+        [day] = response.json()['days']
+        assert day['center'] == 'lanes-1'
+        assert day['frames'] == 3
+        assert day['strike_rate'] == 1.0 / 3
+        assert day['average_score'] is None
+
+    def test_get_statistics__invalid_date(self):
+        response = self.client.get(
+            urls.reverse('get-statistics'), {'start': '2018-13-01'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'errors': [
+            {'error_code': 400,
+             'error_message': 'start: 2018-13-01 is invalid.'}]}
+
+    def test_register_games(self):
+        response = self.client.post(
+            urls.reverse('register-games'),
+            {'games': ['X X X X X X X X X X-X-X',
+                       '0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0 0-0'],
+             'center': 'lanes-1'}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        perfect_game, gutter_game = response.json()['games']
+        assert perfect_game['frames'][-1] == {
+            'frame': 10, 'attempts': ['X', 'X', 'X'], 'frame_score': 30,
+            'total_score_for_frame': 300, 'guaranteed_score': 300,
+            'max_possible_score': 300}
+        assert [frame['total_score_for_frame']
+                for frame in gutter_game['frames']] == [0] * 10
+        response = self.client.get(
+            urls.reverse('get-score', args=(perfect_game['game_id'],)))
+        assert response.json()['total_score'] == 300
+
+    def test_register_games__single_game(self):
+        response = self.client.post(
+            urls.reverse('register-games'),
+            {'game': 'X 7/ 7-2 9/ X X X 2-3 6/ 7/3'}, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        [game] = response.json()['games']
+        assert game['frames'][-1]['total_score_for_frame'] == 168
+
+    def test_register_games__invalid_game(self):
+        response = self.client.post(
+            urls.reverse('register-games'), {'game': 'X X X'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json() == {'errors': [{
+            'error_code': 400,
+            'error_message': (
+                'Game 1: A game has 10 frames separated by spaces.')}]}
+
+
+class StreamScoreTest(test.APITransactionTestCase):
+
+    def test_stream_score__no_connection_while_idle(self):
+        game_id = self.client.post(
+            urls.reverse('register-game')).json()['game_id']
+        self.client.post(urls.reverse('play-game', args=(game_id, 'X')))
+        connection = db.connections['default']
+        with mock.patch.object(connection, 'close',
+                               wraps=connection.close) as close:
+            response = self.client.get(
+                urls.reverse('score-events', args=(game_id,)),
+                HTTP_ACCEPT='text/event-stream')
+            # Closed once the frames saved so far are read, before the
+            # stream waits for the next ones.
+            assert close.call_count == 1
+        stream = iter(response.streaming_content)
+        assert next(stream).startswith(b'id: 1\nevent: frame\n')
+        response.close()
@@ -0,0 +1,266 @@
+"""Unit tests for the write-behind queue of the frames."""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django import test
+
+from game import journal
+from game import models as game_models
+from game import queued_frames
+from game import scoring
+from game import services
+from game import writebehind
+
+
+class JournalTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'frames.journal')
+        self.journal = journal.Journal(self.path)
+
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def test_write__sequence_numbers(self):
+        assert self.journal.write({'frame': 1}) == 1
+        assert self.journal.write({'frame': 2}) == 2
+        self.journal.sync(2)
+        assert journal.read(self.path) == [{'frame': 1}, {'frame': 2}]
+
+    def test_sync__group_commit(self):
+        for frame in range(1, 4):
+            self.journal.write({'frame': frame})
+        with mock.patch('os.fsync') as fsync:
+            self.journal.sync(1)
+            # Made durable by the first sync.
+            self.journal.sync(3)
+        assert fsync.call_count == 1
+        assert len(journal.read(self.path)) == 3
+
+    def test_truncate(self):
+        self.journal.write({'frame': 1})
+        self.journal.write({'frame': 2})
+        assert self.journal.truncate(2)
+        assert journal.read(self.path) == []
+        assert self.journal.write({'frame': 3}) == 3
+        self.journal.sync(3)
+        assert journal.read(self.path) == [{'frame': 3}]
+
+    def test_truncate__committed_prefix(self):
+        for frame in range(1, 5):
+            self.journal.write({'frame': frame})
+        # Kept until the records dropped are as large as the records left.
+        assert not self.journal.truncate(1)
+        assert self.journal.truncate(2)
+        assert journal.read(self.path) == [{'frame': 3}, {'frame': 4}]
+        assert self.journal.write({'frame': 5}) == 5
+        assert not self.journal.truncate(2)
+        assert self.journal.truncate(4)
+        self.journal.sync(5)
+        assert journal.read(self.path) == [{'frame': 5}]
+        assert self.journal.truncate(5)
+        assert journal.read(self.path) == []
+
+    def test_read__partial_last_record(self):
+        with open(self.path, 'wb') as journal_file:
+            journal_file.write(b'{"frame":1}\n{"fra')
+        assert journal.read(self.path) == [{'frame': 1}]
+        assert journal.read(os.path.join(self.directory, 'missing')) == []
+
+
+class WriteBehindQueueTest(test.SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'frames.journal')
+        self.journal = journal.Journal(self.path)
+        self.batches = []
+        self.release = threading.Event()
+        self.release.set()
+        self.dead_letter_path = os.path.join(self.directory, 'dead_letters')
+        self.queue = self._queue(self._commit)
+
+    def tearDown(self):
+        self.release.set()
+        self.queue.stop()
+        self.journal.close()
+        shutil.rmtree(self.directory)
+
+    def _queue(self, commit):
+        return writebehind.WriteBehindQueue(
+            self.journal, commit, batch_size=3, linger_seconds=0,
+            max_attempts=3, dead_letter_path=self.dead_letter_path)
+
+    def _commit(self, records):
+        self.release.wait()
+        self.batches.append(records)
+
+    def test_submit__committed_in_batches(self):
+        self.release.clear()
+        for frame in range(1, 8):
+            self.queue.submit('game', {'frame': frame})
+        assert len(journal.read(self.path)) == 7
+        assert [record['frame'] for record in self.queue.pending('game')] == (
+            list(range(1, 8)))
+        assert not self.queue.wait('game', timeout=0.01)
+        self.queue.start()
+        self.release.set()
+        assert self.queue.wait('game', timeout=5)
+        assert [[record['frame'] for record in batch]
+                for batch in self.batches] == [[1, 2, 3], [4, 5, 6], [7]]
+        assert self.queue.pending('game') == []
+        assert len(self.queue) == 0
+        self.queue.stop(timeout=5)
+        assert journal.read(self.path) == []
+
+    def test_submit__failed_batch_retried(self):
+        commit = mock.Mock(side_effect=[ValueError('Database is locked.'),
+                                        None])
+        self.queue = self._queue(commit)
+        self.queue.start()
+        with mock.patch.object(writebehind, 'RETRY_SECONDS', 0):
+            self.queue.submit('game', {'frame': 1})
+            assert self.queue.flush(timeout=5)
+        assert commit.call_count == 2
+        assert not os.path.exists(self.dead_letter_path)
+
+    def test_submit__failed_batch_dead_lettered(self):
+        commit = mock.Mock(side_effect=ValueError('Database is locked.'))
+        self.queue = self._queue(commit)
+        dead_letters = writebehind.DEAD_LETTERS.value()
+        with mock.patch.object(writebehind, 'RETRY_SECONDS', 0):
+            self.queue.submit('game', {'frame': 1})
+            self.queue.submit('game', {'frame': 2})
+            self.queue.start()
+            assert self.queue.flush(timeout=5)
+        assert commit.call_count == 3
+        assert journal.read(self.dead_letter_path) == [
+            {'frame': 1}, {'frame': 2}]
+        assert writebehind.DEAD_LETTERS.value() == dead_letters + 2
+        self.queue.stop(timeout=5)
+        assert journal.read(self.path) == []
+
+    def test_wait__from_writer_thread(self):
+        waited = []
+
+        def commit(records):
+            # e.g. the scorecard published once the batch is committed.
+            waited.append(self.queue.wait('game', timeout=5))
+
+        self.queue = self._queue(commit)
+        self.queue.start()
+        self.queue.submit('game', {'frame': 1})
+        assert self.queue.flush(timeout=1)
+        assert waited == [True]
+
+    def test_stop__commits_queued_records(self):
+        self.queue.submit('game', {'frame': 1})
+        self.queue.submit('other-game', {'frame': 1})
+        self.queue.start()
+        self.queue.stop(timeout=5)
+        assert sum(len(batch) for batch in self.batches) == 2
+
+
+class WriteBehindTest(test.TransactionTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'frames.journal')
+        settings_override = test.override_settings(GAME_WRITE_BEHIND={
+            'ENABLED': True, 'JOURNAL_PATH': self.path, 'LINGER_SECONDS': 0})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(writebehind.shutdown)
+        self.queryset = game_models.ScorePerFrame.objects.select_related('game')
+
+    def _frames(self, game_id):
+        return list(game_models.ScorePerFrame.objects.filter(
+            game=game_id).order_by('frame').values_list(
+            'frame', 'first_attempt_score', 'frame_score',
+            'total_score_for_frame', 'max_possible_score'))
+
+    def test_set_frame_score__scored_in_memory(self):
+        game_id = services.register_game('lanes-1').game_id
+        scores = ['X', '7/', '7-2', '9/', 'X', 'X', 'X', '2-3', '6/', '7/3']
+        frames = []
+        for score in scores:
+            frames.append(services.set_frame_score(
+                self.queryset, game_id, score))
+            # The in-memory test database locks the tables being written.
+            writebehind.wait(game_id)
+        assert [(frame.frame, frame.frame_score) for frame in frames[:3]] == [
+            (1, None), (2, None), (3, 9)]
+        assert frames[-1].total_score_for_frame == 168
+        assert services.get_frame_score(
+            self.queryset, game_id).total_score == 168
+        assert [frame[3] for frame in self._frames(game_id)] == [
+            20, 37, 46, 66, 96, 118, 133, 138, 155, 168]
+        statistics = game_models.DailyStatistics.objects.get(center='lanes-1')
+        assert (statistics.frames, statistics.strikes, statistics.spares,
+                statistics.completed_games) == (10, 4, 4, 1)
+        result = services.set_frame_score(self.queryset, game_id, 'X')
+        assert result.errors[0].error_code == 400
+
+    def test_set_frame_score__errors(self):
+        game_id = services.register_game().game_id
+        result = services.set_frame_score(self.queryset, 'abcde12345', 'X')
+        assert result.errors[0].error_code == 404
+        result = services.set_frame_score(self.queryset, game_id, 'Y')
+        assert result.errors[0].error_code == 400
+        result = services.set_frame_score(self.queryset, game_id, '9-9')
+        assert result.errors[0].error_code == 400
+        assert not os.path.getsize(self.path)
+
+    def test_set_frame_score__matches_in_memory_scoring(self):
+        game_id = services.register_game().game_id
+        scores = ['X', 'X', '3-4', '5/', 'X', '0-0', 'X', 'X', 'X', 'X-7/']
+        for score in scores:
+            services.set_frame_score(self.queryset, game_id, score)
+            writebehind.wait(game_id)
+        attempts = [services._parse_score(score, frame)
+                    for frame, score in enumerate(scores, 1)]
+        assert [frame[2:] for frame in self._frames(game_id)] == [
+            (frame_score, total_score, state.max_possible_score)
+            for frame_score, total_score, state in scoring.score_frames(
+                attempts)]
+
+    def test_get_queue__replays_journal(self):
+        game_id = services.register_game().game_id
+        services.set_frame_score(self.queryset, game_id, 'X')
+        writebehind.shutdown()
+        # The first frame was committed before the crash, the others not.
+        with open(self.path, 'w') as journal_file:
+            for frame, attempts in ((1, ['X', '0', '0']),
+                                    (2, ['X', '0', '0']),
+                                    (3, ['3', '4', '0'])):
+                journal_file.write(json.dumps({
+                    'game_id': game_id, 'frame': frame,
+                    'attempts': attempts}) + '\n')
+            journal_file.write('{"game_id": ')
+        frame = services.set_frame_score(self.queryset, game_id, '2-2')
+        assert frame.frame == 4
+        writebehind.wait(game_id)
+        assert [frame[:4] for frame in self._frames(game_id)] == [
+            (1, 'X', 23, 23), (2, 'X', 17, 40), (3, '3', 7, 47),
+            (4, '2', 4, 51)]
+
+    def test_start_on_startup__replays_journal_before_reads(self):
+        game_id = services.register_game().game_id
+        with open(self.path, 'w') as journal_file:
+            for frame, attempts in ((1, ['X', '0', '0']),
+                                    (2, ['3', '4', '0'])):
+                journal_file.write(json.dumps({
+                    'game_id': game_id, 'frame': frame,
+                    'attempts': attempts}) + '\n')
+        # The process restarts, and reads the game before any write.
+        queued_frames.start_on_startup()
+        assert services.get_frame_score(
+            self.queryset, game_id).total_score == 24
+        assert not os.path.getsize(self.path)